@@ -85,7 +85,8 @@ __all__ = [ "EquationFactory", "BaseBuilder", "ArgumentBuilder",
 # right-side over its arguments. This results in an array of BaseBuilder
 # instances, not an BaseBuilder that contains an array.
 
-_builders = {}
+# The global builders dictionary, see _getBuilders.
+_builders = None
 
 
 import numpy
@@ -112,7 +113,7 @@ class EquationFactory(object):
 
         This registers "pi" and "e" as constants within the factory.
         """
-        self.builders = dict(_builders)
+        self.builders = dict(_getBuilders())
         self.registerConstant("pi", numpy.pi)
         self.registerConstant("e", numpy.e)
         self.newargs = set()
@@ -599,24 +600,43 @@ def wrapFunction(name, func, nin = 2, nout = 1):
 
 def getBuilder(name):
     """Get an operator from the global builders dictionary."""
-    return _builders[name]
+    return _getBuilders()[name]
 
-def __wrapNumpyOperators():
+def _getBuilders():
+    """Get the global builders dictionary.
+
+    The numpy ufuncs and the SrFit operators are wrapped on the first call.
+    The dictionary is only published when it is complete, so that other
+    threads never see it half filled.
+    """
+    global _builders
+    builders = _builders
+    if builders is None:
+        builders = {}
+        __wrapNumpyOperators(builders)
+        __wrapSrFitOperators(builders)
+        _builders = builders
+    return builders
+
+def __wrapNumpyOperators(builders):
     """Export all numpy operators as OperatorBuilder instances in the module
     namespace.
+
+    builders    --  The dictionary that receives the OperatorBuilders.
     """
     for name in dir(numpy):
         op = getattr(numpy, name)
         if isinstance(op, numpy.ufunc):
-            _builders[name] = OperatorBuilder(name)
+            builders[name] = OperatorBuilder(name)
     return
-__wrapNumpyOperators()
 
 # Register other functions as well
-def __wrapSrFitOperators():
+def __wrapSrFitOperators(builders):
     """Export all non-base operators from the
     diffpy.srfit.equation.literals.operators module as OperatorBuilder
     instances in the module namespace.
+
+    builders    --  The dictionary that receives the OperatorBuilders.
     """
     import inspect
     opmod = literals.operators
@@ -628,9 +648,8 @@ def __wrapSrFitOperators():
             and opclass is not opmod.UFuncOperator:
 
             op = opclass()
-            _builders[op.name] = OperatorBuilder(op.name, op)
+            builders[op.name] = OperatorBuilder(op.name, op)
 
     return
-__wrapSrFitOperators()
 
 # End of file
@@ -25,6 +25,7 @@ class LiteralABC(object):
     """Abstract Base Class for Literal. See Literal for usage."""
 
     __metaclass__ = ABCMeta
+    __slots__ = ()
 
     @abstractmethod
     def identify(self, visitor): pass
@@ -39,6 +40,8 @@ class LiteralABC(object):
 class ArgumentABC(LiteralABC):
     """Abstract Base Class for Argument. See Argument for usage."""
 
+    __slots__ = ()
+
     @abstractmethod
     def setValue(self, value): pass
 
@@ -36,12 +36,13 @@ class Argument(Literal, ArgumentABC):
 
     """
 
-    const = None
+    __slots__ = ("name", "const", "_value")
 
     def __init__(self, name = None, value = None, const = False):
         """Initialization."""
         Literal.__init__(self, name)
         self.const = const
+        self._value = None
         self.value = value
         return
 
@@ -39,6 +39,9 @@ class Literal(Observable,LiteralABC):
     name = None
     _value = None
 
+    # Derived classes may define slots for the attributes
+    __slots__ = ()
+
     def __init__(self, name = None):
         """Initialization."""
         Observable.__init__(self)
@@ -27,3 +27,8 @@ class SrFitError(Exception):
 class ParseError(Exception):
     """Exception used by ProfileParsers."""
     pass
+
+
+class FitCancelled(SrFitError):
+    """Exception raised when a FitJob is cancelled."""
+    pass
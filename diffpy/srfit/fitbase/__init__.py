@@ -29,17 +29,25 @@ http://www.reflectometry.org/danse/park.html
 
 """
 
-__all__ = ['Calculator', 'FitContribution', 'FitHook', 'FitRecipe',
-'FitResults', 'initializeRecipe', 'PlotFitHook', 'Profile', 'ProfileGenerator',
-'SimpleRecipe']
+__all__ = ['AsyncFitHook', 'Calculator', 'FitContribution', 'FitHook',
+'FitRecipe', 'FitResults', 'initializeRecipe', 'PlotFitHook', 'Profile',
+'ProfileGenerator', 'ProfilingFitHook', 'SimpleRecipe']
 
-from diffpy.srfit.fitbase.calculator import Calculator
-from diffpy.srfit.fitbase.fitcontribution import FitContribution
-from diffpy.srfit.fitbase.fithook import FitHook, PlotFitHook
-from diffpy.srfit.fitbase.fitrecipe import FitRecipe
-from diffpy.srfit.fitbase.simplerecipe import SimpleRecipe
-from diffpy.srfit.fitbase.fitresults import FitResults, initializeRecipe
-from diffpy.srfit.fitbase.profile import Profile
-from diffpy.srfit.fitbase.profilegenerator import ProfileGenerator
+# The modules are imported when their names are first used.
+from diffpy.srfit.util.lazyimport import lazyExport
+lazyExport(__name__, {
+    "AsyncFitHook" : "diffpy.srfit.fitbase.fithook",
+    "Calculator" : "diffpy.srfit.fitbase.calculator",
+    "FitContribution" : "diffpy.srfit.fitbase.fitcontribution",
+    "FitHook" : "diffpy.srfit.fitbase.fithook",
+    "FitRecipe" : "diffpy.srfit.fitbase.fitrecipe",
+    "FitResults" : "diffpy.srfit.fitbase.fitresults",
+    "initializeRecipe" : "diffpy.srfit.fitbase.fitresults",
+    "PlotFitHook" : "diffpy.srfit.fitbase.fithook",
+    "Profile" : "diffpy.srfit.fitbase.profile",
+    "ProfileGenerator" : "diffpy.srfit.fitbase.profilegenerator",
+    "ProfilingFitHook" : "diffpy.srfit.fitbase.profiling",
+    "SimpleRecipe" : "diffpy.srfit.fitbase.simplerecipe",
+    })
 
 # End of file
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Sequential refinement of one model against many datasets.
+
+The batchRefine generator refines the recipe made by a factory function
+against an ordered sequence of data sources, such as a temperature series. The
+recipe is built once and only the observed profiles are replaced for each
+source. Each refinement starts from the variable values of the previous one.
+The sources can be split into independent chains that are refined in parallel
+worker processes. A BatchResult is yielded for every source as soon as its
+refinement finishes.
+
+"""
+
+__all__ = ["batchRefine", "BatchResult", "loadSource"]
+
+import Queue
+
+from diffpy.srfit.exceptions import SrFitError
+from diffpy.srfit.util.ordereddict import OrderedDict
+from diffpy.srfit.fitbase.profileparser import ProfileParser
+from diffpy.srfit.fitbase.fitoptimizer import optimizeRecipe, _countWorkers
+
+class BatchResult(object):
+    """Outcome of the refinement against one data source.
+
+    Attributes
+    index   --  Index of the source in the sequence of sources.
+    source  --  The data source.
+    chain   --  Index of the chain that refined the source.
+    values  --  OrderedDict of the values of all recipe variables, fixed or
+                free, after the refinement.
+    results --  The OptimizeResults of the refinement.
+
+    """
+
+    def __init__(self, index, source, chain, values, results):
+        """Initialize the attributes. See the class documentation."""
+        self.index = index
+        self.source = source
+        self.chain = chain
+        self.values = values
+        self.results = results
+        return
+
+    cost = property(lambda self: self.results.cost,
+            doc = "The scalar residual after the refinement.")
+
+    def __str__(self):
+        return "%s(%i, %r, cost = %g)" % (self.__class__.__name__,
+                self.index, self.source, self.cost)
+
+# End class BatchResult
+
+def loadSource(recipe, source):
+    """Load the observed profiles of a recipe from a data source.
+
+    This is the default loader of batchRefine. The observed profile is
+    replaced, but the calculation points of the Profile are kept.
+
+    recipe  --  The FitRecipe.
+    source  --  The data for a recipe with a single FitContribution, either
+                a ProfileParser with parsed data, a file name for
+                Profile.loadtxt or an (x, y) or (x, y, dy) tuple of arrays.
+                For a recipe with several FitContributions, this is a
+                dictionary of such data indexed by the FitContribution name.
+
+    Raises ValueError if the source cannot be matched to the
+    FitContributions.
+    """
+    contributions = recipe._contributions
+    if not isinstance(source, dict):
+        if len(contributions) != 1:
+            m = "Source must be a dictionary for several FitContributions"
+            raise ValueError(m)
+        source = {contributions.keys()[0] : source}
+
+    for name, src in source.items():
+        con = contributions.get(name)
+        if con is None:
+            raise ValueError("FitContribution '%s' does not exist" % name)
+        profile = con.profile
+        if isinstance(src, ProfileParser):
+            profile.loadParsedData(src)
+        elif isinstance(src, basestring):
+            profile.loadtxt(src)
+        else:
+            profile.setObservedProfile(*src)
+    return
+
+def batchRefine(factory, sources, loader = loadSource, chains = 1,
+        workers = 1, warmstart = True, **kw):
+    """Refine a recipe against a sequence of data sources.
+
+    This is a generator that yields a BatchResult for each source as soon as
+    it is refined. With more than one chain the results may arrive out of
+    order, see BatchResult.index.
+
+    factory --  A function that takes no arguments and returns a configured
+                FitRecipe. It is called once per chain in the serial mode and
+                once per worker process otherwise. The factory, loader and kw
+                are pickled to the worker processes on platforms without
+                fork.
+    sources --  The ordered sequence of data sources.
+    loader  --  A function loader(recipe, source) that loads a source into
+                the recipe (default loadSource).
+    chains  --  The number of independent chains (default 1). The sources
+                are split into this many contiguous runs. Each chain starts
+                from the initial variable values of the recipe.
+    workers --  The number of worker processes that refine the chains
+                (default 1). If this is -1, one worker is used per CPU.
+    warmstart   --  Flag for starting each refinement from the variable
+                values of the previous refinement in the chain (default True).
+                If this is False, each refinement starts from the initial
+                values.
+    kw      --  Keyword arguments for optimizeRecipe.
+
+    Raises the exception raised in a worker process, or SrFitError if a
+    worker process ends before all sources are refined.
+    """
+    sources = list(sources)
+    chains = max(1, min(chains, len(sources)))
+    jobs = []
+    for i in range(chains):
+        lo = i * len(sources) // chains
+        hi = (i + 1) * len(sources) // chains
+        jobs.append((i, [(j, sources[j]) for j in range(lo, hi)]))
+
+    workers = min(_countWorkers(workers), chains)
+    if workers < 2:
+        for chain, items in jobs:
+            runner = _ChainRunner(factory(), loader, warmstart, kw)
+            for res in runner.run(chain, items):
+                yield res
+        return
+
+    import multiprocessing
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    for job in jobs + [None] * workers:
+        tasks.put(job)
+    procs = []
+    for i in range(workers):
+        proc = multiprocessing.Process(target = _batchWorker,
+                args = (factory, loader, warmstart, kw, tasks, results))
+        proc.daemon = True
+        proc.start()
+        procs.append(proc)
+    try:
+        for received in range(len(sources)):
+            while True:
+                # Check the workers before waiting, so the results they sent
+                # before they ended are taken first.
+                codes = [proc.exitcode for proc in procs]
+                try:
+                    kind, value = results.get(timeout = 0.1)
+                    break
+                except Queue.Empty:
+                    failed = [code for code in codes if code]
+                    if failed:
+                        msg = "A worker process ended with exit code %i"
+                        raise SrFitError(msg % failed[0])
+                    if None not in codes:
+                        msg = "The worker processes ended before all " \
+                                "sources were refined"
+                        raise SrFitError(msg)
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+    return
+
+class _ChainRunner(object):
+    """Refine a recipe along one chain of sources."""
+
+    def __init__(self, recipe, loader, warmstart, kw):
+        self.recipe = recipe
+        self.loader = loader
+        self.warmstart = warmstart
+        self.kw = kw
+        # The initial values of the variables
+        self.initial = self._getValues()
+        return
+
+    def _getValues(self):
+        return OrderedDict((n, v.value) for n, v in
+                self.recipe._parameters.items())
+
+    def _setValues(self, values):
+        for name, val in values.items():
+            self.recipe._parameters[name].value = val
+        return
+
+    def run(self, chain, items):
+        """Refine the (index, source) items in order and yield results."""
+        self._setValues(self.initial)
+        for index, source in items:
+            if not self.warmstart:
+                self._setValues(self.initial)
+            self.loader(self.recipe, source)
+            results = optimizeRecipe(self.recipe, **self.kw)
+            yield BatchResult(index, source, chain, self._getValues(),
+                    results)
+        return
+
+# End class _ChainRunner
+
+def _batchWorker(factory, loader, warmstart, kw, tasks, results):
+    """Refine the chains from the tasks queue in a worker process.
+
+    The worker stops at a None task. The ("result", BatchResult) and
+    ("error", exception) messages are sent to the results queue.
+    """
+    try:
+        recipe = factory()
+        # The hooks report to the main process only.
+        recipe.clearFitHooks()
+        runner = _ChainRunner(recipe, loader, warmstart, kw)
+        for chain, items in iter(tasks.get, None):
+            for res in runner.run(chain, items):
+                results.put(("result", res))
+    except Exception, e:
+        results.put(("error", e))
+    return
+
+# End of file
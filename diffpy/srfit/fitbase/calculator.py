@@ -27,6 +27,7 @@ __all__ = ["Calculator"]
 
 from diffpy.srfit.fitbase.parameterset import ParameterSet
 from diffpy.srfit.equation.literals.operators import Operator
+from diffpy.srfit.fitbase import profiling
 
 class Calculator(Operator, ParameterSet):
     """Base class for calculators.
@@ -82,7 +83,15 @@ class Calculator(Operator, ParameterSet):
         return 0
 
     def operation(self, *args):
-        self._value = self.__call__(*args)
+        timers = profiling.active.timers
+        if timers is None:
+            self._value = self.__call__(*args)
+            return self._value
+        depth = timers.start(self.name)
+        try:
+            self._value = self.__call__(*args)
+        finally:
+            timers.stop(depth)
         return self._value
 
     def _validate(self):
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Checkpoints for resuming long refinements.
+
+A checkpoint is a compact binary (numpy npz) file with the values of all
+variables of a FitRecipe, their fixed or free state, the values of the
+constrained parameters, the evaluation count and the best point visited by
+the optimizer. Checkpoints are written atomically, by writing a temporary file
+and renaming it.
+
+CheckpointFitHook writes checkpoints during a refinement, after a given number
+of residual evaluations or a given wall time. resumeRecipe restores a
+checkpoint to an identically built recipe, so the refinement can continue from
+there. The saved values of the constrained parameters are used to check that
+the constraints of the recipe are the same.
+
+"""
+
+__all__ = ["CheckpointFitHook", "Checkpoint", "saveCheckpoint",
+        "loadCheckpoint", "resumeRecipe"]
+
+import os
+import time
+import tempfile
+
+import numpy
+
+from diffpy.srfit.fitbase.fithook import FitHook
+
+class Checkpoint(object):
+    """Contents of a checkpoint file.
+
+    Attributes
+    names       --  Names of all variables of the recipe.
+    values      --  Array of the variable values.
+    free        --  Boolean array flagging the free variables.
+    connames    --  Full names of the constrained parameters with scalar
+                    values.
+    convals     --  Array of the constrained parameter values.
+    count       --  The number of residual evaluations.
+    bestx       --  Free variable values with the lowest residual seen so far,
+                    or None.
+    bestcost    --  The lowest residual seen so far (inf if unknown).
+
+    """
+
+    def __init__(self, names, values, free, connames = (), convals = (),
+            count = 0, bestx = None, bestcost = numpy.inf):
+        """Initialize the attributes. See the class documentation."""
+        self.names = list(names)
+        self.values = numpy.asarray(values, dtype=float)
+        self.free = numpy.asarray(free, dtype=bool)
+        self.connames = list(connames)
+        self.convals = numpy.asarray(convals, dtype=float)
+        self.count = int(count)
+        self.bestx = bestx
+        self.bestcost = float(bestcost)
+        return
+
+# End class Checkpoint
+
+def _constraintNames(recipe):
+    """Get full names of the constrained parameters with scalar values.
+
+    Returns a list of (name, Constraint) pairs.
+    """
+    items = []
+    for con in recipe._oconstraints:
+        if not numpy.isscalar(con.par.getValue()):
+            continue
+        loc = recipe._locateManagedObject(con.par)
+        name = ".".join(o.name for o in loc) if loc else con.par.name
+        items.append((name, con))
+    return items
+
+def _makeCheckpoint(recipe, conitems, count = 0, bestx = None,
+        bestcost = numpy.inf):
+    """Make a Checkpoint from the current state of a recipe."""
+    variables = recipe._parameters.values()
+    names = [v.name for v in variables]
+    values = [v.value for v in variables]
+    free = [recipe.isFree(v) for v in variables]
+    connames = [name for name, con in conitems]
+    convals = [con.par.getValue() for name, con in conitems]
+    return Checkpoint(names, values, free, connames, convals, count, bestx,
+            bestcost)
+
+def _writeCheckpoint(chk, filename):
+    """Atomically write a Checkpoint to filename."""
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir = dirname, suffix = ".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            bestx = chk.bestx if chk.bestx is not None else []
+            numpy.savez(fp, names = numpy.array(chk.names, dtype=str),
+                    values = chk.values, free = chk.free,
+                    connames = numpy.array(chk.connames, dtype=str),
+                    convals = chk.convals, count = chk.count,
+                    hasbest = chk.bestx is not None,
+                    bestx = numpy.asarray(bestx, dtype=float),
+                    bestcost = chk.bestcost)
+            # Make sure the data is on the disk before it replaces the
+            # previous checkpoint.
+            fp.flush()
+            os.fsync(fp.fileno())
+        # mkstemp creates the file for the owner only. Give it the mode of a
+        # file created with open.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmpname, 0o666 & ~umask)
+        # os.rename does not replace an existing file on Windows.
+        if os.name == "nt" and os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmpname, filename)
+    except:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        raise
+    return
+
+def saveCheckpoint(recipe, filename, count = 0, bestx = None,
+        bestcost = numpy.inf):
+    """Write a checkpoint of the current state of a recipe.
+
+    recipe  --  The FitRecipe.
+    filename    --  The name of the checkpoint file.
+    count   --  The number of residual evaluations to store (default 0).
+    bestx   --  Free variable values with the lowest residual (default None).
+    bestcost    --  The lowest residual (default inf).
+
+    Returns the written Checkpoint.
+    """
+    recipe._prepare()
+    chk = _makeCheckpoint(recipe, _constraintNames(recipe), count, bestx,
+            bestcost)
+    _writeCheckpoint(chk, filename)
+    return chk
+
+def loadCheckpoint(filename):
+    """Read a checkpoint file.
+
+    Returns a Checkpoint instance.
+    """
+    data = numpy.load(filename)
+    try:
+        bestx = data["bestx"] if data["hasbest"] else None
+        chk = Checkpoint(data["names"].tolist(), data["values"],
+                data["free"], data["connames"].tolist(), data["convals"],
+                data["count"], bestx, data["bestcost"])
+    finally:
+        data.close()
+    return chk
+
+def resumeRecipe(recipe, checkpoint, usebest = True):
+    """Restore a checkpoint to a recipe.
+
+    This sets the values of the variables and fixes or frees them as recorded
+    in the checkpoint. The recipe must have been built in the same way as the
+    one that was saved. This is checked by comparing the constrained
+    parameters with their values in the checkpoint.
+
+    recipe      --  The FitRecipe.
+    checkpoint  --  A Checkpoint or the name of a checkpoint file.
+    usebest     --  Flag for restoring the free variables to the best point
+                    seen by the optimizer, when available (default True).
+
+    Returns the Checkpoint.
+
+    Raises ValueError if the variables or the constrained parameters of the
+    recipe do not match those in the checkpoint.
+    """
+    chk = checkpoint
+    if not isinstance(chk, Checkpoint):
+        chk = loadCheckpoint(checkpoint)
+
+    if recipe._parameters.keys() != chk.names:
+        raise ValueError("The recipe variables do not match the checkpoint")
+
+    freenames = []
+    fixednames = []
+    for name, val, isfree in zip(chk.names, chk.values, chk.free):
+        recipe._parameters[name].value = val
+        if isfree:
+            freenames.append(name)
+        else:
+            fixednames.append(name)
+    if fixednames:
+        recipe.fix(*fixednames)
+    if freenames:
+        recipe.free(*freenames)
+
+    recipe._prepare()
+    recipe._updateConstraints()
+    convals = dict((name, con.par.getValue())
+            for name, con in _constraintNames(recipe))
+    for name, val in zip(chk.connames, chk.convals):
+        if name not in convals or not numpy.allclose(convals[name], val):
+            msg = "The constraint of '%s' does not match the checkpoint" % name
+            raise ValueError(msg)
+
+    # The best point is only meaningful for the same free variables.
+    if usebest and chk.bestx is not None and len(chk.bestx) == len(freenames):
+        recipe._applyValues(chk.bestx)
+        recipe._updateConstraints()
+    return chk
+
+class CheckpointFitHook(FitHook):
+    """FitHook that writes checkpoints during a refinement.
+
+    A checkpoint is written when either the number of residual evaluations
+    since the last checkpoint reaches 'every', or the wall time since the last
+    checkpoint reaches 'interval'. Writing is further throttled so that it
+    takes at most the 'maxoverhead' fraction of the refinement time.
+
+    Attributes
+    filename    --  The name of the checkpoint file.
+    every       --  Evaluations between checkpoints (None for no limit).
+    interval    --  Seconds between checkpoints (None for no limit).
+    maxoverhead --  Maximum fraction of the wall time spent writing
+                    checkpoints (default 0.01).
+    count       --  The number of residual evaluations. This is not reset
+                    with the recipe, so it continues over configuration
+                    changes and resumed refinements.
+    bestx       --  Free variable values with the lowest residual.
+    bestcost    --  The lowest residual.
+    nwritten    --  The number of written checkpoints.
+
+    """
+
+    def __init__(self, filename, every = None, interval = 60,
+            maxoverhead = 0.01):
+        """Initialize the hook.
+
+        filename    --  The name of the checkpoint file.
+        every       --  Write after this many evaluations (default None).
+        interval    --  Write after this many seconds (default 60).
+        maxoverhead --  Maximum fraction of the wall time spent writing
+                        checkpoints (default 0.01).
+        """
+        self.filename = filename
+        self.every = every
+        self.interval = interval
+        self.maxoverhead = maxoverhead
+        self.count = 0
+        self.bestx = None
+        self.bestcost = numpy.inf
+        self.nwritten = 0
+        self._lastcount = 0
+        self._lasttime = time.time()
+        self._nexttime = self._lasttime
+        return
+
+    def postcall(self, recipe, chiv):
+        """Record the best point and write a checkpoint when it is due."""
+        self.count += 1
+        cost = numpy.dot(chiv, chiv)
+        if cost < self.bestcost:
+            self.bestcost = cost
+            self.bestx = numpy.array(recipe.getValues(), dtype=float)
+
+        now = time.time()
+        due = ((self.every and self.count - self._lastcount >= self.every)
+                or (self.interval is not None and
+                    now - self._lasttime >= self.interval))
+        if due and now >= self._nexttime:
+            self.write(recipe)
+        return
+
+    def write(self, recipe):
+        """Write a checkpoint now.
+
+        The constrained parameters are looked up here, as the recipe collects
+        its constraints after resetting the fit hooks.
+        """
+        t0 = time.time()
+        chk = _makeCheckpoint(recipe, _constraintNames(recipe), self.count,
+                self.bestx, self.bestcost)
+        _writeCheckpoint(chk, self.filename)
+        t1 = time.time()
+        self._lastcount = self.count
+        self._lasttime = t1
+        if self.maxoverhead:
+            self._nexttime = t1 + (t1 - t0) / self.maxoverhead
+        self.nwritten += 1
+        return
+
+    def resume(self, recipe, usebest = True):
+        """Restore the recipe from the checkpoint file.
+
+        This also restores the evaluation count and the best point. See
+        resumeRecipe.
+
+        Returns the Checkpoint.
+        """
+        chk = resumeRecipe(recipe, self.filename, usebest)
+        self.count = self._lastcount = chk.count
+        self.bestx = chk.bestx
+        self.bestcost = chk.bestcost
+        return chk
+
+# End class CheckpointFitHook
+
+# End of file
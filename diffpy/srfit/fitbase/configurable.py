@@ -36,10 +36,16 @@ class Configurable(object):
         self._configobjs = set()
         return
 
-    def _updateConfiguration(self):
-        """Notify Configurables in hierarchy of configuration change."""
+    def _updateConfiguration(self, changed = None):
+        """Notify Configurables in hierarchy of configuration change.
+
+        changed --  The Configurable below this one in the hierarchy that
+                    passes up a change, or None (default) if the change took
+                    place in this object.
+
+        """
         for obj in self._configobjs:
-            obj._updateConfiguration()
+            obj._updateConfiguration(self)
         return
 
     def _storeConfigurable(self, obj):
@@ -53,6 +59,11 @@ class Configurable(object):
             self._configobjs.add(obj)
         return
 
+    def _removeConfigurable(self, obj):
+        """Remove a stored Configurable, if present."""
+        self._configobjs.discard(obj)
+        return
+
 # End class Configurable
 
 # End of file
@@ -25,11 +25,14 @@ See the examples in the documention for how to use a FitContribution.
 
 __all__ = ["FitContribution"]
 
+import numpy
+
 from diffpy.srfit.interface import _fitcontribution_interface
 from diffpy.srfit.fitbase.parameterset import ParameterSet
 from diffpy.srfit.fitbase.recipeorganizer import equationFromString
 from diffpy.srfit.fitbase.parameter import ParameterProxy
 from diffpy.srfit.exceptions import SrFitError
+from diffpy.srfit.fitbase import profiling
 
 class FitContribution(_fitcontribution_interface, ParameterSet):
     """FitContribution class.
@@ -59,6 +62,10 @@ class FitContribution(_fitcontribution_interface, ParameterSet):
     _xname          --  Name of the x-variable
     _yname          --  Name of the y-variable
     _dyname         --  Name of the dy-variable
+    _sampling       --  The (fraction, method, seed) of the sampling of the
+                        calculation points, or None (see setSampling).
+    _epoch          --  The sampling epoch.
+    _samplepoints   --  The calculation points the sample was drawn from.
 
     Properties
     names           --  Variable names (read only). See getNames.
@@ -75,6 +82,9 @@ class FitContribution(_fitcontribution_interface, ParameterSet):
         self._xname = None
         self._yname = None
         self._dyname = None
+        self._sampling = None
+        self._epoch = 0
+        self._samplepoints = None
 
         self._generators = {}
         self._manage(self._generators)
@@ -101,7 +111,10 @@ class FitContribution(_fitcontribution_interface, ParameterSet):
         """
 
         # Set the Profile and add its parameters to this organizer.
+        if self.profile is not None:
+            self.profile.removeObserver(self._checkSampling)
         self.profile = profile
+        self.profile.addObserver(self._checkSampling)
 
         if xname is None:
             xname = self.profile.xpar.name
@@ -264,19 +277,103 @@ class FitContribution(_fitcontribution_interface, ParameterSet):
         method.
 
         """
-        # Assign the calculated profile
-        self.profile.ycalc = self._eq()
-        # Note that equations only recompute when their inputs are modified, so
-        # the following will not recompute the equation.
-        return self._reseq()
+        timers = profiling.active.timers
+        depth = None if timers is None else timers.start(self.name)
+        try:
+            # Assign the calculated profile
+            self.profile.ycalc = self._eq()
+            # Note that equations only recompute when their inputs are
+            # modified, so the following will not recompute the equation.
+            if timers is not None:
+                timers.start("residual")
+            return self._reseq()
+        finally:
+            if depth is not None:
+                timers.stop(depth)
 
     def evaluate(self):
         """Evaluate the contribution equation."""
         return self._eq()
 
+    def setSampling(self, fraction = None, method = "stratified", seed = None):
+        """Evaluate the residual on a sample of the calculation points.
+
+        The sample is redrawn for each epoch, see resample. The
+        ProfileGenerators calculate the profile only at the sampled points
+        when they can (see ProfileGenerator.pointwise).
+
+        fraction    --  The fraction of the calculation points in the sample.
+                    If this is None (default), all points are used.
+        method  --  "stratified" (default) for a random point from each of
+                    equal runs of the calculation points, or "random" for
+                    points drawn at random.
+        seed    --  Seed of the random sample. The sample of each epoch is
+                    reproducible for a given seed. If this is None (default),
+                    a seed is chosen at random.
+
+        Raises AttributeError if there is no Profile.
+        Raises ValueError if fraction is not in (0, 1] or method is unknown.
+        """
+        if self.profile is None:
+            raise AttributeError("No Profile")
+        if method not in ("stratified", "random"):
+            raise ValueError("Unknown sampling method '%s'" % method)
+        if fraction is not None and not 0 < fraction <= 1:
+            raise ValueError("The fraction must be in (0, 1]")
+        self._sampling = None
+        self.profile.setSubset(None)
+        if fraction is not None and fraction < 1:
+            if seed is None:
+                seed = numpy.random.randint(2**31)
+            self._sampling = (fraction, method, seed)
+            self.resample(0)
+        # The residual has a different size now.
+        self._updateConfiguration()
+        return
+
+    def resample(self, epoch = None):
+        """Draw the sample of calculation points for a new epoch.
+
+        This does nothing if the contribution is not sampled.
+
+        epoch   --  The epoch number. If this is None (default), the epoch
+                    following the current one is used.
+        """
+        if self._sampling is None:
+            return
+        self._epoch = self._epoch + 1 if epoch is None else epoch
+        fraction, method, seed = self._sampling
+        npts = len(self.profile.xfull)
+        nsample = max(1, int(round(fraction * npts)))
+        rs = numpy.random.RandomState([seed, self._epoch])
+        if method == "stratified":
+            indices = ((numpy.arange(nsample) + rs.rand(nsample)) * npts //
+                    nsample).astype(int)
+        else:
+            indices = numpy.sort(rs.permutation(npts)[:nsample])
+        self.profile.setSubset(indices)
+        self._samplepoints = self.profile.xfull
+        return
+
+    def _staleSample(self):
+        """Check if the sample must be redrawn for new calculation points."""
+        return (self._sampling is not None and
+                self.profile.xfull is not self._samplepoints)
+
+    def _checkSampling(self, other):
+        """Reconfigure when the calculation points of the Profile change.
+
+        The Profile drops its subset with the calculation points. The sample
+        is then redrawn for the same epoch when I am validated.
+        """
+        if self._staleSample():
+            self._updateConfiguration()
+        return
+
     def _validate(self):
         """Validate my state.
 
+        This redraws the sample for new calculation points.
         This performs profile validations.
         This performs ProfileGenerator validations.
         This validates _eq.
@@ -285,6 +382,8 @@ class FitContribution(_fitcontribution_interface, ParameterSet):
         Raises SrFitError if validation fails.
 
         """
+        if self._staleSample():
+            self.resample(self._epoch)
         self.profile._validate()
         ParameterSet._validate(self)
 
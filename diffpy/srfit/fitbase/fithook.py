@@ -23,11 +23,22 @@ variable values.
 Custom FitHooks can be added to a FitRecipe with the FitRecipe.setFitHook
 method.
 
+AsyncFitHook runs another FitHook in a background thread, so that slow
+reporting does not hold up the refinement. It hands RecipeSnapshot copies of
+the recipe state to the wrapped hook at a limited rate.
+
 """
-__all__ = ["FitHook"]
+__all__ = ["FitHook", "PrintFitHook", "PlotFitHook", "AsyncFitHook",
+        "RecipeSnapshot"]
+
+import time
+import threading
+from collections import deque
 
 import numpy
 
+from diffpy.srfit.util.ordereddict import OrderedDict
+
 class FitHook(object):
     """Base class for inspecting the progress of a FitRecipe refinement.
 
@@ -65,6 +76,14 @@ class FitHook(object):
         """
         return
 
+    def finish(self, recipe):
+        """This is called when a refinement by FitRecipe.optimize ends.
+
+        recipe  --  The FitRecipe instance
+
+        """
+        return
+
 # End class FitHook
 
 class PrintFitHook(FitHook):
@@ -153,7 +172,11 @@ class PrintFitHook(FitHook):
 
 # TODO - Display the chi^2 on the plot during refinement.
 class PlotFitHook(FitHook):
-    """This FitHook has live plotting of whatever is being refined."""
+    """This FitHook has live plotting of whatever is being refined.
+
+    The plots are drawn with pylab, so the hook must run in the main thread
+    with most backends. Do not wrap it in an AsyncFitHook.
+    """
 
     def reset(self, recipe):
         """Set up the plot."""
@@ -219,3 +242,258 @@ class PlotFitHook(FitHook):
 
         pylab.draw()
         return
+
+# End class PlotFitHook
+
+class RecipeSnapshot(object):
+    """A read-only copy of the state of a FitRecipe.
+
+    RecipeSnapshot provides the parts of the FitRecipe interface that are used
+    by the FitHooks in this module, so these hooks can work on a snapshot
+    instead of the live recipe.
+
+    Attributes
+    name            --  Name of the recipe.
+    count           --  The number of residual evaluations at the time of the
+                        snapshot.
+    names           --  Names of the free variables.
+    values          --  Array of the free variable values.
+    _restraintlist  --  The list of restraints of the recipe.
+    _contributions  --  OrderedDict of the copied FitContributions, which have
+                        name, _xname, _yname and profile attributes. The
+                        profile holds copies of x, y, dy and ycalc. This is
+                        empty if the profiles are not copied.
+
+    """
+
+    def __init__(self, recipe, count = 0, profiles = True):
+        """Copy the state of a recipe.
+
+        recipe      --  The FitRecipe.
+        count       --  The number of residual evaluations (default 0).
+        profiles    --  Flag for copying the profile arrays (default True).
+        """
+        self.name = recipe.name
+        self.count = count
+        self.names = recipe.getNames()
+        self.values = numpy.array(recipe.getValues())
+        self._restraintlist = list(recipe._restraintlist)
+        self._contributions = OrderedDict()
+        if profiles:
+            for name, con in recipe._contributions.items():
+                self._contributions[name] = _ContributionSnapshot(con)
+        return
+
+    def getNames(self):
+        """Get the names of the free variables."""
+        return list(self.names)
+
+    def getValues(self):
+        """Get the values of the free variables."""
+        return self.values.copy()
+
+# End class RecipeSnapshot
+
+class _ContributionSnapshot(object):
+    """Copy of the profile of a FitContribution."""
+
+    def __init__(self, con):
+        self.name = con.name
+        self._xname = con._xname
+        self._yname = con._yname
+        self.profile = _ProfileSnapshot(con.profile)
+        return
+
+class _ProfileSnapshot(object):
+    """Copy of the arrays of a Profile."""
+
+    def __init__(self, profile):
+        copy = lambda a : None if a is None else numpy.array(a)
+        self.x = copy(profile.x)
+        self.y = copy(profile.y)
+        self.dy = copy(profile.dy)
+        self.ycalc = copy(profile.ycalc)
+        return
+
+class AsyncFitHook(FitHook):
+    """Run a FitHook in a background thread.
+
+    The residual calls of the recipe are reduced to events, each holding a
+    RecipeSnapshot and the residual vector. An event is made only when at
+    least 'every' residual calls and 'interval' seconds have passed since the
+    previous one. Events are passed to a worker thread through a bounded
+    queue, which calls reset, precall and postcall of the wrapped hook with the
+    snapshot in place of the recipe. When the queue is full, the stale queued
+    event is replaced by the new one ("coalesce") or the new event is dropped
+    ("drop"). Resets are never replaced or dropped.
+
+    Any FitHook that only uses the RecipeSnapshot interface of the recipe
+    can be wrapped. The precall and postcall methods of the wrapped hook are
+    called once per event, and the true evaluation count is available as the
+    count attribute of the snapshot. The finish method of the wrapped hook is
+    called in the refining thread, after which the worker thread ends. It is
+    started again by the next event.
+
+    The wrapped hook runs outside the main thread. Most GUI toolkits only
+    allow drawing from the main thread, so hooks that draw, such as
+    PlotFitHook with the usual pylab backends, should not be wrapped.
+
+    Attributes
+    hook        --  The wrapped FitHook.
+    every       --  Minimum number of residual calls between events.
+    interval    --  Minimum number of seconds between events.
+    maxsize     --  Maximum number of queued events.
+    policy      --  "coalesce" or "drop", what to do when the queue is full.
+    profiles    --  Flag for copying the profile arrays to the snapshots.
+    count       --  The number of residual calls.
+    ndropped    --  The number of events that were dropped or replaced.
+
+    """
+
+    def __init__(self, hook, every = 1, interval = 0.0, maxsize = 1,
+            policy = "coalesce", profiles = True):
+        """Wrap a FitHook. See the class documentation for the arguments.
+
+        Raises ValueError if policy is not "coalesce" or "drop".
+        """
+        if policy not in ("coalesce", "drop"):
+            raise ValueError("Unknown policy '%s'" % policy)
+        self.hook = hook
+        self.every = every
+        self.interval = interval
+        self.maxsize = maxsize
+        self.policy = policy
+        self.profiles = profiles
+        self.count = 0
+        self.ndropped = 0
+        self._lastcount = 0
+        self._lasttime = 0.0
+        self._queued = 0
+        self._recipe = None
+        self._chiv = None
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._error = None
+        self._thread = None
+        self._closing = False
+        return
+
+    def reset(self, recipe):
+        """Pass the reset to the wrapped hook."""
+        self.count = self._lastcount = 0
+        self._put(("reset", RecipeSnapshot(recipe, 0, self.profiles), None),
+                force = True)
+        return
+
+    def postcall(self, recipe, chiv):
+        """Make an event if the rate limits allow it."""
+        self.count += 1
+        self._recipe = recipe
+        self._chiv = chiv
+        if self.count - self._lastcount < self.every:
+            return
+        now = time.time()
+        if self.interval and now - self._lasttime < self.interval:
+            return
+        self._lastcount = self.count
+        self._lasttime = now
+        # Do not bother copying the recipe for an event that will be dropped.
+        if self.policy == "drop" and len(self._events) >= self.maxsize:
+            self.ndropped += 1
+            return
+        self._put(("call", RecipeSnapshot(recipe, self.count, self.profiles),
+            chiv))
+        return
+
+    def flush(self):
+        """Report the latest state of the recipe and wait for the worker.
+
+        This makes an event for the last residual call if it was skipped by
+        the rate limits, then waits until all events have been handled.
+
+        Raises the first exception raised by the wrapped hook, if any.
+        """
+        if self._recipe is not None and self._queued < self.count:
+            snap = RecipeSnapshot(self._recipe, self.count, self.profiles)
+            self._put(("call", snap, self._chiv), force = True)
+        with self._cond:
+            while self._events or self._busy:
+                self._cond.wait(0.1)
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+        return
+
+    def finish(self, recipe):
+        """Flush the events, pass the finish to the wrapped hook and close."""
+        try:
+            self.flush()
+            self.hook.finish(RecipeSnapshot(recipe, self.count,
+                self.profiles))
+        finally:
+            self.close()
+        return
+
+    def close(self):
+        """End the worker thread once the queued events are handled.
+
+        A later event starts a new worker thread.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._closing = True
+            self._cond.notifyAll()
+        thread.join()
+        self._thread = None
+        self._closing = False
+        return
+
+    def _put(self, event, force = False):
+        """Queue an event and make sure the worker is running."""
+        with self._cond:
+            if len(self._events) >= self.maxsize and not force:
+                if self.policy == "drop":
+                    self.ndropped += 1
+                    return
+                # Replace a stale call, but queue behind a reset.
+                if self._events[-1][0] == "call":
+                    self.ndropped += 1
+                    self._events.pop()
+            self._events.append(event)
+            self._queued = event[1].count
+            self._cond.notify()
+        if self._thread is None or not self._thread.isAlive():
+            self._thread = threading.Thread(target = self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return
+
+    def _run(self):
+        """Handle events in the worker thread."""
+        while True:
+            with self._cond:
+                while not self._events:
+                    if self._closing:
+                        return
+                    self._cond.wait()
+                kind, snap, chiv = self._events.popleft()
+                self._busy = True
+            try:
+                if kind == "reset":
+                    self.hook.reset(snap)
+                else:
+                    self.hook.precall(snap)
+                    self.hook.postcall(snap, chiv)
+            except Exception, e:
+                if self._error is None:
+                    self._error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notifyAll()
+        return
+
+# End class AsyncFitHook
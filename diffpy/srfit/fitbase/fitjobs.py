@@ -0,0 +1,568 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Non-blocking fits for event-driven services.
+
+A FitJobPool runs residual calculations and optimizations of FitRecipes in a
+bounded pool of worker threads, which many fits can share. Submitting work
+returns a FitJob at once. The caller can wait for the job, register a callback
+that is called when the job finishes, iterate over the progress events of an
+optimization and cancel the job. A cancelled optimization stops at the start
+of its next residual calculation, so the recipe is left at the last evaluated
+variable values. A worker that runs a job of a recipe in the thread-safe mode
+(see FitRecipe.setThreadSafe) is its refining thread while the job runs, so
+other threads can evaluate and report the recipe during the fit. The previous
+refining thread takes over again when the job ends.
+
+The threads share the interpreter lock, so fits that spend their time in
+Python code do not run in parallel. A pool made with processes = True runs
+each job in a worker process instead, while its thread waits for the outcome.
+The recipe, without its fit hooks, and the function of the job are pickled to
+the process, so the function must be picklable, for example a function defined
+at the module level, as must the calculators and functions of the recipe. The
+progress events are sent back from the process and the variable values of the
+recipe are set to those of the process when the job is done. Cancelling a
+running job terminates its process.
+
+An event loop hands the outcome of a job over to its own thread from a done
+callback, for example with IOLoop.add_callback of tornado or
+reactor.callFromThread of twisted. Worker processes for the Jacobian of an
+optimization are requested with the workers keyword of optimizeRecipe.
+
+"""
+
+__all__ = ["FitJobPool", "FitJob"]
+
+import time
+import pickle
+import threading
+from thread import get_ident
+from functools import partial
+from collections import deque
+
+import numpy
+
+from diffpy.srfit.exceptions import SrFitError, FitCancelled
+from diffpy.srfit.fitbase.fithook import FitHook, RecipeSnapshot
+
+class FitJob(object):
+    """Handle of work submitted to a FitJobPool.
+
+    Attributes
+    recipe  --  The FitRecipe of the job.
+    state   --  "queued", "running", "done", "failed" or "cancelled".
+    _func   --  The function that does the work, called with the recipe.
+    _value  --  The return value of _func.
+    _error  --  The exception raised by _func.
+    _cancel --  Flag for a requested cancellation.
+    _events --  deque of the progress events that were not yet taken.
+    _callbacks  --  Functions to call when the job finishes.
+    _cond   --  Condition guarding the state and the events.
+
+    """
+
+    def __init__(self, recipe, func, maxevents = 1):
+        """Initialize the job.
+
+        recipe  --  The FitRecipe.
+        func    --  The function that does the work, called with the recipe.
+        maxevents   --  The number of progress events kept for the events
+                    iterator (default 1). Older events are dropped.
+        """
+        self.recipe = recipe
+        self.state = "queued"
+        self._func = func
+        self._value = None
+        self._error = None
+        self._cancel = False
+        self._events = deque(maxlen = maxevents)
+        self._callbacks = []
+        self._cond = threading.Condition()
+        return
+
+    def done(self):
+        """Check if the job has finished, failed or was cancelled."""
+        return self.state in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        """Request the cancellation of the job.
+
+        A queued job is cancelled at once. A running optimization stops at
+        the start of its next residual calculation.
+
+        Returns False if the job had already finished, True otherwise.
+        """
+        with self._cond:
+            if self.done():
+                return False
+            self._cancel = True
+            if self.state == "queued":
+                self._error = FitCancelled("The job was cancelled")
+                self.state = "cancelled"
+            else:
+                return True
+        self._finish()
+        return True
+
+    def wait(self, timeout = None):
+        """Wait until the job is done.
+
+        timeout --  Maximum number of seconds to wait (default None, no
+                    limit).
+
+        Returns True if the job is done.
+        """
+        end = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self.done():
+                if end is None:
+                    self._cond.wait()
+                elif time.time() < end:
+                    self._cond.wait(end - time.time())
+                else:
+                    break
+            return self.done()
+
+    def result(self, timeout = None):
+        """Get the outcome of the job.
+
+        This waits for the job, see the wait method.
+
+        Returns the return value of the work, such as the OptimizeResults of
+        an optimization.
+
+        Raises the exception raised by the work, FitCancelled if the job was
+        cancelled, or SrFitError if the job is not done within timeout.
+        """
+        if not self.wait(timeout):
+            raise SrFitError("The job is not done")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def addDoneCallback(self, callback):
+        """Call a function with the job when it is done.
+
+        The callback is called in the worker thread, or at once if the job is
+        done already.
+        """
+        with self._cond:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+        return
+
+    def events(self, timeout = None):
+        """Iterate over the progress events of the job.
+
+        An event is a (RecipeSnapshot, chiv) tuple of a residual calculation
+        of the recipe. Events that are not taken in time are dropped, see the
+        maxevents argument of FitJobPool.optimize. The iteration ends when the
+        job is done and its events are taken.
+
+        timeout --  Maximum number of seconds to wait for an event (default
+                    None, no limit). The iteration ends when no event comes in
+                    time.
+        """
+        while True:
+            with self._cond:
+                if not self._events and not self.done():
+                    self._cond.wait(timeout)
+                if not self._events:
+                    return
+                event = self._events.popleft()
+            yield event
+        return
+
+    def _run(self):
+        """Do the work in the calling thread."""
+        with self._cond:
+            if self.state != "queued":
+                return
+            self.state = "running"
+        # Make the worker the refining thread of a thread-safe recipe for the
+        # duration of the job.
+        threads = self.recipe._threads
+        if threads is not None:
+            with threads.lock:
+                owner, threads.owner = threads.owner, get_ident()
+        try:
+            value = self._func(self.recipe)
+        except FitCancelled, e:
+            self._error, state = e, "cancelled"
+        except Exception, e:
+            self._error, state = e, "failed"
+        else:
+            self._value, state = value, "done"
+        finally:
+            if threads is not None:
+                with threads.lock:
+                    threads.owner = owner
+        with self._cond:
+            self.state = state
+        self._finish()
+        return
+
+    def _postEvent(self, event):
+        """Add a progress event and wake up the waiting threads."""
+        with self._cond:
+            self._events.append(event)
+            self._cond.notifyAll()
+        return
+
+    def _runProcess(self, func):
+        """Call a function of the recipe in a worker process.
+
+        This is called by the thread of the job. The recipe is updated with
+        the variable values of the process.
+
+        Returns the return value of func.
+
+        Raises the exception raised by func, FitCancelled if the job is
+        cancelled, or SrFitError if the process ends without an outcome.
+        """
+        import Queue
+        import multiprocessing
+        data = pickle.dumps((self.recipe.clone(), func), 2)
+        queue = multiprocessing.Queue()
+        proc = multiprocessing.Process(target = _processMain,
+                args = (data, queue))
+        proc.daemon = True
+        proc.start()
+        try:
+            while True:
+                if self._cancel:
+                    raise FitCancelled("The job was cancelled")
+                alive = proc.is_alive()
+                try:
+                    kind, value, values = queue.get(timeout = 0.1)
+                except Queue.Empty:
+                    if alive:
+                        continue
+                    msg = "The worker process ended with exit code %s"
+                    raise SrFitError(msg % proc.exitcode)
+                if kind == "event":
+                    self._postEvent(value)
+                elif kind == "failed":
+                    raise value
+                else:
+                    break
+        finally:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        recipe = self.recipe
+        with recipe.batchUpdate():
+            for var, val in zip(recipe._parameters.values(), values):
+                var.setValue(val)
+        return value
+
+    def _finish(self):
+        """Wake up the waiting threads and call the done callbacks."""
+        with self._cond:
+            self._cond.notifyAll()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+        return
+
+# End class FitJob
+
+class _JobFitHook(FitHook):
+    """FitHook that reports progress to a FitJob and stops cancelled jobs.
+
+    Attributes
+    job     --  The FitJob.
+    every   --  Make an event every this many residual calculations.
+    profiles    --  Flag for copying the profiles to the snapshots.
+    count   --  The number of residual calculations.
+
+    """
+
+    def __init__(self, job, every = 1, profiles = False):
+        """Initialize the attributes. See the class documentation."""
+        self.job = job
+        self.every = every
+        self.profiles = profiles
+        self.count = 0
+        return
+
+    def precall(self, recipe):
+        """Stop the fit if the job was cancelled.
+
+        Raises FitCancelled if the job was cancelled.
+        """
+        if self.job._cancel:
+            raise FitCancelled("The job was cancelled")
+        return
+
+    def postcall(self, recipe, chiv):
+        """Make a progress event."""
+        self.count += 1
+        if self.count % self.every:
+            return
+        snap = RecipeSnapshot(recipe, self.count, self.profiles)
+        self.job._postEvent((snap, numpy.array(chiv)))
+        return
+
+# End class _JobFitHook
+
+class _Optimize(object):
+    """Picklable optimization of a recipe in a worker process.
+
+    Attributes
+    every   --  Make an event every this many residual calculations.
+    profiles    --  Flag for copying the profiles to the snapshots.
+    kw      --  Keyword arguments for optimizeRecipe.
+
+    """
+
+    def __init__(self, every, profiles, kw):
+        """Initialize the attributes. See the class documentation."""
+        self.every = every
+        self.profiles = profiles
+        self.kw = kw
+        return
+
+    def __call__(self, recipe):
+        """Optimize the recipe and send the progress events.
+
+        Returns the OptimizeResults.
+        """
+        from diffpy.srfit.fitbase.fitoptimizer import optimizeRecipe
+        job = _ProcessJob(_processqueue)
+        recipe.pushFitHook(_JobFitHook(job, self.every, self.profiles))
+        return optimizeRecipe(recipe, **self.kw)
+
+# End class _Optimize
+
+class _ProcessJob(object):
+    """Side of a FitJob in its worker process, used by _JobFitHook.
+
+    Attributes
+    queue   --  The multiprocessing.Queue to the thread of the job.
+    _cancel --  Always False. A cancelled job terminates the process.
+
+    """
+
+    _cancel = False
+
+    def __init__(self, queue):
+        """Initialize the attributes. See the class documentation."""
+        self.queue = queue
+        return
+
+    def _postEvent(self, event):
+        """Send a progress event to the thread of the job."""
+        self.queue.put(("event", event, None))
+        return
+
+# End class _ProcessJob
+
+def _processMain(data, queue):
+    """Run the pickled work of a FitJob in a worker process.
+
+    The outcome is sent to the queue as a (kind, value, values) tuple, where
+    kind is "done" or "failed", value is the return value or the exception and
+    values are the variable values of the recipe.
+    """
+    global _processqueue
+    _processqueue = queue
+    try:
+        recipe, func = pickle.loads(data)
+        value = func(recipe)
+        values = [v.value for v in recipe._parameters.values()]
+        outcome = ("done", value, values)
+        # Check here, as the queue pickles in a background thread.
+        pickle.dumps(outcome, 2)
+    except Exception, e:
+        try:
+            pickle.dumps(e, 2)
+        except Exception:
+            e = SrFitError("%s: %s" % (e.__class__.__name__, e))
+        outcome = ("failed", e, None)
+    queue.put(outcome)
+    return
+
+def _residual(p, recipe):
+    """Calculate the residual of a recipe, see FitJobPool.residual."""
+    return recipe.residual(p)
+
+# The queue of the job in a worker process.
+_processqueue = None
+
+class FitJobPool(object):
+    """Bounded pool of worker threads that run FitJobs.
+
+    The jobs are run in the order they were submitted, except that the jobs
+    of a recipe run one at a time.
+
+    Attributes
+    workers --  The maximum number of worker threads.
+    processes   --  Flag for running the work of the jobs in worker
+                processes, see the module documentation.
+    _queue  --  List of the queued FitJobs.
+    _busy   --  Set of the ids of the recipes of the running jobs.
+    _threads    --  List of the worker threads.
+    _closed --  Flag indicating that the pool takes no more jobs.
+    _cond   --  Condition guarding the queue.
+
+    """
+
+    def __init__(self, workers = 2, processes = False):
+        """Initialize the pool. The threads are started when needed.
+
+        workers --  The maximum number of worker threads (default 2).
+        processes   --  Flag for running the work of each job in a worker
+                    process (default False).
+
+        Raises ValueError if workers is smaller than 1.
+        """
+        if workers < 1:
+            raise ValueError("At least one worker is needed")
+        self.workers = workers
+        self.processes = processes
+        self._queue = []
+        self._busy = set()
+        self._threads = []
+        self._closed = False
+        self._cond = threading.Condition()
+        return
+
+    def submit(self, recipe, func, maxevents = 1):
+        """Run a function of a recipe in the pool.
+
+        recipe  --  The FitRecipe.
+        func    --  The function to run, called with the recipe. This must be
+                    picklable if the pool uses processes.
+        maxevents   --  The number of progress events kept for the events
+                    iterator of the job (default 1).
+
+        Returns the FitJob.
+
+        Raises SrFitError if the pool is closed.
+        """
+        job = FitJob(recipe, func, maxevents)
+        if self.processes:
+            job._func = lambda recipe: job._runProcess(func)
+        return self._submit(job)
+
+    def _submit(self, job):
+        """Queue a FitJob and start a worker if needed. See submit."""
+        with self._cond:
+            if self._closed:
+                raise SrFitError("The pool is closed")
+            self._queue.append(job)
+            self._threads = [t for t in self._threads if t.isAlive()]
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target = self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            self._cond.notify()
+        return job
+
+    def residual(self, recipe, p = []):
+        """Calculate the residual of a recipe in the pool.
+
+        See FitRecipe.residual for the arguments.
+
+        Returns the FitJob, whose result is the residual vector.
+        """
+        p = numpy.array(p, dtype=float)
+        return self.submit(recipe, partial(_residual, p))
+
+    def optimize(self, recipe, every = 1, maxevents = 1, profiles = False,
+            **kw):
+        """Optimize a recipe in the pool.
+
+        The job reports a progress event after every few residual
+        calculations, see FitJob.events.
+
+        recipe  --  The FitRecipe.
+        every   --  Make a progress event every this many residual
+                    calculations (default 1).
+        maxevents   --  The number of progress events kept for the events
+                    iterator of the job (default 1). Older events are dropped.
+        profiles    --  Flag for copying the profiles to the RecipeSnapshots
+                    of the events (default False).
+        kw      --  Keyword arguments for optimizeRecipe.
+
+        Returns the FitJob, whose result is the OptimizeResults.
+        """
+        if self.processes:
+            func = _Optimize(every, profiles, kw)
+            return self.submit(recipe, func, maxevents)
+        from diffpy.srfit.fitbase.fitoptimizer import optimizeRecipe
+        job = FitJob(recipe, None, maxevents)
+        def optimize(recipe):
+            hook = _JobFitHook(job, every, profiles)
+            recipe.pushFitHook(hook, 0)
+            try:
+                return optimizeRecipe(recipe, **kw)
+            finally:
+                recipe.popFitHook(hook)
+        job._func = optimize
+        return self._submit(job)
+
+    def close(self, wait = True):
+        """Stop taking jobs and end the workers when the queue is done.
+
+        wait    --  Wait for the queued and running jobs (default True).
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notifyAll()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+        return
+
+    def _nextJob(self):
+        """Take the first queued job whose recipe is not busy.
+
+        Returns the FitJob, or None if there is no such job.
+        """
+        for i, job in enumerate(self._queue):
+            if job.done():
+                del self._queue[i]
+                return self._nextJob()
+            if id(job.recipe) not in self._busy:
+                del self._queue[i]
+                return job
+        return None
+
+    def _work(self):
+        """Run jobs in a worker thread until the pool is closed."""
+        while True:
+            with self._cond:
+                job = self._nextJob()
+                while job is None:
+                    if self._closed and not self._queue:
+                        return
+                    self._cond.wait()
+                    job = self._nextJob()
+                self._busy.add(id(job.recipe))
+            try:
+                job._run()
+            finally:
+                with self._cond:
+                    self._busy.discard(id(job.recipe))
+                    self._cond.notifyAll()
+        return
+
+# End class FitJobPool
+
+# End of file
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Optimization of a FitRecipe with a bounded least-squares solver.
+
+The optimizeRecipe function, also available as FitRecipe.optimize, refines the
+free variables of a FitRecipe with scipy.optimize.least_squares. The solver is
+given the variable bounds from FitRecipe.getBounds2, variable scales derived
+from the starting values and the RecipeJacobian, a finite-difference Jacobian
+of FitRecipe.residual that can be evaluated in worker processes. The outcome
+of the refinement is returned as an OptimizeResults instance.
+
+"""
+
+__all__ = ["optimizeRecipe", "RecipeJacobian", "OptimizeResults"]
+
+import time
+
+import numpy
+
+class OptimizeResults(object):
+    """Outcome of a FitRecipe optimization.
+
+    Attributes
+    names       --  Names of the refined variables.
+    x           --  Optimized values of the refined variables.
+    cost        --  The scalar residual, dot(chiv, chiv), at x.
+    success     --  Flag indicating whether the solver converged.
+    status      --  Termination status of the solver.
+    message     --  Description of the termination status.
+    method      --  The solver method.
+    nfev        --  Number of residual evaluations, including those needed
+                    for the Jacobian.
+    njev        --  Number of Jacobian evaluations.
+    walltime    --  Wall time of the optimization in seconds.
+    cputime     --  CPU time of the optimization in seconds, not counting the
+                    time spent in worker processes.
+
+    """
+
+    def __init__(self, names, x, cost, success = False, status = 0,
+            message = "", method = None, nfev = 0, njev = 0, walltime = 0.0,
+            cputime = 0.0):
+        """Initialize the attributes. See the class documentation."""
+        self.names = list(names)
+        self.x = numpy.array(x, dtype=float)
+        self.cost = cost
+        self.success = bool(success)
+        self.status = status
+        self.message = message
+        self.method = method
+        self.nfev = nfev
+        self.njev = njev
+        self.walltime = walltime
+        self.cputime = cputime
+        return
+
+    def __str__(self):
+        lines = ["%s: %s" % (self.__class__.__name__, self.message)]
+        lines.append("cost = %g, nfev = %i, njev = %i, time = %.3f s" %
+                (self.cost, self.nfev, self.njev, self.walltime))
+        lines.extend("  %s = %g" % item for item in zip(self.names, self.x))
+        return "\n".join(lines)
+
+# End class OptimizeResults
+
+class RecipeJacobian(object):
+    """Finite-difference Jacobian of the FitRecipe residual.
+
+    Instances are callable and return the Jacobian of FitRecipe.residual at the
+    passed variable values. The columns are computed with forward differences.
+    The residual method of this class evaluates and caches the residual, so
+    the unperturbed residual is not recomputed for the Jacobian.
+
+    Attributes
+    recipe  --  The FitRecipe.
+    step    --  The relative step size for the finite differences. The step
+                of variable v is step * max(1, abs(v)).
+    lb      --  Lower bounds of the variables. Steps are reversed when they
+                would cross a bound.
+    ub      --  Upper bounds of the variables.
+    workers --  The number of worker processes for evaluating the columns of
+                the Jacobian. Each worker holds a copy of the recipe.
+    nfev    --  Number of residual evaluations done by this object.
+    njev    --  Number of Jacobian evaluations.
+    _pool   --  The multiprocessing.Pool of workers, or None.
+    _lastp  --  Variable values of the cached residual.
+    _lastr  --  The cached residual.
+
+    """
+
+    def __init__(self, recipe, step = None, lb = None, ub = None, workers =
+            1):
+        """Initialize the Jacobian.
+
+        recipe  --  The FitRecipe.
+        step    --  The relative step size for the finite differences. If this
+                    is None (default), the square root of the machine
+                    precision is used.
+        lb      --  Lower bounds of the variables (default None, no bounds).
+        ub      --  Upper bounds of the variables (default None, no bounds).
+        workers --  The number of worker processes for evaluating the
+                    residual (default 1, no workers). If this is -1, one
+                    worker is used per CPU. The workers get a copy of the
+                    recipe when they start, see _makePool.
+
+        """
+        if step is None:
+            step = numpy.sqrt(numpy.finfo(float).eps)
+        self.recipe = recipe
+        self.step = step
+        self.lb = lb
+        self.ub = ub
+        self.nfev = 0
+        self.njev = 0
+        self._lastp = None
+        self._lastr = None
+        self._pool = None
+
+        self.workers = _countWorkers(workers)
+        return
+
+    def residual(self, p):
+        """Evaluate and cache the residual of the recipe at p."""
+        p = numpy.array(p, dtype=float)
+        self._lastr = self.recipe.residual(p)
+        self._lastp = p
+        self.nfev += 1
+        return self._lastr
+
+    def __call__(self, p):
+        """Get the Jacobian of the recipe residual at p.
+
+        Returns a 2D array with one row per residual point and one column per
+        variable.
+        """
+        p = numpy.array(p, dtype=float)
+        if self._lastp is None or not numpy.array_equal(p, self._lastp):
+            self.residual(p)
+        r0 = self._lastr
+
+        h = self.step * numpy.maximum(1.0, numpy.abs(p))
+        # Step backwards where a forward step crosses a bound.
+        if self.ub is not None:
+            h = numpy.where(p + h > self.ub, -h, h)
+        if self.lb is not None:
+            h = numpy.where(p + h < self.lb, numpy.abs(h), h)
+        plist = []
+        for k in range(len(p)):
+            pk = p.copy()
+            pk[k] += h[k]
+            plist.append(pk)
+
+        rlist = self._map(plist)
+        self.nfev += len(plist)
+        self.njev += 1
+
+        jac = numpy.empty((len(r0), len(p)), dtype=float)
+        for k, rk in enumerate(rlist):
+            jac[:, k] = (rk - r0) / h[k]
+        return jac
+
+    def _map(self, plist):
+        """Evaluate the residual for each vector in plist."""
+        if self.workers < 2 or len(plist) < 2:
+            return [self.recipe.residual(pk) for pk in plist]
+        if self._pool is None:
+            self._pool = _makePool(self.recipe, self.workers)
+        return self._pool.map(_workerResidual, plist)
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        return
+
+# End class RecipeJacobian
+
+def optimizeRecipe(recipe, method = "trf", jac = None, max_nfev = None,
+        workers = 1, **kw):
+    """Refine the free variables of a FitRecipe.
+
+    This uses scipy.optimize.least_squares to minimize the residual of the
+    recipe. The bounds of the variables are passed to the solver and the
+    variables are scaled by the magnitude of their starting values. Starting
+    values outside of the bounds are moved onto the bounds. The recipe is left
+    at the optimized variable values and the finish method of its fit hooks
+    is called.
+
+    recipe  --  The FitRecipe to optimize.
+    method  --  The least_squares method, "trf" (default), "dogbox" or "lm".
+                The "lm" method does not support bounds.
+    jac     --  The Jacobian. If this is None (default), a RecipeJacobian is
+                used. Otherwise this is passed to least_squares, so it can be
+                a callable or one of "2-point", "3-point" or "cs".
+    max_nfev    --  The maximum number of residual evaluations before the
+                solver terminates (default None, solver default).
+    workers --  The number of worker processes for the RecipeJacobian
+                (default 1). See RecipeJacobian.
+    kw      --  Other keyword arguments for least_squares. An "x_scale"
+                keyword overrides the scaling from the starting values.
+
+    Returns an OptimizeResults instance.
+
+    Raises ValueError if method is "lm" and some variables are bounded.
+    """
+    from scipy.optimize import least_squares
+
+    t0 = time.time()
+    c0 = time.clock()
+
+    recipe._prepare()
+    names = recipe.getNames()
+    x0 = numpy.asarray(recipe.getValues(), dtype=float)
+    lb, ub = recipe.getBounds2()
+    lb = numpy.asarray(lb, dtype=float)
+    ub = numpy.asarray(ub, dtype=float)
+
+    bounded = numpy.isfinite(lb).any() or numpy.isfinite(ub).any()
+    if method == "lm" and bounded:
+        raise ValueError("The 'lm' method does not support bounds")
+    x0 = numpy.clip(x0, lb, ub)
+
+    kw.setdefault("x_scale", numpy.where(x0 != 0, numpy.abs(x0), 1.0))
+    rjac = RecipeJacobian(recipe, lb = lb, ub = ub, workers = workers)
+    if jac is None:
+        jac = rjac
+
+    try:
+        if method == "lm":
+            sol = least_squares(rjac.residual, x0, jac = jac, method =
+                    method, max_nfev = max_nfev, **kw)
+        else:
+            sol = least_squares(rjac.residual, x0, jac = jac, bounds = (lb,
+                ub), method = method, max_nfev = max_nfev, **kw)
+    finally:
+        rjac.close()
+
+    # Leave the recipe at the solution
+    chiv = rjac.residual(sol.x)
+    njev = rjac.njev if jac is rjac else (sol.njev or 0)
+    for fithook in recipe.fithooks:
+        fithook.finish(recipe)
+
+    res = OptimizeResults(names, sol.x, numpy.dot(chiv, chiv),
+            success = sol.success, status = sol.status, message =
+            sol.message, method = method, nfev = rjac.nfev, njev = njev,
+            walltime = time.time() - t0, cputime = time.clock() - c0)
+    return res
+
+def _countWorkers(workers):
+    """Get the number of worker processes, where -1 means one per CPU."""
+    if workers == -1:
+        import multiprocessing
+        workers = multiprocessing.cpu_count()
+    return max(1, workers or 1)
+
+def _makePool(recipe, workers):
+    """Make a multiprocessing.Pool of workers that hold copies of recipe.
+
+    The recipe is passed to the initializer of the workers. On POSIX
+    platforms the workers are forked and inherit it, elsewhere it is pickled,
+    which needs the calculators and functions of the recipe to be picklable.
+    The copy in each worker is accessible as the module variable
+    _workerrecipe.
+    """
+    import multiprocessing
+    # Make sure the workers start from a prepared recipe.
+    recipe._prepare()
+    return multiprocessing.Pool(workers, _initWorker, (recipe,))
+
+def _initWorker(recipe):
+    """Store the recipe in a worker process."""
+    global _workerrecipe
+    _workerrecipe = recipe
+    # The hooks report to the main process only.
+    recipe.clearFitHooks()
+    return
+
+def _workerResidual(p):
+    """Evaluate the residual of the worker recipe."""
+    return _workerrecipe.residual(p)
+
+_workerrecipe = None
+
+# End of file
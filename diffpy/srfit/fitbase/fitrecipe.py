@@ -28,20 +28,41 @@ Variables added to a FitRecipe can be tagged with string identifiers. Variables
 can be later retrieved or manipulated by tag. The tag name "__fixed" is
 reserved.
 
+The evaluation of a recipe changes the values and cached results of its
+Parameters, equations, Profiles and generators, so a recipe must not be
+evaluated by several threads at once. In the thread-safe mode (see
+setThreadSafe) the thread that set the mode evaluates the recipe and every
+other thread evaluates its own clone of it, which is brought up to date with
+the variable values of the recipe when the thread calls threadContext. The
+residual and scalarResidual methods and FitResults use the context of the
+calling thread, so a monitoring thread can evaluate and report a recipe while
+it is refined. Other uses, such as FitContribution.evaluate, should go through
+the recipe returned by threadContext. The refining thread holds a lock while
+it evaluates the recipe, which other threads only take to clone the recipe or
+copy the variable values.
+
 See the examples in the documentation for how to create an optimization problem
 using FitRecipe.
 """
 
 __all__ = ["FitRecipe"]
 
+import threading
+from itertools import chain
+from contextlib import contextmanager
+from thread import get_ident
+
 from numpy import array, concatenate, sqrt, dot
 
 from diffpy.srfit.interface import _fitrecipe_interface
 from diffpy.srfit.util.ordereddict import OrderedDict
 from diffpy.srfit.util.tagmanager import TagManager
 from diffpy.srfit.fitbase.parameter import ParameterProxy
+from diffpy.srfit.fitbase.configurable import Configurable
+from diffpy.srfit.fitbase.restrainttable import RestraintTable, orderRestraints
 from diffpy.srfit.fitbase.recipeorganizer import RecipeOrganizer
 from diffpy.srfit.fitbase.fithook import PrintFitHook
+from diffpy.srfit.fitbase import profiling
 
 class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
     """FitRecipe class.
@@ -56,6 +77,11 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
                         'constrain' method.
     _oconstraints   --  An ordered list of the constraints from this and all
                         sub-components.
+    _condeps        --  A dictionary mapping each Parameter that affects the
+                        constraints to the indices of the dependent entries in
+                        _oconstraints.
+    _dirtycons      --  A set of indices of entries in _oconstraints that need
+                        to be updated before the next residual calculation.
     _calculators    --  A managed dictionary of Calculators.
     _contributions  --  A managed OrderedDict of FitContributions.
     _parameters     --  A managed OrderedDict of parameters (in this case the
@@ -64,17 +90,29 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
     _eqfactory      --  A diffpy.srfit.equation.builder.EquationFactory
                         instance that is used to create constraints and
                         restraints from string
-    _restraintlist  --  A list of restraints from this and all sub-components.
+    _restraintlist  --  A list of restraints from this and all sub-components,
+                        in the order of their penalties in the residual.
+    _restrainttable --  A RestraintTable that computes the penalties of the
+                        restraints in _restraintlist.
     _restraints     --  A set of Restraints. Restraints can be added using the
                         'restrain' or 'confine' methods.
     _ready          --  A flag indicating if all attributes are ready for the
                         calculation.
+    _validobjs      --  A set of the managed Configurables that have been
+                        validated and did not change since. These are skipped
+                        when the recipe is prepared again.
     _tagmanager     --  A TagManager instance for managing tags on Parameters.
     _weights        --  List of weighing factors for each FitContribution. The
                         weights are multiplied by the residual of the
                         FitContribution when determining the overall residual.
     _fixedtag       --  "__fixed", used for tagging variables as fixed. Don't
                         use this tag unless you want issues.
+    _varversion     --  Counter of the additions and removals of variables.
+    _configversion  --  Counter of the configuration changes of the recipe.
+    _threads        --  The _ThreadContexts of the thread-safe mode, or None.
+    _partition      --  The cached (key, free, fixed) partition of the
+                        variables, see _partitionVars. The key holds
+                        _varversion and the version of the _tagmanager.
 
     Properties
     names           --  Variable names (read only). See getNames.
@@ -86,12 +124,12 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
     """
 
     fixednames = property(lambda self:
-            [v.name for v in self._parameters.values()
-                if not (self.isFree(v) or self.isConstrained(v))],
+            [v.name for v in self._partitionVars()[1]
+                if not self.isConstrained(v)],
             doc='names of the fixed refinable variables')
     fixedvalues = property(lambda self:
-            array([v.value for v in self._parameters.values()
-                if not (self.isFree(v) or self.isConstrained(v))]),
+            array([v.value for v in self._partitionVars()[1]
+                if not self.isConstrained(v)]),
             doc='values of the fixed refinable variables')
     bounds = property(lambda self: self.getBounds())
     bounds2 = property(lambda self: self.getBounds2())
@@ -99,10 +137,18 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
     def __init__(self, name = "fit"):
         """Initialization."""
         RecipeOrganizer.__init__(self, name)
+        self._validobjs = set()
+        self._varversion = 0
+        self._configversion = 0
+        self._threads = None
+        self._partition = (None, [], [])
         self.fithooks = []
         self.pushFitHook(PrintFitHook())
         self._restraintlist = []
+        self._restrainttable = RestraintTable([])
         self._oconstraints = []
+        self._condeps = {}
+        self._dirtycons = set()
         self._ready = False
         self._fixedtag = "__fixed"
 
@@ -215,36 +261,65 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         FitContribution's residual, plus the value of each restraint. The array
         returned, denoted chiv, is such that
         dot(chiv, chiv) = chi^2 + restraints.
+
+        In the thread-safe mode, threads other than the refining one calculate
+        the residual of their own context, see threadContext.
         """
+        threads = self._threads
+        if threads is None:
+            return self._residual(p)
+        if threads.owner != get_ident():
+            return self.threadContext().residual(p)
+        with threads.lock:
+            return self._residual(p)
+
+    def _residual(self, p):
+        """Calculate the vector residual. See the residual method."""
 
         # Prepare, if necessary
         self._prepare()
 
-        for fithook in self.fithooks:
-            fithook.precall(self)
-
-        # Update the variable parameters.
-        self._applyValues(p)
-
-        # Update the constraints. These are ordered such that the list only
-        # needs to be cycled once.
-        for con in self._oconstraints:
-            con.update()
-
-        # Calculate the bare chiv
-        chiv = concatenate([
-            sqrt(self._weights[i])*\
-                    self._contributions.values()[i].residual().flatten() \
-                    for i in range(len(self._contributions))])
-
-        # Calculate the point-average chi^2
-        w = dot(chiv, chiv)/len(chiv)
-        # Now we must append the restraints
-        penalties = [ sqrt(res.penalty(w)) for res in self._restraintlist ]
-        chiv = concatenate( [ chiv, penalties ] )
-
-        for fithook in self.fithooks:
-            fithook.postcall(self, chiv)
+        timers = profiling.active.timers
+        depth = None if timers is None else timers.start(self.name)
+        try:
+            if timers is not None:
+                timers.start("fithooks")
+            for fithook in self.fithooks:
+                fithook.precall(self)
+            if timers is not None:
+                timers.stop()
+                timers.start("constraints")
+
+            # Update the variable parameters.
+            self._applyValues(p)
+
+            # Update the constraints that depend on the changed Parameters.
+            self._updateConstraints()
+            if timers is not None:
+                timers.stop()
+
+            # Calculate the bare chiv
+            chiv = concatenate([
+                sqrt(self._weights[i])*\
+                        self._contributions.values()[i].residual().flatten() \
+                        for i in range(len(self._contributions))])
+
+            # Calculate the point-average chi^2
+            w = dot(chiv, chiv)/len(chiv)
+            # Now we must append the restraints
+            if timers is not None:
+                timers.start("restraints")
+            penalties = self._restrainttable.penalties(w, timers)
+            if timers is not None:
+                timers.stop()
+                timers.start("fithooks")
+            chiv = concatenate( [ chiv, penalties ] )
+
+            for fithook in self.fithooks:
+                fithook.postcall(self, chiv)
+        finally:
+            if depth is not None:
+                timers.stop(depth)
 
         return chiv
 
@@ -270,6 +345,209 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         """Same as scalarResidual method."""
         return self.scalarResidual(p)
 
+    def optimize(self, method = "trf", jac = None, max_nfev = None,
+            workers = 1, **kw):
+        """Refine the free variables with a bounded least-squares solver.
+
+        The variable bounds and a finite-difference Jacobian of the residual
+        are passed to scipy.optimize.least_squares, and the variables are
+        scaled by the magnitude of their starting values. The recipe is left
+        at the optimized variable values.
+
+        method  --  The least_squares method, "trf" (default), "dogbox" or
+                    "lm". The "lm" method does not support bounds.
+        jac     --  The Jacobian. If this is None (default), the Jacobian is
+                    computed by a RecipeJacobian. Otherwise this is passed to
+                    least_squares.
+        max_nfev    --  The maximum number of residual evaluations (default
+                    None, solver default).
+        workers --  The number of worker processes for the Jacobian (default
+                    1). If this is -1, one worker is used per CPU.
+        kw      --  Other keyword arguments for least_squares.
+
+        See diffpy.srfit.fitbase.fitoptimizer for details.
+
+        Returns an OptimizeResults instance with the optimized values, the
+        number of evaluations and the timings.
+
+        Raises ValueError if method is "lm" and some variables are bounded.
+        """
+        from diffpy.srfit.fitbase.fitoptimizer import optimizeRecipe
+        return optimizeRecipe(self, method = method, jac = jac, max_nfev =
+                max_nfev, workers = workers, **kw)
+
+    def setSampling(self, fraction = None, method = "stratified", seed =
+            None):
+        """Evaluate the residual on samples of the calculation points.
+
+        This calls FitContribution.setSampling for each FitContribution.
+        Early iterations of a refinement against large profiles can be run on
+        samples that are redrawn with the resample method. Calling this with
+        fraction None switches back to the full profiles for the final
+        convergence. FitResults always use the full profiles.
+
+        fraction    --  The fraction of the calculation points in the samples.
+                    If this is None (default), all points are used.
+        method  --  "stratified" (default) or "random", see
+                    FitContribution.setSampling.
+        seed    --  Seed of the random samples (default None, random seed).
+                    The FitContributions get consecutive seeds.
+
+        Raises ValueError if fraction is not in (0, 1] or method is unknown.
+        """
+        for i, con in enumerate(self._contributions.values()):
+            conseed = None if seed is None else seed + i
+            con.setSampling(fraction, method, conseed)
+        return
+
+    def resample(self, epoch = None):
+        """Draw new samples of the calculation points for an epoch.
+
+        epoch   --  The epoch number. If this is None (default), the epoch
+                    following the current one is used.
+        """
+        for con in self._contributions.values():
+            con.resample(epoch)
+        return
+
+    @contextmanager
+    def _fullProfiles(self):
+        """Context for evaluating the recipe on the full profiles.
+
+        This suspends the sampling of the calculation points.
+        """
+        cons = [con for con in self._contributions.values()
+                if con.profile is not None]
+        saved = [(con._sampling, con.profile.subset) for con in cons]
+        for con in cons:
+            con._sampling = None
+            con.profile.setSubset(None)
+        try:
+            yield
+        finally:
+            for con, (sampling, subset) in zip(cons, saved):
+                con.profile.setSubset(subset)
+                con._sampling = sampling
+        return
+
+    def freeze(self):
+        """Get a flattened residual evaluator for the current configuration.
+
+        The returned FrozenRecipe is called with the values of the free
+        variables like the residual method and returns the same vector, with
+        less overhead per call and without calling the fit hooks. Its thaw
+        method leaves the recipe at the last evaluated values. The evaluator
+        becomes invalid when the configuration of the recipe changes.
+
+        See diffpy.srfit.fitbase.frozenrecipe for details.
+
+        Returns a FrozenRecipe instance.
+        """
+        from diffpy.srfit.fitbase.frozenrecipe import FrozenRecipe
+        return FrozenRecipe(self)
+
+    def setThreadSafe(self, threadsafe = True):
+        """Set the thread-safety mode of the recipe.
+
+        In the thread-safe mode the calling thread evaluates the recipe and
+        other threads evaluate their own clones, see the module documentation.
+        The recipe is copied with the clone method, so this is not possible
+        for recipes that cannot be cloned.
+
+        threadsafe  --  Flag for the thread-safe mode (default True). Setting
+                    the mode again makes the calling thread the refining one
+                    and discards the contexts of the other threads.
+        """
+        self._threads = _ThreadContexts() if threadsafe else None
+        return
+
+    def threadContext(self):
+        """Get the recipe to be evaluated by the calling thread.
+
+        Outside the thread-safe mode and in the refining thread this is the
+        recipe itself. Other threads get their own clone of the recipe, which
+        is made again when the configuration of the recipe has changed or
+        variables were added, removed, fixed or freed. The
+        variables of the clone are set to the values of the variables of the
+        recipe after its last complete residual calculation and its
+        constraints are updated. Other Parameters of the clone keep their
+        values from the time it was made.
+
+        Returns a FitRecipe.
+
+        Raises TypeError if the recipe cannot be cloned.
+        """
+        threads = self._threads
+        if threads is None or threads.owner == get_ident():
+            return self
+        local = threads.local
+        with threads.lock:
+            version = (self._configversion, self._varversion,
+                    self._tagmanager.version)
+            if getattr(local, "version", None) != version:
+                local.recipe = self.clone()
+                local.version = version
+            values = [v.getValue() for v in self._parameters.values()]
+        recipe = local.recipe
+        with recipe.batchUpdate():
+            for var, val in zip(recipe._parameters.values(), values):
+                var.setValue(val)
+        # Update the constrained Parameters, as a residual call does.
+        recipe._prepare()
+        recipe._updateConstraints()
+        return recipe
+
+    def clone(self):
+        """Make an independent copy of the recipe.
+
+        The whole hierarchy is deep-copied, so the copy has its own
+        Parameters, observers, constraints, restraints and tags, and can be
+        refined without affecting this recipe. The observed and calculation
+        arrays of the Profiles and the array constants of the equations are
+        not copied. The copy gets read-only views of them, since they are
+        replaced rather than modified in place. The copy has no fit hooks and
+        is not in the thread-safe mode.
+
+        Returns the new FitRecipe.
+
+        Raises TypeError if an object in the hierarchy cannot be copied, such
+        as a generator that runs in parallel worker processes.
+        """
+        import copy
+        from diffpy.srfit.equation.builder import _getBuilders
+        # The default builders of the equation factories are shared already.
+        memo = dict((id(b), b) for b in _getBuilders().values())
+        memo[id(self.fithooks)] = []
+        for a in self.__sharedArrays():
+            view = a.view()
+            view.flags.writeable = False
+            memo[id(a)] = view
+        return copy.deepcopy(self, memo)
+
+    def __sharedArrays(self):
+        """Get the arrays that a clone can share with the recipe."""
+        from numpy import ndarray
+        from diffpy.srfit.equation.literals import Argument
+        arrays = []
+        for con in self._contributions.values():
+            profile = con.profile
+            if profile is None:
+                continue
+            arrays += [profile.xobs, profile.yobs, profile.dyobs, profile.x,
+                    profile.y, profile.dy]
+            if profile._full is not None:
+                arrays.extend(profile._full)
+        organizers = [self]
+        while organizers:
+            org = organizers.pop()
+            organizers.extend(obj for obj in org._iterManaged()
+                    if isinstance(obj, RecipeOrganizer))
+            for b in org._eqfactory.builders.values():
+                lit = getattr(b, "literal", None)
+                if isinstance(lit, Argument) and lit.const:
+                    arrays.append(lit.value)
+        return [a for a in arrays if isinstance(a, ndarray)]
+
     def _prepare(self):
         """Prepare for the residual calculation, if necessary.
 
@@ -277,6 +555,8 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         calculation.
 
         This updates the local restraints with those of the contributions.
+        Only the managed objects that changed since they were last validated
+        are verified and validated again.
 
         Raises AttributeError if there are variables without a value.
         """
@@ -294,7 +574,8 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         self.__verifyProfiles()
 
         # Check parameters
-        self.__verifyParameters()
+        stale = self.__staleObjects()
+        self.__verifyParameters(stale)
 
         # Update constraints and restraints.
         self.__collectConstraintsAndRestraints()
@@ -302,11 +583,15 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         # We do this here so that the calculations that take place during the
         # validation use the most current values of the parameters. In most
         # cases, this will save us from recalculating them later.
-        for con in self._oconstraints:
-            con.update()
+        self._dirtycons = set(xrange(len(self._oconstraints)))
+        self._updateConstraints()
 
         # Validate!
-        self._validate()
+        self._validate(stale)
+
+        # Tabulate the restraints now that their equations can be evaluated.
+        self._restrainttable = RestraintTable(self._restraintlist)
+        self._restraintlist = self._restrainttable.restraints
 
         self._ready = True
 
@@ -327,12 +612,27 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
                     raise AttributeError(m)
         return
 
-    def __verifyParameters(self):
-        """Verify that all Parameters have values."""
+    def __staleObjects(self):
+        """Get the managed objects that need to be validated.
+
+        Returns a list of the managed objects that are not in _validobjs.
+        """
+        self._validobjs.intersection_update(self._iterManaged())
+        return [m for m in self._iterManaged() if m not in self._validobjs]
+
+    def __verifyParameters(self, stale):
+        """Verify that Parameters have values.
+
+        stale   --  The managed objects whose Parameters are verified in
+                    addition to the variables.
+        """
 
         # Get all parameters with a value of None
         badpars = []
-        for par in self.iterPars():
+        pars = [self._parameters.itervalues()]
+        # Deferred objects are not created, as their Parameters are not used.
+        pars.extend(m._allPars() for m in stale if hasattr(m, "_allPars"))
+        for par in chain(*pars):
             try:
                 par.getValue()
             except ValueError:
@@ -369,21 +669,25 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
             cdict.update( org._getConstraints() )
         cdict.update(self._constraints)
 
-        # The order of the restraint list does not matter
-        self._restraintlist = list(rset)
+        # Keep the penalties in a reproducible order
+        self._restraintlist = orderRestraints(rset)
 
         # Reorder the constraints. Constraints are ordered such that a given
         # constraint is placed before its dependencies.
         self._oconstraints = cdict.values()
 
+        # Constrained Parameters, resolved past any proxies. Equation
+        # arguments are always resolved this way.
+        conpars = dict((_resolveProxy(par), con) for par, con in cdict.items())
+
         # Create a depth-1 map of the constraint dependencies
         depmap = {}
         for con in self._oconstraints:
             depmap[con] = set()
             # Now check the constraint's equation for constrained arguments
             for arg in con.eq.args:
-                if arg in cdict:
-                    depmap[con].add( cdict[arg] )
+                if arg in conpars:
+                    depmap[con].add( conpars[arg] )
 
         # Turn the dependency map into multi-level map.
         def _extendDeps(con):
@@ -415,6 +719,73 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
 
         self._oconstraints.sort(cmp)
 
+        # Map the Parameters that can change the constraints to the indices of
+        # the affected constraints, so we can update only those.
+        self.__watchConstraintDeps(conpars, depmap)
+
+        return
+
+    def __watchConstraintDeps(self, conpars, depmap):
+        """Observe Parameters that constraints depend on.
+
+        This maps each free argument of the constraint equations, as well as
+        each constrained Parameter, to the indices of the constraints in
+        _oconstraints that must be updated when it changes.
+
+        conpars --  The dictionary of collected constraints, indexed by the
+                    constrained Parameter.
+        depmap  --  Multi-level map of each constraint to the constraints it
+                    depends on.
+        """
+        for par in self._condeps:
+            par.removeObserver(self._flagConstraints)
+
+        conidx = dict((con, i) for i, con in enumerate(self._oconstraints))
+
+        # The constraints that must follow an update of each constraint.
+        dependents = dict((con, set([conidx[con]])) for con in depmap)
+        for con, deps in depmap.items():
+            for dep in deps:
+                dependents[dep].add(conidx[con])
+
+        condeps = {}
+        for par, con in conpars.items():
+            # A constrained Parameter that is changed outside of its
+            # Constraint must be reset.
+            condeps.setdefault(par, set()).add(conidx[con])
+        for con in self._oconstraints:
+            for arg in con.eq.args:
+                if arg in conpars:
+                    continue
+                condeps.setdefault(arg, set()).update(dependents[con])
+
+        self._condeps = condeps
+        for par in self._condeps:
+            par.addObserver(self._flagConstraints)
+
+        return
+
+    def _flagConstraints(self, semaphors):
+        """Flag the constraints affected by a changed Parameter.
+
+        This is registered as an observer of the Parameters in _condeps.
+        """
+        self._dirtycons.update(self._condeps.get(semaphors[0], ()))
+        return
+
+    def _updateConstraints(self):
+        """Update the constraints that have been flagged as out of date.
+
+        The constraints are updated in the order of _oconstraints, so that a
+        constraint is updated after the constraints it depends on.
+        """
+        if not self._dirtycons:
+            return
+        oconstraints = self._oconstraints
+        for idx in sorted(self._dirtycons):
+            oconstraints[idx].update()
+        # Updated constraints flag themselves, which can be ignored.
+        self._dirtycons = set()
         return
 
     # Variable manipulation
@@ -572,23 +943,20 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         strargs = set([arg for arg in args if isinstance(arg, basestring)])
         varargs = set(args) - strargs
         # Check that the tags are valid
-        alltags = set(self._tagmanager.alltags())
-        badtags = strargs - alltags
+        badtags = [tag for tag in strargs if tag not in self._tagmanager]
         if badtags:
             names = ",".join(badtags)
             raise ValueError("Variables or tags cannot be found (%s)"% names)
 
-        # Check that variables are valid
-        allvars = set(self._parameters.values())
-        badvars = varargs - allvars
+        # Check that variables are valid. Variables are stored by name.
+        badvars = [v for v in varargs if
+                self._parameters.get(getattr(v, "name", None)) is not v]
         if badvars:
             names = ",".join(v.name for v in badvars)
             raise ValueError("Variables cannot be found (%s)"% names)
 
         # Make sure that we only have parameters in kw
-        kwnames = set(kw.keys())
-        allnames = set(self._parameters.keys())
-        badkw = kwnames - allnames
+        badkw = [name for name in kw if name not in self._parameters]
         if badkw:
             names = ",".join(badkw)
             raise ValueError("Tags cannot be passed as keywords (%s)"% names)
@@ -655,6 +1023,43 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         """Check if a variable is fixed."""
         return (not self._tagmanager.hasTags(var, self._fixedtag))
 
+    def _partitionVars(self):
+        """Get the free and the fixed variables.
+
+        The partition is cached until variables are added or removed, or the
+        tags change.
+
+        Returns a (free, fixed) tuple of lists of variables in the order of
+        the variables.
+        """
+        key = (self._varversion, self._tagmanager.version)
+        if self._partition[0] != key:
+            fixedvars = self._tagmanager.union(self._fixedtag)
+            free = []
+            fixed = []
+            for v in self._parameters.values():
+                (fixed if v in fixedvars else free).append(v)
+            self._partition = (key, free, fixed)
+        return self._partition[1:]
+
+    def _addParameter(self, par, check=True):
+        """Overloaded to invalidate the cached partition of the variables.
+
+        See RecipeOrganizer._addParameter
+        """
+        RecipeOrganizer._addParameter(self, par, check)
+        self._varversion += 1
+        return
+
+    def _removeParameter(self, par):
+        """Overloaded to invalidate the cached partition of the variables.
+
+        See RecipeOrganizer._removeParameter
+        """
+        RecipeOrganizer._removeParameter(self, par)
+        self._varversion += 1
+        return
+
     def unconstrain(self, *pars):
         """Unconstrain a Parameter.
 
@@ -744,12 +1149,11 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
 
     def getValues(self):
         """Get the current values of the variables in a list."""
-        return array([v.value for v in self._parameters.values() if
-            self.isFree(v)])
+        return array([v.value for v in self._partitionVars()[0]])
 
     def getNames(self):
         """Get the names of the variables in a list."""
-        return [v.name for v in self._parameters.values() if self.isFree(v)]
+        return [v.name for v in self._partitionVars()[0]]
 
     def getBounds(self):
         """Get the bounds on variables in a list.
@@ -757,7 +1161,7 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
         Returns a list of (lb, ub) pairs, where lb is the lower bound and ub is
         the upper bound.
         """
-        return [v.bounds for v in self._parameters.values() if self.isFree(v)]
+        return [v.bounds for v in self._partitionVars()[0]]
 
     def getBounds2(self):
         """Get the bounds on variables in two lists.
@@ -789,14 +1193,73 @@ class FitRecipe(_fitrecipe_interface, RecipeOrganizer):
     def _applyValues(self, p):
         """Apply variable values to the variables."""
         if len(p) == 0: return
-        vargen = (v for v in self._parameters.values() if self.isFree(v))
-        for var, pval in zip(vargen, p):
+        for var, pval in zip(self._partitionVars()[0], p):
             var.setValue(pval)
         return
 
-    def _updateConfiguration(self):
-        """Notify RecipeContainers in hierarchy of configuration change."""
+    def _validate(self, stale = None):
+        """Validate my state.
+
+        This validates the variables, the Restraints and Constraints of the
+        recipe and the managed objects that changed since they were last
+        validated.
+
+        stale   --  The managed objects to validate. If this is None
+                    (default), all managed objects are validated.
+
+        Raises AttributeError if validation fails.
+        """
+        if stale is None:
+            self._validobjs.clear()
+            stale = list(self._iterManaged())
+        iterable = chain(self.__iter__(), stale, iter(self._restraints),
+                self._constraints.itervalues())
+        self._validateOthers(iterable)
+        self._validobjs.update(m for m in stale
+                if isinstance(m, Configurable))
+        return
+
+    def _updateConfiguration(self, changed = None):
+        """Notify RecipeContainers in hierarchy of configuration change.
+
+        changed --  The managed object whose configuration changed, or None
+                    (default) if the change took place in the recipe.
+        """
         self._ready = False
+        self._configversion += 1
+        self._validobjs.discard(changed)
+        return
+
+# End class FitRecipe
+
+class _ThreadContexts(object):
+    """State of the thread-safe mode of a FitRecipe.
+
+    Attributes
+    owner   --  Identifier of the thread that evaluates the recipe itself.
+    lock    --  RLock held by the owner while it evaluates the recipe.
+    local   --  threading.local with the clone of the recipe of each other
+                thread and the configuration version it was made at.
+
+    """
+
+    def __init__(self):
+        """Make the calling thread the owner."""
+        self.owner = get_ident()
+        self.lock = threading.RLock()
+        self.local = threading.local()
         return
 
+    def __deepcopy__(self, memo):
+        """Copies of the recipe are not thread-safe."""
+        return None
+
+# End class _ThreadContexts
+
+def _resolveProxy(par):
+    """Get the Parameter at the end of a chain of ParameterProxy objects."""
+    while isinstance(par, ParameterProxy):
+        par = par.par
+    return par
+
 # End of file
@@ -103,15 +103,31 @@ class FitResults(object):
         return
 
     def update(self):
-        """Update the results according to the current state of the recipe."""
+        """Update the results according to the current state of the recipe.
+
+        The results are calculated over the full profiles, also when the
+        recipe is sampling the calculation points (see FitRecipe.setSampling).
+        In the thread-safe mode of the recipe they are calculated with the
+        context of the calling thread (see FitRecipe.threadContext).
+        """
+        if not self.recipe._contributions:
+            return
+        recipe = self.recipe
+        self.recipe = recipe.threadContext()
+        try:
+            with self.recipe._fullProfiles():
+                self._update()
+        finally:
+            self.recipe = recipe
+        return
+
+    def _update(self):
+        """Update the results over the current calculation points."""
         ## Note that the order of these operations are chosen to reduce
         ## computation time.
 
         recipe = self.recipe
 
-        if not recipe._contributions:
-            return
-
         # Make sure everything is ready for calculation
         recipe._prepare()
 
@@ -660,11 +676,12 @@ def initializeRecipe(recipe, results):
 
     # Get variable names
     names = recipe._parameters.keys()
-    for vname in names:
-        value = mpairs.get(vname)
-        if value is not None:
-            var = recipe.get(vname)
-            var.value = float(value)
+    with recipe.batchUpdate():
+        for vname in names:
+            value = mpairs.get(vname)
+            if value is not None:
+                var = recipe.get(vname)
+                var.value = float(value)
 
     return
 
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Flattened residual evaluator of a configured FitRecipe.
+
+FitRecipe.freeze returns a FrozenRecipe, which evaluates the same residual as
+FitRecipe.residual with the configuration of the recipe fixed at the time it
+was frozen. The free variables, the bound methods that evaluate the
+constraints, contributions and restraint table, and the slices of the residual
+vector are looked up once, so a residual call does no attribute lookups
+through the recipe hierarchy, no tag checks and no list concatenation.
+
+"""
+
+__all__ = ["FrozenRecipe"]
+
+import numpy
+
+from diffpy.srfit.exceptions import SrFitError
+
+class FrozenRecipe(object):
+    """Residual evaluator of a FitRecipe with a fixed configuration.
+
+    Instances are callable with the values of the free variables and return
+    the same vector as FitRecipe.residual. The fit hooks of the recipe are not
+    called. Changes to the configuration of the recipe and fixing, freeing,
+    adding or removing variables make the evaluator invalid; freeze the recipe
+    again after doing so. In the thread-safe mode of the recipe the evaluation
+    holds the lock of the mode.
+
+    Attributes
+    recipe      --  The frozen FitRecipe.
+    names       --  Names of the free variables.
+    _setters    --  setValue methods of the free variables, resolved past any
+                    ParameterProxy.
+    _contribs   --  List of (sqrt(weight), residual method, slice) of the
+                    FitContributions.
+    _penalties  --  The penalties method of the RestraintTable of the recipe.
+    _npoints    --  Number of residual points of the FitContributions.
+    _out        --  The preallocated residual vector.
+    _lastp      --  The last variable values passed to the evaluator.
+    _partkey    --  The key of the free and fixed partition of the variables
+                    when the recipe was frozen, see FitRecipe._varversion.
+
+    """
+
+    def __init__(self, recipe):
+        """Freeze a FitRecipe.
+
+        This prepares the recipe and evaluates the residual once to find the
+        size of the contribution residuals.
+        """
+        from diffpy.srfit.fitbase.fitrecipe import _resolveProxy
+        recipe._prepare()
+        self.recipe = recipe
+        self._partkey = (recipe._varversion, recipe._tagmanager.version)
+        variables = [v for v in recipe._parameters.values()
+                if recipe.isFree(v)]
+        self.names = [v.name for v in variables]
+        self._setters = [_resolveProxy(v).setValue for v in variables]
+        self._lastp = numpy.array([v.getValue() for v in variables],
+                dtype=float)
+
+        recipe._updateConstraints()
+        self._contribs = []
+        lo = 0
+        for con, weight in zip(recipe._contributions.values(),
+                recipe._weights):
+            size = con.residual().size
+            self._contribs.append((numpy.sqrt(weight), con.residual,
+                slice(lo, lo + size)))
+            lo += size
+        self._npoints = lo
+        self._penalties = recipe._restrainttable.penalties
+        self._out = numpy.empty(lo + len(recipe._restrainttable), dtype=float)
+        return
+
+    def __call__(self, p = []):
+        """Calculate the residual vector at the free variable values p.
+
+        If p is empty, the current values of the variables are used.
+
+        Returns a new array, see FitRecipe.residual.
+
+        Raises SrFitError if the configuration or the free variables of the
+        recipe have changed since it was frozen.
+        """
+        threads = self.recipe._threads
+        if threads is None:
+            return self._evaluate(p)
+        # Evaluate the recipe itself under the lock of the thread-safe mode.
+        with threads.lock:
+            return self._evaluate(p)
+
+    def _evaluate(self, p):
+        """Calculate the residual vector. See __call__."""
+        recipe = self.recipe
+        if not recipe._ready:
+            raise SrFitError("The recipe changed after it was frozen")
+        if self._partkey != (recipe._varversion, recipe._tagmanager.version):
+            msg = "The free variables changed after the recipe was frozen"
+            raise SrFitError(msg)
+        if len(p):
+            for setvalue, val in zip(self._setters, p):
+                setvalue(val)
+            self._lastp = numpy.array(p, dtype=float)
+        recipe._updateConstraints()
+
+        out = self._out
+        for sw, residual, sl in self._contribs:
+            numpy.multiply(sw, residual().ravel(), out[sl])
+        n = self._npoints
+        chiv = out[:n]
+        w = numpy.dot(chiv, chiv) / n
+        out[n:] = self._penalties(w)
+        # The optimizers may keep references to earlier residuals.
+        return out.copy()
+
+    def thaw(self):
+        """Leave the recipe at the last evaluated variable values.
+
+        This brings the constrained parameters of the recipe up to date with
+        the variables, as after a call to FitRecipe.residual.
+
+        Returns the FitRecipe.
+        """
+        for setvalue, val in zip(self._setters, self._lastp):
+            setvalue(val)
+        self.recipe._updateConstraints()
+        return self.recipe
+
+# End class FrozenRecipe
+
+# End of file
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Ensemble MCMC sampling of the posterior of a FitRecipe.
+
+The sampleRecipe function draws samples of the free variables of a FitRecipe
+with the affine-invariant ensemble sampler of Goodman and Weare (stretch
+move). The log-likelihood is -chi^2/2, where chi^2 is the scalar residual of
+the recipe, including the restraint penalties. The variable bounds are taken
+as a uniform prior. The walkers are split in two halves that are moved in
+turn, so each half is evaluated as one batch, optionally in a pool of worker
+processes that hold their own copies of the recipe. The chains can be
+streamed to a text file while sampling and read back with loadChain.
+
+ChainResults holds the chains, the convergence diagnostics (acceptance
+fractions, autocorrelation times and the Gelman-Rubin statistic) and can
+replace the linearized uncertainties of FitResults with posterior summaries.
+
+"""
+
+__all__ = ["sampleRecipe", "ChainResults", "loadChain"]
+
+import numpy
+
+from diffpy.srfit.fitbase.fitoptimizer import (_countWorkers, _makePool)
+from diffpy.srfit.fitbase import fitoptimizer
+
+class ChainResults(object):
+    """Chains of an ensemble MCMC run.
+
+    Attributes
+    names       --  Names of the sampled variables.
+    chain       --  Array of variable values with shape (nsteps, nwalkers,
+                    nvars).
+    lnprob      --  Array of the log-posterior of each sample with shape
+                    (nsteps, nwalkers).
+    acceptance  --  Array of the acceptance fraction of each walker.
+
+    """
+
+    def __init__(self, names, chain, lnprob, acceptance = None):
+        """Initialize the attributes. See the class documentation."""
+        self.names = list(names)
+        self.chain = numpy.asarray(chain, dtype=float)
+        self.lnprob = numpy.asarray(lnprob, dtype=float)
+        if acceptance is None:
+            acceptance = numpy.zeros(self.chain.shape[1])
+        self.acceptance = numpy.asarray(acceptance, dtype=float)
+        return
+
+    nsteps = property(lambda self: self.chain.shape[0],
+            doc = "The number of steps of the chains.")
+    nwalkers = property(lambda self: self.chain.shape[1],
+            doc = "The number of walkers.")
+
+    def best(self):
+        """Get the sample with the highest posterior.
+
+        Returns a (values, lnprob) tuple.
+        """
+        idx = numpy.unravel_index(numpy.argmax(self.lnprob),
+                self.lnprob.shape)
+        return self.chain[idx], self.lnprob[idx]
+
+    def flatChain(self, burn = 0, thin = 1):
+        """Get the samples of all walkers as one array.
+
+        burn    --  Number of initial steps to discard (default 0).
+        thin    --  Keep every thin-th step (default 1).
+
+        Returns an array with shape (nsamples, nvars).
+        """
+        return self.chain[burn::thin].reshape(-1, self.chain.shape[2])
+
+    def mean(self, burn = 0):
+        """Get the posterior means of the variables."""
+        return self.flatChain(burn).mean(axis = 0)
+
+    def std(self, burn = 0):
+        """Get the posterior standard deviations of the variables."""
+        return self.flatChain(burn).std(axis = 0, ddof = 1)
+
+    def cov(self, burn = 0):
+        """Get the posterior covariance matrix of the variables."""
+        return numpy.atleast_2d(numpy.cov(self.flatChain(burn), rowvar = 0))
+
+    def percentiles(self, q = (2.5, 50, 97.5), burn = 0):
+        """Get percentiles of the posterior of each variable.
+
+        Returns an array with one row per percentile in q.
+        """
+        return numpy.percentile(self.flatChain(burn), q, axis = 0)
+
+    def autocorrTime(self, burn = 0, c = 5):
+        """Estimate the integrated autocorrelation time of each variable.
+
+        The autocorrelation function is averaged over the walkers and summed
+        up to the smallest lag M with M >= c * tau (Sokal's window).
+
+        burn    --  Number of initial steps to discard (default 0).
+        c       --  The window factor (default 5).
+
+        Returns an array of times in steps.
+        """
+        x = self.chain[burn:]
+        n = x.shape[0]
+        nfft = 1 << (2 * n - 1).bit_length()
+        dx = x - x.mean(axis = 0)
+        f = numpy.fft.rfft(dx, n = nfft, axis = 0)
+        acf = numpy.fft.irfft(f * f.conjugate(), n = nfft, axis = 0)[:n]
+        acf = acf.mean(axis = 1)
+        var = acf[0]
+        var[var == 0] = 1.0
+        acf /= var
+        taus = 2 * numpy.cumsum(acf, axis = 0) - 1
+        tau = numpy.empty(taus.shape[1])
+        for j in range(taus.shape[1]):
+            window = numpy.arange(n) >= c * taus[:, j]
+            m = numpy.argmax(window) if window.any() else n - 1
+            tau[j] = taus[m, j]
+        return tau
+
+    def rhat(self, burn = 0):
+        """Get the Gelman-Rubin statistic of each variable.
+
+        The walkers are treated as separate chains. Values close to 1 indicate
+        that the walkers sample the same distribution.
+        """
+        x = self.chain[burn:]
+        n = x.shape[0]
+        means = x.mean(axis = 0)
+        b = n * means.var(axis = 0, ddof = 1)
+        w = x.var(axis = 0, ddof = 1).mean(axis = 0)
+        var = (n - 1.0) / n * w + b / n
+        return numpy.sqrt(var / w)
+
+    def updateResults(self, results, burn = 0, nsamples = 1000):
+        """Replace the uncertainties of FitResults with posterior summaries.
+
+        This sets the covariance and the variable uncertainties to those of
+        the posterior samples. The uncertainties of the constrained parameters
+        are the standard deviations of their values over at most nsamples of
+        the posterior samples. The variable values and the fit metrics of the
+        results are kept and the recipe is left at the variable values of the
+        results.
+
+        results --  The FitResults of the recipe that was sampled.
+        burn    --  Number of initial steps to discard (default 0).
+        nsamples    --  Number of samples for the constraint uncertainties
+                    (default 1000).
+
+        Raises ValueError if the variables of the results are not those that
+        were sampled.
+        """
+        if list(results.varnames) != self.names:
+            raise ValueError("The results are for other variables")
+        recipe = results.recipe
+        flat = self.flatChain(burn)
+        step = max(1, len(flat) // nsamples)
+        convals = []
+        for x in flat[::step]:
+            recipe._applyValues(x)
+            recipe._updateConstraints()
+            convals.append([con.par.getValue() for con in
+                recipe._oconstraints])
+        recipe.residual(results.varvals)
+        results.cov = self.cov(burn)
+        results.varunc = list(self.std(burn))
+        results.conunc = []
+        for vals in zip(*convals):
+            if numpy.isscalar(vals[0]):
+                results.conunc.append(numpy.std(vals, ddof = 1))
+            else:
+                results.conunc.append(0.0)
+        msg = ("Uncertainties from %i MCMC samples of %i walkers" %
+                (len(flat), self.nwalkers))
+        results.messages.append(msg)
+        return
+
+    def __str__(self):
+        lines = ["%s: %i steps, %i walkers, acceptance = %.3f" % (
+            self.__class__.__name__, self.nsteps, self.nwalkers,
+            self.acceptance.mean())]
+        mean = self.mean()
+        std = self.std() if self.chain.size > self.chain.shape[2] else \
+                numpy.zeros_like(mean)
+        for item in zip(self.names, mean, std):
+            lines.append("  %s = %g +/- %g" % item)
+        return "\n".join(lines)
+
+# End class ChainResults
+
+def sampleRecipe(recipe, nsteps = 1000, nwalkers = None, p0 = None,
+        scatter = 1e-3, a = 2.0, workers = 1, filename = None, seed = None):
+    """Sample the posterior of the free variables of a FitRecipe.
+
+    recipe  --  The FitRecipe. The recipe is left at the sample with the
+                highest posterior.
+    nsteps  --  The number of steps of each walker (default 1000).
+    nwalkers    --  The number of walkers (default None, twice the number of
+                variables plus 2).
+    p0      --  Array of the starting points of the walkers with shape
+                (nwalkers, nvars). If this is None (default), the walkers
+                start in a small ball around the current variable values.
+    scatter --  The relative size of the starting ball (default 1e-3).
+    a       --  The scale parameter of the stretch move (default 2.0).
+    workers --  The number of worker processes for evaluating the walkers
+                (default 1). If this is -1, one worker is used per CPU.
+                Each worker holds a copy of the recipe, see
+                fitoptimizer._makePool.
+    filename    --  Name of a text file for streaming the chains (default
+                None). Each step appends one line per walker with the step,
+                the walker, the log-posterior and the variable values.
+    seed    --  Seed of the random number generator (default None).
+
+    Returns a ChainResults instance.
+
+    Raises ValueError if there are fewer walkers than twice the number of
+    variables or the starting points are outside of the bounds.
+    """
+    recipe._prepare()
+    names = recipe.getNames()
+    ndim = len(names)
+    lb, ub = recipe.getBounds2()
+    lb = numpy.asarray(lb, dtype=float)
+    ub = numpy.asarray(ub, dtype=float)
+    rs = numpy.random.RandomState(seed)
+
+    if p0 is None:
+        nwalkers = nwalkers or 2 * ndim + 2
+        x0 = numpy.asarray(recipe.getValues(), dtype=float)
+        size = scatter * numpy.where(x0 != 0, numpy.abs(x0), 1.0)
+        p0 = x0 + size * rs.randn(nwalkers, ndim)
+        p0 = numpy.clip(p0, lb, ub)
+    p0 = numpy.array(p0, dtype=float).reshape(-1, ndim)
+    nwalkers = len(p0)
+    if nwalkers < 2 * ndim:
+        raise ValueError("At least %i walkers are needed" % (2 * ndim))
+    if ((p0 < lb) | (p0 > ub)).any():
+        raise ValueError("The starting points must be within the bounds")
+
+    chain = numpy.empty((nsteps, nwalkers, ndim), dtype=float)
+    lnprob = numpy.empty((nsteps, nwalkers), dtype=float)
+    accepted = numpy.zeros(nwalkers, dtype=int)
+
+    workers = _countWorkers(workers)
+    pool = None
+    if workers > 1:
+        pool = _makePool(recipe, workers)
+        evaluate = lambda plist: pool.map(_workerLnProb, plist)
+    else:
+        evaluate = lambda plist: [_lnProb(recipe, p) for p in plist]
+
+    fp = None
+    if filename is not None:
+        fp = open(filename, "w")
+        fp.write("# step walker lnprob %s\n" % " ".join(names))
+
+    try:
+        x = p0.copy()
+        lnp = numpy.array(evaluate(list(x)), dtype=float)
+        half = nwalkers // 2
+        halves = (numpy.arange(half), numpy.arange(half, nwalkers))
+        for step in xrange(nsteps):
+            for k in (0, 1):
+                idx = halves[k]
+                other = x[halves[1 - k]]
+                z = ((a - 1) * rs.rand(len(idx)) + 1)**2 / a
+                partners = other[rs.randint(len(other), size = len(idx))]
+                y = partners + z[:, None] * (x[idx] - partners)
+                inside = ((y >= lb) & (y <= ub)).all(axis = 1)
+                lny = numpy.empty(len(idx))
+                lny.fill(-numpy.inf)
+                if inside.any():
+                    lny[inside] = evaluate(list(y[inside]))
+                lnr = (ndim - 1) * numpy.log(z) + lny - lnp[idx]
+                accept = numpy.log(rs.rand(len(idx))) < lnr
+                x[idx[accept]] = y[accept]
+                lnp[idx[accept]] = lny[accept]
+                accepted[idx[accept]] += 1
+            chain[step] = x
+            lnprob[step] = lnp
+            if fp is not None:
+                rows = numpy.column_stack([numpy.repeat(step, nwalkers),
+                    numpy.arange(nwalkers), lnp, x])
+                numpy.savetxt(fp, rows, fmt = ["%i", "%i"] +
+                        ["%.17g"] * (ndim + 1))
+                fp.flush()
+    finally:
+        if fp is not None:
+            fp.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    results = ChainResults(names, chain, lnprob,
+            accepted / float(max(nsteps, 1)))
+    if nsteps:
+        recipe.residual(results.best()[0])
+    return results
+
+def loadChain(filename):
+    """Load chains streamed to a file by sampleRecipe.
+
+    Incomplete last steps are ignored. The acceptance fractions are not
+    stored in the file and are set to zero.
+
+    Returns a ChainResults instance.
+    """
+    with open(filename) as fp:
+        names = fp.readline().split()[4:]
+        data = numpy.loadtxt(fp, ndmin = 2)
+    ndim = len(names)
+    nwalkers = int(data[:, 1].max()) + 1 if len(data) else 0
+    nsteps = len(data) // nwalkers if nwalkers else 0
+    data = data[:nsteps * nwalkers]
+    chain = data[:, 3:].reshape(nsteps, nwalkers, ndim)
+    lnprob = data[:, 2].reshape(nsteps, nwalkers)
+    return ChainResults(names, chain, lnprob)
+
+def _lnProb(recipe, p):
+    """Get the log-likelihood of the recipe at p."""
+    chiv = recipe.residual(p)
+    lnp = -0.5 * numpy.dot(chiv, chiv)
+    return lnp if numpy.isfinite(lnp) else -numpy.inf
+
+def _workerLnProb(p):
+    """Get the log-likelihood of the worker recipe at p."""
+    return _lnProb(fitoptimizer._workerrecipe, p)
+
+# End of file
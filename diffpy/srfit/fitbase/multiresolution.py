@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Coarse-to-fine refinement of a FitRecipe.
+
+The refineCoarseToFine function optimizes a FitRecipe on a schedule of
+calculation grids. Each stage keeps every n-th calculation point of the
+profiles, optionally up to a reduced maximum x, such as a shorter r-range of a
+PDF. The stages run from the coarsest to the finest grid and each one starts
+from the variables refined by the previous one. The profiles are switched in
+place, so the recipe is not rebuilt and the generators see the new
+calculation points like any other change of the profile. The original
+calculation points are restored when the schedule ends.
+
+"""
+
+__all__ = ["refineCoarseToFine", "StageResults"]
+
+from diffpy.srfit.fitbase.fitoptimizer import optimizeRecipe
+from diffpy.srfit.fitbase.profile import epsilon
+
+class StageResults(object):
+    """Outcome of one stage of a coarse-to-fine refinement.
+
+    Attributes
+    step    --  Only every step-th calculation point was used.
+    xmax    --  The maximum x of the calculation points, or None if the
+                original maximum was kept.
+    npoints --  The number of calculation points of all profiles.
+    results --  The OptimizeResults of the stage.
+
+    """
+
+    def __init__(self, step, xmax, npoints, results):
+        """Initialize the attributes. See the class documentation."""
+        self.step = step
+        self.xmax = xmax
+        self.npoints = npoints
+        self.results = results
+        return
+
+    cost = property(lambda self: self.results.cost,
+            doc = "The scalar residual at the end of the stage.")
+
+    def __str__(self):
+        return "%s(step = %i, xmax = %s, npoints = %i, cost = %g)" % (
+                self.__class__.__name__, self.step, self.xmax, self.npoints,
+                self.cost)
+
+# End class StageResults
+
+def refineCoarseToFine(recipe, stages = (4, 2, 1), **kw):
+    """Refine a FitRecipe on progressively finer calculation grids.
+
+    recipe  --  The FitRecipe to refine. The recipe is left at the variable
+                values of the last stage.
+    stages  --  Sequence of stages from the coarsest to the finest (default
+                (4, 2, 1)). A stage is an integer step, which keeps every
+                step-th calculation point, or a (step, xmax) tuple, which also
+                drops the calculation points above xmax. An xmax of None keeps
+                the original maximum. Add a final stage of 1 to refine on the
+                original calculation points.
+    kw      --  Keyword arguments for optimizeRecipe, used in all stages.
+
+    Returns a list with the StageResults of each stage.
+
+    Raises ValueError if a step is not a positive integer or a stage leaves a
+    profile without calculation points.
+    """
+    schedule = []
+    for stage in stages:
+        step, xmax = stage if isinstance(stage, tuple) else (stage, None)
+        if int(step) != step or step < 1:
+            raise ValueError("The step must be a positive integer")
+        schedule.append((int(step), xmax))
+
+    profiles = [con.profile for con in recipe._contributions.values()
+            if con.profile is not None]
+    # Switch the full profiles if the recipe is sampling them.
+    with recipe._fullProfiles():
+        saved = [(p.x, p.y, p.dy) for p in profiles]
+        stageresults = []
+        try:
+            for step, xmax in schedule:
+                npoints = 0
+                for profile, (x, y, dy) in zip(profiles, saved):
+                    _setGrid(profile, x, y, dy, step, xmax)
+                    npoints += len(profile.x)
+                res = optimizeRecipe(recipe, **kw)
+                stageresults.append(StageResults(step, xmax, npoints, res))
+        finally:
+            for profile, (x, y, dy) in zip(profiles, saved):
+                profile.x = x
+                profile.y = y
+                profile.dy = dy
+        # Update the calculation on the original grid.
+        recipe.residual()
+    return stageresults
+
+def _setGrid(profile, x, y, dy, step, xmax):
+    """Set the calculation points of a profile to a coarse grid.
+
+    x, y, dy    --  The original calculation arrays of the profile.
+    step        --  Keep every step-th calculation point.
+    xmax        --  Drop the calculation points above xmax, unless None.
+
+    Raises ValueError if no calculation points are left.
+    """
+    sel = slice(None, None, step)
+    if xmax is not None:
+        n = x.searchsorted(xmax + epsilon, side = "right")
+        sel = slice(None, n, step)
+    if not len(x[sel]):
+        raise ValueError("No calculation points below xmax = %s" % xmax)
+    profile.x = x[sel]
+    profile.y = y[sel]
+    profile.dy = dy[sel]
+    return
+
+# End of file
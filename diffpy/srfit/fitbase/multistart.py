@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Multi-start global search over a FitRecipe.
+
+The multiStart function samples starting values of the free variables within
+their bounds and runs a local optimization (see FitRecipe.optimize) from each
+of them. The local optimizations can run in a pool of worker processes, each
+holding its own copy of the recipe. Results that end at the same point are
+grouped as a Minimum. The search stops early when the best Minimum has been
+reached a given number of times.
+
+"""
+
+__all__ = ["multiStart", "Minimum", "sampleStarts"]
+
+import numpy
+
+from diffpy.srfit.fitbase.fitoptimizer import (optimizeRecipe, _countWorkers,
+        _makePool)
+from diffpy.srfit.fitbase import fitoptimizer
+
+class Minimum(object):
+    """A minimum found by the multi-start search.
+
+    Attributes
+    names   --  Names of the refined variables.
+    x       --  Variable values at the minimum, taken from the best of the
+                grouped results.
+    cost    --  The scalar residual at x.
+    results --  List of OptimizeResults of the local optimizations that ended
+                at this minimum.
+    count   --  Number of local optimizations that ended at this minimum.
+
+    """
+
+    def __init__(self, result):
+        """Start a minimum from the OptimizeResults of a local optimization."""
+        self.names = result.names
+        self.x = result.x
+        self.cost = result.cost
+        self.results = [result]
+        return
+
+    count = property(lambda self: len(self.results))
+
+    def add(self, result):
+        """Add an OptimizeResults that ended at this minimum."""
+        self.results.append(result)
+        if result.cost < self.cost:
+            self.x = result.x
+            self.cost = result.cost
+        return
+
+    def __str__(self):
+        lines = ["%s: cost = %g, count = %i" % (self.__class__.__name__,
+            self.cost, self.count)]
+        lines.extend("  %s = %g" % item for item in zip(self.names, self.x))
+        return "\n".join(lines)
+
+# End class Minimum
+
+def sampleStarts(lb, ub, nstarts, sampling = "lhs", seed = None):
+    """Sample starting vectors within bounds.
+
+    lb      --  Lower bounds of the variables.
+    ub      --  Upper bounds of the variables.
+    nstarts --  The number of starting vectors.
+    sampling    --  The sampling method, "lhs" for Latin hypercube (default),
+                "halton" for a randomly shifted Halton sequence or "random"
+                for uniform random sampling.
+    seed    --  Seed of the random number generator (default None).
+
+    Returns an array of shape (nstarts, len(lb)).
+
+    Raises ValueError if the bounds are not finite or sampling is unknown.
+    """
+    lb = numpy.asarray(lb, dtype=float)
+    ub = numpy.asarray(ub, dtype=float)
+    if not (numpy.isfinite(lb).all() and numpy.isfinite(ub).all()):
+        raise ValueError("Sampling needs finite bounds on all variables")
+    rs = numpy.random.RandomState(seed)
+    n = len(lb)
+    if sampling == "lhs":
+        # One point per stratum of each variable, randomly paired.
+        u = numpy.empty((nstarts, n), dtype=float)
+        for j in range(n):
+            u[:, j] = (rs.permutation(nstarts) + rs.rand(nstarts)) / nstarts
+    elif sampling == "halton":
+        u = _halton(nstarts, n, rs)
+    elif sampling == "random":
+        u = rs.rand(nstarts, n)
+    else:
+        raise ValueError("Unknown sampling method '%s'" % sampling)
+    return lb + u * (ub - lb)
+
+def _halton(npoints, ndim, rs):
+    """Get points of a Halton sequence in the unit hypercube.
+
+    Each dimension is the radical inverse of the point index in the base of
+    a prime. The sequence is shifted by a random vector modulo 1, so
+    different seeds give different point sets of the same uniformity and
+    the first point is not at the origin.
+
+    Returns an array of shape (npoints, ndim).
+    """
+    primes = []
+    k = 2
+    while len(primes) < ndim:
+        if all(k % p for p in primes):
+            primes.append(k)
+        k += 1
+    u = numpy.zeros((npoints, ndim), dtype=float)
+    for j, base in enumerate(primes):
+        idx = numpy.arange(npoints)
+        scale = 1.0
+        while idx.any():
+            scale /= base
+            idx, digit = divmod(idx, base)
+            u[:, j] += digit * scale
+    u += rs.rand(ndim)
+    return u % 1.0
+
+def multiStart(recipe, nstarts = 20, sampling = "lhs", nconverge = None,
+        xtol = 1e-4, workers = 1, seed = None, **kw):
+    """Run local optimizations of a FitRecipe from many starting points.
+
+    The starting values of the free variables are sampled within their
+    bounds. The optimization from each start uses optimizeRecipe with the
+    keyword arguments kw. The best minimum is applied to the recipe.
+
+    recipe  --  The FitRecipe to optimize. All free variables must have
+                finite bounds.
+    nstarts --  The number of starting points (default 20).
+    sampling    --  The sampling method (default "lhs"). See sampleStarts.
+    nconverge   --  Stop once this many local optimizations have ended at
+                the best minimum found so far (default None, run all starts).
+    xtol    --  Two results are at the same minimum if their variables differ
+                by at most xtol times the width of the bounds (default 1e-4).
+    workers --  The number of worker processes for the local optimizations
+                (default 1). If this is -1, one worker is used per CPU.
+                Each worker holds a copy of the recipe, see
+                fitoptimizer._makePool.
+    seed    --  Seed for sampling the starting points (default None).
+    kw      --  Keyword arguments for optimizeRecipe.
+
+    Returns a list of Minimum instances ranked by their cost.
+
+    Raises ValueError if some free variables are not bounded.
+    """
+    recipe._prepare()
+    lb, ub = recipe.getBounds2()
+    starts = sampleStarts(lb, ub, nstarts, sampling, seed)
+    scale = xtol * (numpy.asarray(ub) - numpy.asarray(lb))
+
+    minima = []
+    workers = _countWorkers(workers)
+    pool = None
+    if workers > 1:
+        pool = _makePool(recipe, workers)
+        jobs = [(x0, kw) for x0 in starts]
+        results = pool.imap_unordered(_workerOptimize, jobs)
+    else:
+        results = (_optimizeFrom(recipe, x0, kw) for x0 in starts)
+
+    try:
+        for res in results:
+            best = _addResult(minima, res, scale)
+            if nconverge and best.count >= nconverge:
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    minima.sort(key = lambda m: m.cost)
+    recipe.residual(minima[0].x)
+    return minima
+
+def _addResult(minima, res, scale):
+    """Add an OptimizeResults to the list of minima.
+
+    Returns the best Minimum in the list.
+    """
+    for m in minima:
+        if (numpy.abs(m.x - res.x) <= scale).all():
+            m.add(res)
+            break
+    else:
+        minima.append(Minimum(res))
+    return min(minima, key = lambda m: m.cost)
+
+def _optimizeFrom(recipe, x0, kw):
+    """Optimize the recipe starting from the variable values x0."""
+    recipe._applyValues(x0)
+    return optimizeRecipe(recipe, **kw)
+
+def _workerOptimize(args):
+    """Optimize the worker recipe from a starting point."""
+    x0, kw = args
+    return _optimizeFrom(fitoptimizer._workerrecipe, x0, kw)
+
+# End of file
@@ -16,6 +16,10 @@
 
 Parameters encapsulate an adjustable parameter within SrFit.
 
+A structure model holds tens of Parameters per atom, so the Parameter classes
+keep their attributes in slots rather than in an instance dictionary. Classes
+derived from them get an instance dictionary unless they define __slots__.
+
 """
 # IDEA - Add onConstrain, onRestrain, onVary so that adaptors to Parameters
 # can have more fine control over the construction of FitRecipes.
@@ -24,6 +28,8 @@ Parameters encapsulate an adjustable parameter within SrFit.
 
 __all__ = [ "Parameter", "ParameterProxy", "ParameterAdapter"]
 
+import weakref
+
 from numpy import inf
 
 from diffpy.srfit.exceptions import SrFitError
@@ -31,6 +37,7 @@ from diffpy.srfit.equation.literals import Argument
 from diffpy.srfit.equation.literals.abcs import ArgumentABC
 from diffpy.srfit.util.nameutils import validateName
 from diffpy.srfit.util.argbinders import bind2nd
+from diffpy.srfit.util.observable import _getSlotState, _setSlotState
 from diffpy.srfit.interface import _parameter_interface
 from diffpy.srfit.fitbase.validatable import Validatable
 
@@ -51,6 +58,8 @@ class Parameter(_parameter_interface, Argument, Validatable):
 
     """
 
+    __slots__ = ("constrained", "bounds")
+
     def __init__(self, name, value = None, const = False):
         """Initialization.
 
@@ -142,13 +151,28 @@ class ParameterProxy(_parameter_interface, Validatable):
 
     This allows for the same parameter to have multiple names.
 
+    The getValue and setValue methods are those of the Parameter at the end
+    of a chain of proxies, which is resolved when par is set. Other attributes
+    are looked up in par.
+
     Attributes
     name    --  A name for this ParameterProxy. Names should be unique within a
                 RecipeOrganizer and should be valid attribute names.
     par     --  The Parameter this is a proxy for.
+    getValue    --  The getValue method of the Parameter at the end of the
+                chain.
+    setValue    --  The setValue method of the Parameter at the end of the
+                chain.
+    _referrers  --  List of weak references to the ParameterProxy objects
+                that are proxies for this one, or None. Their accessors are
+                resolved again when par changes.
 
     """
 
+    # The instance dictionary holds attributes set on the proxy, such as
+    # bounds, which hide those of par. It is only created when needed.
+    __slots__ = ("name", "_par", "getValue", "setValue", "_referrers",
+            "__dict__", "__weakref__")
 
     def __init__(self, name, par):
         """Initialization.
@@ -162,14 +186,55 @@ class ParameterProxy(_parameter_interface, Validatable):
         validateName(name)
 
         self.name = name
+        self._par = self._referrers = None
         self.par = par
         return
 
     def __getattr__(self, attrname):
         """Redirect accessors and attributes to the reference Parameter."""
-        par = object.__getattribute__(self, 'par')
+        par = object.__getattribute__(self, '_par')
         return getattr(par, attrname)
 
+    def _setPar(self, par):
+        """Set par and resolve the accessors of the end of the chain."""
+        old = self._par
+        if isinstance(old, ParameterProxy):
+            old._referrers = [r for r in old._referrers
+                    if r() is not self and r() is not None] or None
+        self._par = par
+        if isinstance(par, ParameterProxy):
+            refs = [r for r in par._referrers or () if r() is not None]
+            refs.append(weakref.ref(self))
+            par._referrers = refs
+        self._resolve()
+        return
+
+    par = property(lambda self: self._par, _setPar,
+            doc = "The Parameter this is a proxy for.")
+
+    def _resolve(self):
+        """Bind the accessors of the Parameter at the end of the chain.
+
+        This updates the proxies of this proxy as well.
+        """
+        par = self._par
+        while isinstance(par, ParameterProxy):
+            par = par._par
+        if par is None:
+            # The accessors are looked up in par and fail.
+            try:
+                del self.getValue, self.setValue
+            except AttributeError:
+                pass
+        else:
+            self.getValue = par.getValue
+            self.setValue = par.setValue
+        for ref in self._referrers or ():
+            proxy = ref()
+            if proxy is not None:
+                proxy._resolve()
+        return
+
 
     # Ensure there is no __dir__ override in the base classes.
     assert (getattr(_parameter_interface, '__dir__', None) is
@@ -180,13 +245,13 @@ class ParameterProxy(_parameter_interface, Validatable):
     def __dir__(self):
         "Return sorted list of attributes for this object."
         rv = set(dir(type(self)))
-        rv.update(self.__dict__, dir(self.par))
+        rv.update(getattr(self, "__dict__", ()), dir(self.par))
         rv = sorted(rv)
         return rv
 
 
-    value = property( lambda self: self.par.getValue(),
-            lambda self, val: self.par.setValue(val) )
+    value = property( lambda self: self.getValue(),
+            lambda self, val: self.setValue(val) )
 
     def __str__(self):
         return "%s(%s)"%(self.__class__.__name__, self.name)
@@ -205,6 +270,25 @@ class ParameterProxy(_parameter_interface, Validatable):
             raise SrFitError("par is None")
         return
 
+    def __getstate__(self):
+        """Get the attributes for pickling.
+
+        The accessors and the referrers are restored from par.
+        """
+        state = _getSlotState(self)
+        for name in ("getValue", "setValue", "_referrers"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        """Restore the attributes from pickling."""
+        state = dict(state)
+        par = state.pop("_par")
+        self._par = self._referrers = None
+        _setSlotState(self, state)
+        self.par = par
+        return
+
 # End class ParameterProxy
 
 # Make sure that this is registered as an Argument class
@@ -216,8 +300,16 @@ class ParameterAdapter(Parameter):
     This class wraps an object as a Parameter. The getValue and setValue
     methods defer to the data of the wrapped object.
 
+    Attributes
+    obj     --  The wrapped object.
+    getter  --  Function that gets the value from obj.
+    setter  --  Function that sets the value of obj.
+    attr    --  The name of the attribute of obj, or None.
+
     """
 
+    __slots__ = ("obj", "getter", "setter", "attr")
+
     def __init__(self, name, obj, getter = None, setter = None, attr = None):
         """Wrap an object as a Parameter.
 
@@ -64,6 +64,16 @@ class Profile(Observable, Validatable):
                 constrained to.
     meta    --  A dictionary of metadata. This is only set if provided by a
                 parser.
+    subset  --  Indices of the calculation points that x, y and dy are
+                restricted to, or None if they are not restricted (see
+                setSubset).
+    _full   --  The unrestricted (x, y, dy) arrays when restricted to a
+                subset, otherwise None.
+    xfull   --  The unrestricted calculation points (read only).
+    yfull   --  The profile over the unrestricted calculation points (read
+                only).
+    dyfull  --  The uncertainty over the unrestricted calculation points
+                (read only).
 
     """
 
@@ -78,6 +88,8 @@ class Profile(Observable, Validatable):
         self.dypar = Parameter("dy")
         self.ycpar = Parameter("ycalc")
         self.meta = {}
+        self.subset = None
+        self._full = None
 
         # Observable
         self.xpar.addObserver(self._flush)
@@ -100,6 +112,14 @@ class Profile(Observable, Validatable):
     yobs = property( lambda self: self._yobs )
     dyobs = property( lambda self: self._dyobs )
 
+    # The unrestricted calculation arrays
+    xfull = property( lambda self: self.x if self._full is None
+            else self._full[0] )
+    yfull = property( lambda self: self.y if self._full is None
+            else self._full[1] )
+    dyfull = property( lambda self: self.dy if self._full is None
+            else self._full[2] )
+
     def loadParsedData(self, parser):
         """Load parsed data from a ProfileParser.
 
@@ -138,11 +158,15 @@ class Profile(Observable, Validatable):
         else:
             self._dyobs = numpy.asarray(dyobs, dtype=float)
 
-        # Set the default calculation points
+        # Set the default calculation points, keeping any subset of them.
+        subset = self.subset
         if self.x is None:
             self.setCalculationPoints(self._xobs)
         else:
-            self.setCalculationPoints(self.x)
+            self.setCalculationPoints(self.xfull)
+        if (subset is not None and len(subset) and
+                subset.max() < len(self.x)):
+            self.setSubset(subset)
 
         return
 
@@ -161,7 +185,8 @@ class Profile(Observable, Validatable):
                     will be preserved.
 
         Note that xmin is always inclusive (unless clipped). xmax is inclusive
-        if it is within the bounds of the observed data.
+        if it is within the bounds of the observed data. This clears any
+        subset of the calculation points.
 
         raises AttributeError if there is no observed profile
         raises ValueError if xmin > xmax
@@ -174,6 +199,7 @@ class Profile(Observable, Validatable):
         if self.xobs is None:
             raise AttributeError("No observed profile")
 
+        self.subset = self._full = None
         if xmin is None and xmax is None and dx is None:
             self.x = self.xobs
             self.y = self.yobs
@@ -222,9 +248,10 @@ class Profile(Observable, Validatable):
                 xobs exists, the bounds of x will be limited to its bounds.
 
         This will create y and dy on the specified grid if xobs, yobs and
-        dyobs exist.
+        dyobs exist. This clears any subset of the calculation points.
 
         """
+        self.subset = self._full = None
         x = numpy.asarray(x)
         if self.xobs is not None:
             x = x[ x >= self.xobs[0] - epsilon ]
@@ -243,6 +270,34 @@ class Profile(Observable, Validatable):
 
         return
 
+    def setSubset(self, indices = None):
+        """Restrict the calculation points to a subset.
+
+        This sets x, y and dy to the values at the selected calculation
+        points. The unrestricted arrays remain available as xfull, yfull and
+        dyfull.
+
+        indices --  Sorted array of indices into the unrestricted calculation
+                    points. Repeated indices select a point more than once,
+                    as in a bootstrap sample. If this is None (default), the
+                    unrestricted calculation points are restored.
+
+        """
+        if self._full is None:
+            if indices is None:
+                return
+            self._full = (self.x, self.y, self.dy)
+        x, y, dy = self._full
+        if indices is None:
+            self.subset = self._full = None
+        else:
+            self.subset = indices = numpy.asarray(indices)
+            x, y, dy = x[indices], y[indices], dy[indices]
+        self.x = x
+        self.y = y
+        self.dy = dy
+        return
+
     def loadtxt(self, *args, **kw):
         """Use numpy.loadtxt to load data.
 
@@ -48,6 +48,7 @@ from numpy import asarray
 from diffpy.srfit.equation.literals.operators import Operator
 from diffpy.srfit.fitbase.parameterset import ParameterSet
 from diffpy.srfit.exceptions import SrFitError
+from diffpy.srfit.fitbase import profiling
 
 
 class ProfileGenerator(Operator, ParameterSet):
@@ -66,6 +67,12 @@ class ProfileGenerator(Operator, ParameterSet):
     eq              --  The Equation object used to wrap this ProfileGenerator.
                         This is set when the ProfileGenerator is added to a
                         FitContribution.
+    pointwise       --  Flag indicating that the profile can be calculated at
+                        any selection of points (class attribute, default
+                        True). If False, the profile is calculated over all
+                        calculation points of a Profile restricted to a subset
+                        (see Profile.setSubset), and the subset is taken from
+                        the result.
     _calculators    --  A managed dictionary of Calculators, indexed by name.
     _constraints    --  A set of constrained Parameters. Constraints can be
                         added using the 'constrain' methods.
@@ -93,6 +100,8 @@ class ProfileGenerator(Operator, ParameterSet):
 
     """
 
+    pointwise = True
+
     def __init__(self, name):
         """Initialize the attributes."""
         ParameterSet.__init__(self, name)
@@ -123,8 +132,18 @@ class ProfileGenerator(Operator, ParameterSet):
         in profile.ycalc. The calculated value is then returned.
 
         """
-        y = self.__call__(self.profile.x)
-        self.profile.ycalc = asarray(y)
+        timers = profiling.active.timers
+        depth = None if timers is None else timers.start(self.name)
+        try:
+            profile = self.profile
+            if self.pointwise or profile.subset is None:
+                y = self.__call__(profile.x)
+            else:
+                y = asarray(self.__call__(profile.xfull))[profile.subset]
+            profile.ycalc = asarray(y)
+        finally:
+            if depth is not None:
+                timers.stop(depth)
         return y
 
     def setProfile(self, profile):
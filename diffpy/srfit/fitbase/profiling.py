@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Timing of the components of the residual calculation.
+
+FitRecipe.residual, FitContribution.residual, ProfileGenerator.operation and
+Calculator.operation start and stop the ComponentTimers stored in the timers
+attribute of the module variable 'active'. This is local to each thread, so
+the timers only record the calculations of the thread that activated them. The
+timers accumulate the wall and CPU time under the dotted path of the running
+component, such as "fit.nickel.pdf". The constraint updates, restraint
+penalties and fit hooks of a recipe are timed as its "constraints",
+"restraints" and "fithooks" components, and the residual equation of a
+contribution as its "residual" component. When active.timers is None, which is
+the default, the components only check it before each timed step.
+
+ProfilingFitHook activates the timers for a refinement and reports them when
+the refinement ends.
+
+"""
+
+__all__ = ["ProfilingFitHook", "ComponentTimers"]
+
+import time
+import threading
+
+from diffpy.srfit.fitbase.fithook import FitHook
+
+class _ActiveTimers(threading.local):
+    """Thread-local holder of the ComponentTimers in use.
+
+    Attributes
+    timers  --  The ComponentTimers used by the residual calculation in the
+                current thread, or None.
+
+    """
+
+    timers = None
+
+# End class _ActiveTimers
+
+# The holder of the ComponentTimers used by the residual calculation.
+active = _ActiveTimers()
+
+class ComponentTimers(object):
+    """Accumulated wall and CPU times of nested components.
+
+    Attributes
+    stats   --  Dictionary of [ncalls, wall, cpu, selfwall, selfcpu] lists
+                indexed by the dotted component path. The self times exclude
+                the time spent in nested components.
+    _stack  --  List of [path, wall0, cpu0, childwall, childcpu] lists of the
+                running components.
+
+    """
+
+    def __init__(self):
+        """Initialize the timers."""
+        self.stats = {}
+        self._stack = []
+        return
+
+    def clear(self):
+        """Clear the accumulated times."""
+        self.stats.clear()
+        del self._stack[:]
+        return
+
+    def start(self, name):
+        """Start timing a component nested in the running one.
+
+        Returns the number of running components before this one, for use
+        with stop.
+        """
+        depth = len(self._stack)
+        path = self._stack[-1][0] + "." + name if depth else name
+        self._stack.append([path, time.time(), time.clock(), 0.0, 0.0])
+        return depth
+
+    def stop(self, depth = None):
+        """Stop timing the innermost running component.
+
+        depth   --  Stop all components nested deeper than this, as returned
+                    by start (default None, stop one component). This
+                    recovers from components that did not stop because of an
+                    exception.
+        """
+        if depth is None:
+            depth = len(self._stack) - 1
+        while len(self._stack) > depth:
+            path, wall0, cpu0, childwall, childcpu = self._stack.pop()
+            wall = time.time() - wall0
+            cpu = time.clock() - cpu0
+            st = self.stats.get(path)
+            if st is None:
+                st = self.stats[path] = [0, 0.0, 0.0, 0.0, 0.0]
+            st[0] += 1
+            st[1] += wall
+            st[2] += cpu
+            st[3] += wall - childwall
+            st[4] += cpu - childcpu
+            if self._stack:
+                self._stack[-1][3] += wall
+                self._stack[-1][4] += cpu
+        return
+
+    def report(self):
+        """Get the accumulated times.
+
+        Returns a list of dictionaries with the keys "path", "ncalls", "wall",
+        "cpu", "selfwall" and "selfcpu", sorted by decreasing self wall time.
+        """
+        keys = ("ncalls", "wall", "cpu", "selfwall", "selfcpu")
+        rows = []
+        for path, st in self.stats.items():
+            row = dict(zip(keys, st))
+            row["path"] = path
+            rows.append(row)
+        rows.sort(key = lambda row: (-row["selfwall"], row["path"]))
+        return rows
+
+    def formatTable(self):
+        """Format the accumulated times as a table sorted by self wall time.
+
+        Returns a string.
+        """
+        rows = self.report()
+        total = sum(row["selfwall"] for row in rows) or 1.0
+        width = max([len(row["path"]) for row in rows] + [9])
+        fmt = "%-*s %8s %10s %10s %10s %6s"
+        lines = [fmt % (width, "component", "ncalls", "wall", "self", "cpu",
+            "%self")]
+        fmt = "%-*s %8i %10.4f %10.4f %10.4f %6.1f"
+        for row in rows:
+            lines.append(fmt % (width, row["path"], row["ncalls"],
+                row["wall"], row["selfwall"], row["cpu"],
+                100.0 * row["selfwall"] / total))
+        return "\n".join(lines)
+
+# End class ComponentTimers
+
+class ProfilingFitHook(FitHook):
+    """FitHook that times the components of the residual calculation.
+
+    The hook activates its ComponentTimers when it is reset by the recipe,
+    that is, before the first residual calculation. The timers stay active
+    until the refinement finishes or the close method is called in the same
+    thread, and record all recipes evaluated by that thread in the meantime.
+    Components evaluated outside of a residual calculation, such as during
+    the validation of a recipe, are recorded under their own names. The times
+    are printed and written to a file when a refinement driven by
+    FitRecipe.optimize ends, or by calling finish explicitly.
+
+    Attributes
+    timers      --  The ComponentTimers.
+    filename    --  Name of the JSON file for the report, or None.
+    verbose     --  Flag for printing the table of times.
+
+    """
+
+    def __init__(self, filename = None, verbose = 1):
+        """Initialize the hook.
+
+        filename    --  Name of the JSON file for the report (default None, do
+                        not write a file).
+        verbose     --  Flag for printing the table of times (default 1).
+        """
+        self.timers = ComponentTimers()
+        self.filename = filename
+        self.verbose = verbose
+        return
+
+    def reset(self, recipe):
+        """Activate the timers in the calling thread."""
+        active.timers = self.timers
+        return
+
+    def finish(self, recipe):
+        """Report the accumulated times and deactivate the timers."""
+        if self.verbose:
+            print self.timers.formatTable()
+        if self.filename is not None:
+            self.write(self.filename)
+        self.close()
+        return
+
+    def write(self, filename):
+        """Write the accumulated times to a JSON file.
+
+        The file holds a list of dictionaries, see ComponentTimers.report.
+        """
+        import json
+        with open(filename, "w") as fp:
+            json.dump(self.timers.report(), fp, indent = 1)
+        return
+
+    def close(self):
+        """Deactivate the timers in the calling thread."""
+        if active.timers is self.timers:
+            active.timers = None
+        return
+
+# End class ProfilingFitHook
+
+# End of file
@@ -55,6 +55,17 @@ class RecipeContainer(Observable, Configurable, Validatable):
     RecipeContainer is configured to manage an OrderedDict of Parameter
     objects.
 
+    Managed objects can be deferred with _deferObject, in which case they are
+    created and added when they are first retrieved. This keeps large
+    hierarchies, such as structures with many atoms, cheap until their parts
+    are used.
+
+    Every RecipeContainer keeps an index of the objects in the hierarchy below
+    it, which is updated as objects are added and removed at any level. This
+    makes _locateManagedObject independent of the size of the hierarchy and
+    gives access to nested objects by their dotted path, as in
+    recipe.get("pdf.phase.Ni0.x").
+
     RecipeContainer is an Observable, and observes its managed objects and
     Parameters. This allows hierarchical calculation elements, such as
     ProfileGenerator, to detect changes in Parameters and Restraints on which
@@ -68,7 +79,20 @@ class RecipeContainer(Observable, Configurable, Validatable):
     __managed       --  A list of managed dictionaries. This is used for
                         attribute access, addition and removal.
     _configobjs     --  A set of configurable objects that must know of
-                        configuration changes within this object.
+                        configuration changes within this object, such as the
+                        RecipeContainers that hold it.
+    _objhosts       --  A dictionary of the objects in the hierarchy below this
+                        one. The value is the name of the managed object that
+                        is or holds the object, or a list of names, in the
+                        order of addition, for an object held at several
+                        places.
+    _allpars        --  Cached tuple of the Parameters in the hierarchy, or
+                        None. See _allPars.
+    _parindex       --  Cached index of _allpars by name, or None.
+    _parqueries     --  Dictionary of the cached results of getPars, indexed
+                        by the pattern, or None before the first query.
+    _deferred       --  Dictionary of the deferred objects, indexed by name,
+                        or None. See _deferObject.
 
     Properties
     names           --  Variable names (read only). See getNames.
@@ -84,6 +108,11 @@ class RecipeContainer(Observable, Configurable, Validatable):
         validateName(name)
         self.name = name
         self._parameters = OrderedDict()
+        self._objhosts = {}
+        self._deferred = None
+        self._allpars = None
+        self._parindex = None
+        self._parqueries = None
 
         self.__managed = []
         self._manage(self._parameters)
@@ -107,25 +136,111 @@ class RecipeContainer(Observable, Configurable, Validatable):
         """Iterate over Parameters.
 
         name    --  Select parameters with this name (regular expression,
-                    default ".").
+                    default "."). The name is matched from its start, as with
+                    re.match.
         recurse --  Recurse into managed objects (default True)
         """
-        for par in self._parameters.itervalues():
-            if re.match(name, par.name):
-                yield par
+        if recurse:
+            return iter(self.getPars(name))
+        kind, arg = _parsePattern(name)
+        if kind == "all":
+            return self._parameters.itervalues()
+        test = _nameTests[kind](arg)
+        return (par for par in self._parameters.itervalues()
+                if test(par.name))
+
+    def getPars(self, name = "."):
+        """Get the Parameters in the hierarchy with a matching name.
+
+        The names of the Parameters below this container are indexed. Exact
+        names, such as "U11$", are looked up, and plain prefixes, such as
+        "U11", and suffixes, such as ".*11$", are compared to the distinct
+        names only. Other regular expressions are matched against the
+        distinct names. The result is cached until objects are added to or
+        removed from the hierarchy below this container.
 
-        if not recurse:
-            return
+        name    --  Select parameters with this name (regular expression,
+                    default "."). The name is matched from its start, as with
+                    re.match.
+
+        Deferred objects in the hierarchy are created first.
+
+        Returns a tuple of Parameters in the order of iterPars.
+        """
+        if self._parqueries is not None:
+            pars = self._parqueries.get(name)
+            if pars is not None:
+                return pars
+        self._createDeferred(recurse = True)
+        if self._parqueries is None:
+            self._parqueries = {}
+        kind, arg = _parsePattern(name)
+        if kind == "all":
+            pars = self._allPars()
+        else:
+            index = self._parIndex()
+            if kind == "exact":
+                items = index.get(arg, ())
+            else:
+                test = _nameTests[kind](arg)
+                matched = [n for n in index if test(n)]
+                if len(matched) == 1:
+                    items = index[matched[0]]
+                else:
+                    items = sorted(chain(*(index[n] for n in matched)))
+            pars = tuple(par for pos, par in items)
+        if len(self._parqueries) >= _maxqueries:
+            self._parqueries.clear()
+        self._parqueries[name] = pars
+        return pars
+
+    def _allPars(self):
+        """Get all Parameters in the hierarchy in the order of iterPars.
+
+        This does not create deferred objects.
+
+        Returns a cached tuple.
+        """
+        if self._allpars is None:
+            pars = list(self._parameters.itervalues())
+            for m in self.__managed:
+                if m is self._parameters:
+                    continue
+                for obj in m.values():
+                    if isinstance(obj, RecipeContainer):
+                        pars.extend(obj._allPars())
+                    elif hasattr(obj, "iterPars"):
+                        pars.extend(obj.iterPars())
+            self._allpars = tuple(pars)
+        return self._allpars
+
+    def _parIndex(self):
+        """Get the index of the Parameters in the hierarchy by name.
+
+        Returns a dictionary of lists of (position, Parameter) pairs, where
+        position is the place of the Parameter in _allPars.
+        """
+        if self._parindex is None:
+            index = {}
+            for item in enumerate(self._allPars()):
+                index.setdefault(item[1].name, []).append(item)
+            self._parindex = index
+        return self._parindex
 
-        # Iterate over objects within the managed dictionaries.
-        managed = self.__managed[:]
-        managed.remove(self._parameters)
-        for m in managed:
-            for obj in m.values():
-                if hasattr(obj, "iterPars"):
-                    for par in obj.iterPars(name = name):
-                        yield par
+    def _resetParCache(self, recurse = False):
+        """Clear the cached Parameter queries of this container.
 
+        recurse --  Clear the queries of the containers above as well
+                    (default False).
+        """
+        # The other caches are only filled along with _allpars.
+        if self._allpars is not None:
+            self._allpars = None
+            self._parindex = None
+            self._parqueries = None
+        if recurse:
+            for holder in self._holders():
+                holder._resetParCache(True)
         return
 
     def __iter__(self):
@@ -161,6 +276,7 @@ class RecipeContainer(Observable, Configurable, Validatable):
         # self.get fetches looks up for items in all managed dictionaries.
         # Add keys from each dictionary in self.__managed.
         rv.update(*self.__managed)
+        rv.update(self._deferred or ())
         rv = sorted(rv)
         return rv
 
@@ -168,6 +284,7 @@ class RecipeContainer(Observable, Configurable, Validatable):
     # Needed by __setattr__
     _parameters = {}
     __managed = {}
+    _deferred = None
 
     def __setattr__(self, name, value):
         """Parameter access and object checking."""
@@ -205,11 +322,26 @@ class RecipeContainer(Observable, Configurable, Validatable):
         return
 
     def get(self, name, default = None):
-        """Get a managed object."""
+        """Get a managed object.
+
+        name    --  The name of the object, or the dotted path of names of an
+                    object further down the hierarchy, such as "phase.Ni0.x".
+        default --  The value returned if there is no such object (default
+                    None).
+        """
+        if "." in name:
+            obj = self
+            for part in name.split("."):
+                if not isinstance(obj, RecipeContainer):
+                    return default
+                obj = obj.get(part)
+            return default if obj is None else obj
         for d in self.__managed:
             arg = d.get(name)
             if arg is not None:
                 return arg
+        if self._deferred and name in self._deferred:
+            return self._createObject(name)
 
         return default
 
@@ -255,15 +387,20 @@ class RecipeContainer(Observable, Configurable, Validatable):
         # Detach the old object, if there is one
         if oldobj is not None:
             oldobj.removeObserver(self._flush)
+            if isinstance(oldobj, Configurable):
+                oldobj._removeConfigurable(self)
+            self._unindexObjects(oldobj.name, _indexedObjects(oldobj))
 
         # Add the object
         d[obj.name] = obj
+        self._indexObjects(obj.name, _indexedObjects(obj))
 
         # Observe the object
         obj.addObserver(self._flush)
 
-        # Store this as a configurable object
-        self._storeConfigurable(obj)
+        # Pass the configuration changes of the object up to this one
+        if isinstance(obj, Configurable):
+            obj._storeConfigurable(self)
         return
 
     def _removeObject(self, obj, d):
@@ -277,9 +414,109 @@ class RecipeContainer(Observable, Configurable, Validatable):
 
         del d[obj.name]
         obj.removeObserver(self._flush)
+        if isinstance(obj, Configurable):
+            obj._removeConfigurable(self)
+        self._unindexObjects(obj.name, _indexedObjects(obj))
 
         return
 
+    def _deferObject(self, name, d, factory, *args):
+        """Add an object to a managed dictionary when it is first needed.
+
+        The object is created as factory(*args) and added with _addObject when
+        it is retrieved with get or as an attribute, or when Parameters are
+        retrieved with iterPars or getPars from this or a containing object.
+        Until then the object is not part of the hierarchy.
+
+        name    --  The name of the object.
+        d       --  The managed dictionary to store the object in.
+        factory --  Callable that creates the object.
+        args    --  Arguments for factory.
+
+        Raises ValueError if an object of the given name already exists.
+        """
+        deferred = self._deferred or {}
+        if name in deferred or self.get(name) is not None:
+            message = "Object with name '%s' already exists" % name
+            raise ValueError(message)
+        if self._deferred is None:
+            self._deferred = {}
+        self._deferred[name] = (d, factory, args)
+        # Queries of the containers above must create the object.
+        self._resetParCache(recurse = True)
+        return
+
+    def _createObject(self, name):
+        """Create and add a deferred object.
+
+        Returns the object.
+        """
+        d, factory, args = self._deferred.pop(name)
+        obj = factory(*args)
+        self._addObject(obj, d)
+        return obj
+
+    def _createDeferred(self, recurse = False):
+        """Create and add all deferred objects.
+
+        recurse --  Create the deferred objects of the managed objects as well
+                    (default False).
+        """
+        while self._deferred:
+            for name in self._deferred.keys():
+                if name in self._deferred:
+                    self._createObject(name)
+        if recurse:
+            for m in self._iterManaged():
+                if isinstance(m, RecipeContainer):
+                    m._createDeferred(True)
+        return
+
+    def _indexObjects(self, name, objs):
+        """Add objects to the index of this and the containing objects.
+
+        name    --  The name of the managed object that is or holds the
+                    objects.
+        objs    --  The list of objects.
+        """
+        hosts = self._objhosts
+        for obj in objs:
+            host = hosts.get(obj)
+            if host is None:
+                hosts[obj] = name
+            elif isinstance(host, list):
+                host.append(name)
+            else:
+                hosts[obj] = [host, name]
+        self._resetParCache()
+        for holder in self._holders():
+            holder._indexObjects(self.name, objs)
+        return
+
+    def _unindexObjects(self, name, objs):
+        """Remove objects from the index of this and the containing objects.
+
+        name, objs  --  See _indexObjects.
+        """
+        hosts = self._objhosts
+        for obj in objs:
+            host = hosts.get(obj)
+            if isinstance(host, list):
+                host.remove(name)
+                if len(host) == 1:
+                    hosts[obj] = host[0]
+            elif host is not None:
+                del hosts[obj]
+        self._resetParCache()
+        for holder in self._holders():
+            holder._unindexObjects(self.name, objs)
+        return
+
+    def _holders(self):
+        """Get the RecipeContainers that hold this one."""
+        return [c for c in self._configobjs if isinstance(c, RecipeContainer)
+                and c.get(self.name) is self]
+
     def _locateManagedObject(self, obj):
         """Find the location a managed object within the hierarchy.
 
@@ -296,21 +533,17 @@ class RecipeContainer(Observable, Configurable, Validatable):
         if obj is self:
             return loc
 
-        for m in self._iterManaged():
-
-            # Check locally for the object
-            if m is obj:
-                loc.append(obj)
-                return loc
-
-            # Check within managed objects
-            if hasattr(m, "_locateManagedObject"):
-
-                subloc = m._locateManagedObject(obj)
-                if subloc:
-                    return loc + subloc
-
-        return []
+        # Follow the first host of obj down the hierarchy.
+        m = self
+        while m is not obj:
+            host = m._objhosts.get(obj)
+            if host is None:
+                return []
+            if isinstance(host, list):
+                host = host[0]
+            m = m.get(host)
+            loc.append(m)
+        return loc
 
     def _flush(self, other):
         """Invalidate cached state.
@@ -335,6 +568,66 @@ class RecipeContainer(Observable, Configurable, Validatable):
 
 # End class RecipeContainer
 
+def _indexedObjects(obj):
+    """Get a managed object and the objects in the hierarchy below it.
+
+    Returns a list with an entry for every place an object is held at.
+    """
+    objs = [obj]
+    if isinstance(obj, RecipeContainer):
+        for o, host in obj._objhosts.iteritems():
+            objs.extend([o] * len(host) if isinstance(host, list) else [o])
+    return objs
+
+# Maximum number of cached getPars results of a container
+_maxqueries = 256
+
+# Characters that make a name pattern more than a plain name
+_metachars = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+# Name tests of the kinds of patterns, see _parsePattern
+_nameTests = {
+    "exact" : lambda arg: lambda n: n == arg,
+    "prefix" : lambda arg: lambda n: n.startswith(arg),
+    "suffix" : lambda arg: lambda n: n.endswith(arg),
+    "contains" : lambda arg: lambda n: arg in n,
+    "regex" : lambda arg: arg,
+    }
+
+_patterns = {}
+
+def _parsePattern(pattern):
+    """Classify a name pattern of iterPars.
+
+    Returns a (kind, arg) pair. The kind is "all" for a pattern that matches
+    any name, "exact" for a plain name followed by "$", "prefix" for a plain
+    name, "suffix" for ".*" and a plain name followed by "$", "contains" for
+    ".*" and a plain name, and "regex" for other patterns, whose arg is the
+    match method of the compiled pattern. For the other kinds arg is the
+    plain name. Results are cached.
+    """
+    rv = _patterns.get(pattern)
+    if rv is not None:
+        return rv
+    body = pattern
+    kind = "prefix"
+    if body.startswith(".*"):
+        body = body[2:]
+        kind = "contains"
+    if body.endswith("$"):
+        body = body[:-1]
+        kind = "suffix" if kind == "contains" else "exact"
+    if pattern in ("", ".", ".*"):
+        rv = ("all", None)
+    elif body and not _metachars.search(body):
+        rv = (kind, body)
+    else:
+        rv = ("regex", re.compile(pattern).match)
+    if len(_patterns) >= _maxqueries:
+        _patterns.clear()
+    _patterns[pattern] = rv
+    return rv
+
 class RecipeOrganizer(_recipeorganizer_interface, RecipeContainer):
     """Extended base class for organizing pieces of a FitRecipe.
 
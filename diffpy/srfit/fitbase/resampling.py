@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Bootstrap and jackknife uncertainties of a FitRecipe.
+
+The resampleRecipe function refines a FitRecipe against resampled versions of
+its profiles. A replicate restricts the calculation points of each Profile to
+a set of indices (see Profile.setSubset), so the observed arrays are never
+copied. The bootstrap draws the points, or blocks of consecutive points for
+correlated data such as a PDF, with replacement. The jackknife splits each
+profile into groups of points, or of blocks of points, and leaves out one
+group per replicate. Each replicate is refined with optimizeRecipe, starting
+from the current variable values, optionally in a pool of worker processes.
+
+ResamplingResults holds the refined values of the replicates and can replace
+the linearized uncertainties of FitResults with the resampling estimates.
+
+"""
+
+__all__ = ["resampleRecipe", "ResamplingResults", "bootstrapIndices",
+        "jackknifeIndices"]
+
+import numpy
+
+from diffpy.srfit.fitbase.fitoptimizer import (optimizeRecipe, _countWorkers,
+        _makePool)
+from diffpy.srfit.fitbase import fitoptimizer
+
+class ResamplingResults(object):
+    """Refined variables of the resampled replicates of a recipe.
+
+    Attributes
+    names   --  Names of the refined variables.
+    method  --  The resampling method, "bootstrap" or "jackknife".
+    x0      --  Variable values refined against the full profiles.
+    samples --  Array of the refined values with one row per replicate.
+    costs   --  Array of the scalar residual of each replicate.
+
+    """
+
+    def __init__(self, names, method, x0, samples, costs):
+        """Initialize the attributes. See the class documentation."""
+        self.names = list(names)
+        self.method = method
+        self.x0 = numpy.asarray(x0, dtype=float)
+        self.samples = numpy.asarray(samples, dtype=float)
+        self.costs = numpy.asarray(costs, dtype=float)
+        return
+
+    nreplicates = property(lambda self: len(self.samples),
+            doc = "The number of replicates.")
+
+    def mean(self):
+        """Get the mean of the replicate values."""
+        return self.samples.mean(axis = 0)
+
+    def bias(self):
+        """Get the estimated bias of the full-profile values."""
+        bias = self.mean() - self.x0
+        if self.method == "jackknife":
+            bias *= self.nreplicates - 1
+        return bias
+
+    def cov(self):
+        """Get the covariance matrix of the variables."""
+        return _spread(self.samples, self.method)
+
+    def std(self):
+        """Get the standard uncertainties of the variables."""
+        return numpy.sqrt(numpy.diag(self.cov()))
+
+    def percentiles(self, q = (2.5, 50, 97.5)):
+        """Get percentiles of the bootstrap distribution of each variable.
+
+        Returns an array with one row per percentile in q.
+        """
+        return numpy.percentile(self.samples, q, axis = 0)
+
+    def updateResults(self, results):
+        """Replace the uncertainties of FitResults with resampling estimates.
+
+        This sets the covariance and the variable uncertainties, and the
+        uncertainties of the constrained parameters from their values for the
+        refined values of each replicate. The variable values and the fit
+        metrics of the results are kept and the recipe is left at the
+        variable values of the results.
+
+        results --  The FitResults of the recipe that was resampled.
+
+        Raises ValueError if the variables of the results are not those that
+        were refined.
+        """
+        if list(results.varnames) != self.names:
+            raise ValueError("The results are for other variables")
+        recipe = results.recipe
+        convals = []
+        for x in self.samples:
+            recipe._applyValues(x)
+            recipe._updateConstraints()
+            convals.append([con.par.getValue() for con in
+                recipe._oconstraints])
+        recipe.residual(results.varvals)
+        results.cov = self.cov()
+        results.varunc = list(self.std())
+        results.conunc = []
+        for vals in zip(*convals):
+            if numpy.isscalar(vals[0]):
+                vals = numpy.array(vals, dtype=float)[:, None]
+                results.conunc.append(_spread(vals, self.method)[0, 0]**0.5)
+            else:
+                results.conunc.append(0.0)
+        msg = "Uncertainties from %i %s replicates" % (self.nreplicates,
+                self.method)
+        results.messages.append(msg)
+        return
+
+    def __str__(self):
+        lines = ["%s: %i %s replicates" % (self.__class__.__name__,
+            self.nreplicates, self.method)]
+        for item in zip(self.names, self.x0, self.std()):
+            lines.append("  %s = %g +/- %g" % item)
+        return "\n".join(lines)
+
+# End class ResamplingResults
+
+def bootstrapIndices(npoints, blocksize = 1, rs = numpy.random):
+    """Draw bootstrap indices of profile points.
+
+    npoints     --  The number of points of the profile.
+    blocksize   --  The length of the blocks of consecutive points that are
+                    drawn with replacement (default 1). The last block is cut
+                    to keep npoints indices.
+    rs          --  The numpy RandomState (default numpy.random).
+
+    Returns a sorted array of npoints indices.
+    """
+    blocksize = max(1, min(int(blocksize), npoints))
+    nblocks = -(-npoints // blocksize)
+    starts = rs.randint(npoints - blocksize + 1, size = nblocks)
+    indices = (starts[:, None] + numpy.arange(blocksize)).ravel()[:npoints]
+    indices.sort()
+    return indices
+
+def jackknifeIndices(npoints, ngroups, group, blocksize = 1):
+    """Get the indices of profile points without one group.
+
+    The points are split in blocks of consecutive points, which are assigned
+    to the groups in turn.
+
+    npoints     --  The number of points of the profile.
+    ngroups     --  The number of groups.
+    group       --  The index of the left-out group.
+    blocksize   --  The length of the blocks (default 1).
+
+    Returns a sorted array of indices.
+    """
+    blocks = numpy.arange(npoints) // max(1, int(blocksize))
+    return numpy.flatnonzero(blocks % ngroups != group)
+
+def resampleRecipe(recipe, nreplicates = 100, method = "bootstrap",
+        blocksize = 1, workers = 1, seed = None, **kw):
+    """Estimate uncertainties by refining resampled profiles.
+
+    The profiles of all FitContributions are resampled for each replicate.
+    The replicates are refined with optimizeRecipe, starting from the current
+    values of the variables, which should be refined against the full
+    profiles. The recipe is left at these values.
+
+    recipe  --  The FitRecipe.
+    nreplicates --  The number of replicates (default 100). For the jackknife
+                this is the number of groups each profile is split in.
+    method  --  "bootstrap" (default) or "jackknife".
+    blocksize   --  The length of the blocks of consecutive points that the
+                bootstrap draws or that form the jackknife groups (default
+                1). Blocks longer than the correlation length of the data
+                keep the correlations.
+    workers --  The number of worker processes for the replicates (default
+                1). If this is -1, one worker is used per CPU. Each worker
+                holds a copy of the recipe, see fitoptimizer._makePool.
+    seed    --  Seed of the bootstrap (default None).
+    kw      --  Keyword arguments for optimizeRecipe.
+
+    Returns a ResamplingResults instance.
+
+    Raises ValueError if method is unknown or there are fewer than 2
+    replicates.
+    """
+    if method not in ("bootstrap", "jackknife"):
+        raise ValueError("Unknown resampling method '%s'" % method)
+    if nreplicates < 2:
+        raise ValueError("At least 2 replicates are needed")
+    recipe._prepare()
+    names = recipe.getNames()
+    x0 = numpy.asarray(recipe.getValues(), dtype=float)
+
+    # Suspend any sampling of the profiles by the recipe.
+    with recipe._fullProfiles():
+        sizes = [len(p.x) for p in _profiles(recipe)]
+        rs = numpy.random.RandomState(seed)
+        if method == "bootstrap":
+            jobs = [([bootstrapIndices(n, blocksize, rs) for n in sizes], x0,
+                kw) for i in range(nreplicates)]
+        else:
+            jobs = [([jackknifeIndices(n, nreplicates, i, blocksize)
+                for n in sizes], x0, kw) for i in range(nreplicates)]
+
+        workers = _countWorkers(workers)
+        if workers > 1:
+            pool = _makePool(recipe, workers)
+            try:
+                outcomes = pool.map(_workerRefine, jobs)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            outcomes = [_refineReplicate(recipe, job) for job in jobs]
+            recipe.residual(x0)
+
+    samples = [x for x, cost in outcomes]
+    costs = [cost for x, cost in outcomes]
+    return ResamplingResults(names, method, x0, samples, costs)
+
+def _spread(samples, method):
+    """Get the covariance of replicate values.
+
+    The jackknife covariance is scaled up by the number of replicates.
+    """
+    n = len(samples)
+    dev = samples - samples.mean(axis = 0)
+    if method == "jackknife":
+        return (n - 1.0) / n * numpy.dot(dev.T, dev)
+    return numpy.dot(dev.T, dev) / (n - 1.0)
+
+def _profiles(recipe):
+    """Get the profiles of the FitContributions of a recipe."""
+    return [con.profile for con in recipe._contributions.values()]
+
+def _refineReplicate(recipe, job):
+    """Refine the recipe against one replicate of its profiles.
+
+    Returns the refined values and the cost.
+    """
+    subsets, x0, kw = job
+    profiles = _profiles(recipe)
+    try:
+        for profile, indices in zip(profiles, subsets):
+            profile.setSubset(indices)
+        recipe._applyValues(x0)
+        res = optimizeRecipe(recipe, **kw)
+    finally:
+        for profile in profiles:
+            profile.setSubset(None)
+    return res.x, res.cost
+
+def _workerRefine(job):
+    """Refine the worker recipe against one replicate."""
+    return _refineReplicate(fitoptimizer._workerrecipe, job)
+
+# End of file
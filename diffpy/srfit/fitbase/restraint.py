@@ -23,11 +23,18 @@ equation calculated by a FitRecipe.
 
 __all__ = ["Restraint"]
 
+from itertools import count
+
 from numpy import inf
 
 from diffpy.srfit.fitbase.validatable import Validatable
 from diffpy.srfit.exceptions import SrFitError
 
+# Serial numbers for ordering the restraints of a FitRecipe.
+_serials = count()
+
+# Attributes of a Restraint that are tabulated by RestraintTable.
+_penaltyattrs = frozenset(("lb", "ub", "sig", "scaled"))
 
 class Restraint(Validatable):
     """Restraint class.
@@ -47,8 +54,14 @@ class Restraint(Validatable):
     and val is the value of the calculated equation.  This is multipled by the
     average chi^2 if scaled is True.
 
+    The class attribute _version counts the assignments to lb, ub, sig and
+    scaled of all Restraints, so a RestraintTable can tell when to update its
+    copies of them.
+
     """
 
+    _version = 0
+
     def __init__(self, eq, lb = -inf, ub = inf, sig = 1, scaled = False):
         """Restrain an equation to specified bounds.
 
@@ -69,6 +82,14 @@ class Restraint(Validatable):
         self.ub = float(ub)
         self.sig = float(sig)
         self.scaled = bool(scaled)
+        self._serial = next(_serials)
+        return
+
+    def __setattr__(self, name, value):
+        """Set an attribute and count the changes of the penalty settings."""
+        if name in _penaltyattrs:
+            Restraint._version += 1
+        object.__setattr__(self, name, value)
         return
 
     def penalty(self, w = 1.0):
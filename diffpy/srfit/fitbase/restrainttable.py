@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Vectorized evaluation of restraint penalties.
+
+A FitRecipe collects the restraints of its hierarchy into a RestraintTable.
+The table stores the bounds, uncertainties and scaling flags of plain
+Restraint instances with scalar equations in arrays and computes all their
+penalties with array operations. The arrays are updated when these attributes
+of any Restraint have been changed. Other restraints, such as BVSRestraint or the
+pyobjcryst molecule restraints, have their own penalty method, which the table
+calls for each of them.
+
+"""
+
+__all__ = ["RestraintTable", "orderRestraints"]
+
+import numpy
+
+from diffpy.srfit.fitbase.restraint import Restraint, _serials
+
+def orderRestraints(restraints):
+    """Sort restraints in a reproducible order.
+
+    Restraint instances are ordered by creation. Other restraints are ordered
+    by the first time they are passed to this function.
+
+    Returns a new list.
+    """
+    def _key(res):
+        serial = getattr(res, "_serial", None)
+        if serial is None:
+            serial = res._serial = next(_serials)
+        return serial
+    return sorted(restraints, key = _key)
+
+class RestraintTable(object):
+    """Penalties of a list of restraints.
+
+    Attributes
+    restraints  --  The restraints in the order of the penalty vector, the
+                    tabulated ones first.
+    ntab        --  The number of tabulated restraints.
+    lb          --  Array of lower bounds of the tabulated restraints.
+    ub          --  Array of upper bounds of the tabulated restraints.
+    sig         --  Array of uncertainties of the tabulated restraints.
+    scaled      --  Boolean array of the scaled flags of the tabulated
+                    restraints.
+    _values     --  Methods that return the equation values of the tabulated
+                    restraints.
+    _opaque     --  List of the other restraints.
+    _version    --  The value of Restraint._version when the arrays were
+                    made.
+
+    """
+
+    def __init__(self, restraints):
+        """Tabulate restraints.
+
+        restraints  --  Sequence of restraints in the order of the tabulated
+                        and of the other restraints in the penalty vector.
+                        The equations of the Restraint instances are
+                        evaluated to check that they are scalars.
+        """
+        tab = []
+        opaque = []
+        for res in restraints:
+            if type(res) is Restraint and numpy.ndim(res.eq()) == 0:
+                tab.append(res)
+            else:
+                opaque.append(res)
+        self.restraints = tab + opaque
+        self.ntab = len(tab)
+        # Evaluate the root of an Equation directly, like Equation.__call__
+        # does without arguments.
+        self._values = [res.eq.root.getValue if hasattr(res.eq, "root")
+                else res.eq for res in tab]
+        self._opaque = opaque
+        self._tabulate()
+        return
+
+    def _tabulate(self):
+        """Copy the penalty settings of the tabulated restraints to arrays."""
+        tab = self.restraints[:self.ntab]
+        self._version = Restraint._version
+        self.lb = numpy.array([res.lb for res in tab], dtype=float)
+        self.ub = numpy.array([res.ub for res in tab], dtype=float)
+        self.sig = numpy.array([res.sig for res in tab], dtype=float)
+        self.scaled = numpy.array([res.scaled for res in tab], dtype=bool)
+        return
+
+    def __len__(self):
+        return len(self.restraints)
+
+    def penalties(self, w = 1.0, timers = None):
+        """Calculate the square roots of the penalties.
+
+        w       --  The point-average chi^2 which is used to scale the
+                    penalties of scaled restraints (default 1.0).
+        timers  --  ComponentTimers for timing the tabulated restraints and
+                    each of the others by class name (default None).
+
+        Returns an array with the square root of the penalty of each
+        restraint, see Restraint.penalty.
+        """
+        out = numpy.empty(len(self.restraints), dtype=float)
+        if self._version != Restraint._version:
+            self._tabulate()
+        if self.ntab:
+            if timers is not None:
+                timers.start("table")
+            val = numpy.array([f() for f in self._values], dtype=float)
+            pen = numpy.maximum(0, numpy.maximum(self.lb - val,
+                val - self.ub)) / self.sig
+            pen **= 2
+            pen[self.scaled] *= w
+            numpy.sqrt(pen, out[:self.ntab])
+            if timers is not None:
+                timers.stop()
+        for i, res in enumerate(self._opaque):
+            if timers is not None:
+                timers.start(res.__class__.__name__)
+            out[self.ntab + i] = numpy.sqrt(res.penalty(w))
+            if timers is not None:
+                timers.stop()
+        return out
+
+# End class RestraintTable
+
+# End of file
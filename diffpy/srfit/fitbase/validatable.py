@@ -28,6 +28,8 @@ class Validatable(object):
 
     """
 
+    __slots__ = ()
+
     def _validateOthers(self, iterable):
         """Method to validate configuration of Validatables in iterable.
 
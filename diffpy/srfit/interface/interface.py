@@ -28,6 +28,8 @@ from diffpy.srfit.equation.literals.abcs import isinstance, ArgumentABC
 class ParameterInterface(object):
     """Mix-in class for enhancing the Parameter interface."""
 
+    __slots__ = ()
+
     def __lshift__(self, v):
         """setValue with <<
 
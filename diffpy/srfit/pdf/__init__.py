@@ -20,9 +20,13 @@
 
 __all__ = ["PDFGenerator", "DebyePDFGenerator", "PDFContribution", "PDFParser"]
 
-from diffpy.srfit.pdf.pdfgenerator import PDFGenerator
-from diffpy.srfit.pdf.debyepdfgenerator import DebyePDFGenerator
-from diffpy.srfit.pdf.pdfcontribution import PDFContribution
-from diffpy.srfit.pdf.pdfparser import PDFParser
+# The generators need diffpy.srreal, which is imported on their first use.
+from diffpy.srfit.util.lazyimport import lazyExport
+lazyExport(__name__, {
+    "PDFGenerator" : "diffpy.srfit.pdf.pdfgenerator",
+    "DebyePDFGenerator" : "diffpy.srfit.pdf.debyepdfgenerator",
+    "PDFContribution" : "diffpy.srfit.pdf.pdfcontribution",
+    "PDFParser" : "diffpy.srfit.pdf.pdfparser",
+    })
 
 # End of file
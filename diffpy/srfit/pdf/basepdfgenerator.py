@@ -47,6 +47,7 @@ class BasePDFGenerator(ProfileGenerator):
     _lastr  --  The last value of r over which the PDF was calculated. This is
                 used to configure the calculator when r changes.
     _pool   --  A multiprocessing.Pool for managing parallel computation.
+    pointwise   --  False, the PDF is calculated on a uniform r-grid.
 
     Managed Parameters:
     scale   --  Scale factor
@@ -74,6 +75,8 @@ class BasePDFGenerator(ProfileGenerator):
 
     """
 
+    pointwise = False
+
     def __init__(self, name = "pdf"):
         """Initialize the generator."""
         ProfileGenerator.__init__(self, name)
@@ -199,7 +202,8 @@ class BasePDFGenerator(ProfileGenerator):
         """Get the qmin value."""
         return self._calc.qmin
 
-    def setStructure(self, stru, name = "phase", periodic = True):
+    def setStructure(self, stru, name = "phase", periodic = True,
+            lazy = False):
         """Set the structure that will be used to calculate the PDF.
 
         This creates a DiffpyStructureParSet, ObjCrystCrystalParSet or
@@ -215,11 +219,13 @@ class BasePDFGenerator(ProfileGenerator):
                     True). Note that some structures do not support
                     periodicity, in which case this will have no effect on the
                     PDF calculation.
+        lazy    --  Create the ParameterSets of the atoms when they are first
+                    used (default False). See struToParameterSet.
 
         """
 
         # Create the ParameterSet
-        parset = struToParameterSet(name, stru)
+        parset = struToParameterSet(name, stru, lazy)
 
         # Set the phase
         self.setPhase(parset, periodic)
@@ -33,7 +33,6 @@ from numpy import pi, sqrt, log, exp, log2, ceil, sign
 from numpy import arctan as atan
 from numpy import arctanh as atanh
 from numpy.fft import ifft, fftfreq
-from scipy.special import erf
 
 from diffpy.srfit.fitbase.calculator import Calculator
 
@@ -168,6 +167,8 @@ def lognormalSphericalCF(r, psize, psig):
     if psize <= 0: return numpy.zeros_like(r)
     if psig <= 0: return sphericalCF(r, psize)
 
+    # scipy is slow to import and only needed here.
+    from scipy.special import erf
     erfc = lambda x: 1.0-erf(x)
 
     sqrt2 = sqrt(2.0)
@@ -65,7 +65,8 @@ class DebyePDFGenerator(BasePDFGenerator):
 
     """
 
-    def setStructure(self, stru, name = "phase", periodic = False):
+    def setStructure(self, stru, name = "phase", periodic = False,
+            lazy = False):
         """Set the structure that will be used to calculate the PDF.
 
         This creates a DiffpyStructureParSet, ObjCrystCrystalParSet or
@@ -81,9 +82,12 @@ class DebyePDFGenerator(BasePDFGenerator):
                     False). Note that some structures do not support
                     periodicity, in which case this will have no effect on the
                     PDF calculation.
+        lazy    --  Create the ParameterSets of the atoms when they are first
+                    used (default False). See struToParameterSet.
 
         """
-        return BasePDFGenerator.setStructure(self, stru, name, periodic)
+        return BasePDFGenerator.setStructure(self, stru, name, periodic,
+                lazy)
 
 
     def setPhase(self, parset, periodic = False):
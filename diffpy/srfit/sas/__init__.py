@@ -21,9 +21,13 @@
 __all__ = ["SASGenerator", "SASParser", "SASProfile", "PrCalculator",
 "CFCalculator"]
 
-from sasgenerator import SASGenerator
-from sasparser import SASParser
-from sasprofile import SASProfile
-from prcalculator import PrCalculator, CFCalculator
+from diffpy.srfit.util.lazyimport import lazyExport
+lazyExport(__name__, {
+    "SASGenerator" : "diffpy.srfit.sas.sasgenerator",
+    "SASParser" : "diffpy.srfit.sas.sasparser",
+    "SASProfile" : "diffpy.srfit.sas.sasprofile",
+    "PrCalculator" : "diffpy.srfit.sas.prcalculator",
+    "CFCalculator" : "diffpy.srfit.sas.prcalculator",
+    })
 
 # End of file
@@ -18,7 +18,7 @@ information.
 
 """
 
-def struToParameterSet(name, stru):
+def struToParameterSet(name, stru, lazy = False):
     """Creates a ParameterSet from an structure.
 
     This returns a ParameterSet adapted for the structure depending on its
@@ -26,21 +26,23 @@ def struToParameterSet(name, stru):
 
     stru    --  a structure object known by this module
     name    --  A name to give the structure.
+    lazy    --  Create the ParameterSets of the atoms when they are first used
+                (default False). This is ignored for cctbx structures.
 
     Raises TypeError if stru cannot be adapted
 
     """
     from diffpy.srfit.structure.diffpyparset import DiffpyStructureParSet
     if DiffpyStructureParSet.canAdapt(stru):
-        return DiffpyStructureParSet(name, stru)
+        return DiffpyStructureParSet(name, stru, lazy)
 
     from diffpy.srfit.structure.objcrystparset import ObjCrystCrystalParSet
     if ObjCrystCrystalParSet.canAdapt(stru):
-        return ObjCrystCrystalParSet(name, stru)
+        return ObjCrystCrystalParSet(name, stru, lazy)
 
     from diffpy.srfit.structure.objcrystparset import ObjCrystMoleculeParSet
     if ObjCrystMoleculeParSet.canAdapt(stru):
-        return ObjCrystMoleculeParSet(name, stru)
+        return ObjCrystMoleculeParSet(name, stru, lazy = lazy)
 
     from diffpy.srfit.structure.cctbxparset import CCTBXCrystalParSet
     if CCTBXCrystalParSet.canAdapt(stru):
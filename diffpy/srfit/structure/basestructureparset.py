@@ -63,3 +63,32 @@ class BaseStructureParSet(ParameterSet):
 
         """
         raise NotImplementedError("The must be overloaded")
+
+class _ScattererList(object):
+    """List attribute of the scatterers of a lazy structure adapter.
+
+    On first access the deferred ParameterSets named in the names attribute
+    of the adapter are created and their list is stored as an instance
+    attribute, which then takes the place of this descriptor. The attribute
+    is a plain list from then on, so it can be modified or reassigned.
+    Eager adapters assign the list in their __init__ method.
+
+    Attributes
+    name    --  The name of the list attribute.
+    names   --  The name of the adapter attribute that holds the names of the
+                scatterers in order.
+
+    """
+
+    def __init__(self, name, names):
+        """Initialize the attributes. See the class documentation."""
+        self.name = name
+        self.names = names
+        return
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        value = [obj.get(n) for n in getattr(obj, self.names)]
+        obj.__dict__[self.name] = value
+        return value
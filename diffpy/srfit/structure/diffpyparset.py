@@ -34,26 +34,43 @@ from diffpy.srfit.fitbase.parameter import ParameterProxy
 from diffpy.srfit.fitbase.parameter import ParameterAdapter
 from diffpy.srfit.fitbase.parameterset import ParameterSet
 from diffpy.srfit.structure.srrealparset import SrRealParSet
+from diffpy.srfit.structure.basestructureparset import _ScattererList
 from diffpy.srfit.util.argbinders import bind2nd
 
 # Accessor for xyz of atoms
 class _xyzgetter(object):
 
+    __slots__ = ("i",)
+
     def __init__(self, i):
         self.i = i
 
     def __call__(self, atom):
         return atom.xyz[self.i]
 
+    def __getstate__(self):
+        return self.i
+
+    def __setstate__(self, i):
+        self.i = i
+
 
 class _xyzsetter(object):
 
+    __slots__ = ("i",)
+
     def __init__(self, i):
         self.i = i
 
     def __call__(self, atom, value):
         atom.xyz[self.i] = value
 
+    def __getstate__(self):
+        return self.i
+
+    def __setstate__(self, i):
+        self.i = i
+
 
 class DiffpyAtomParSet(ParameterSet):
     """A wrapper for diffpy.Structure.Atom.
@@ -212,7 +229,10 @@ class DiffpyStructureParSet(SrRealParSet):
 
     Attributes:
     atoms   --  The list of DiffpyAtomParSets, provided for convenience.
+                A lazy adapter makes the list when it is first used.
     stru    --  The diffpy.Structure.Structure this is adapting
+    _atomnames  --  The names of the DiffpyAtomParSets in the order of the
+                atoms in stru.
 
     Managed ParameterSets:
     lattice     --  The managed DiffpyLatticeParSet
@@ -224,17 +244,21 @@ class DiffpyStructureParSet(SrRealParSet):
 
     """
 
-    def __init__(self, name, stru):
+    def __init__(self, name, stru, lazy = False):
         """Initialize
 
         name    --  A name for the structure
         stru    --  A diffpy.Structure.Structure instance
+        lazy    --  If True, a DiffpyAtomParSet is only created when it is
+                    first used, such as by attribute access, getScatterers or
+                    iterPars (default False). This saves time and memory for
+                    large structures of which few atoms are refined.
 
         """
         SrRealParSet.__init__(self, name)
         self.stru = stru
         self.addParameterSet(DiffpyLatticeParSet(stru.lattice))
-        self.atoms = []
+        self._atomnames = []
 
         cdict = {}
         for a in stru:
@@ -245,12 +269,19 @@ class DiffpyStructureParSet(SrRealParSet):
             i = cdict.get(el, 0)
             aname = "%s%i"%(el,i)
             cdict[el] = i+1
-            atom = DiffpyAtomParSet(aname, a)
-            self.addParameterSet(atom)
-            self.atoms.append(atom)
-
+            if lazy:
+                self._deferObject(aname, self._parsets, DiffpyAtomParSet,
+                        aname, a)
+            else:
+                self.addParameterSet(DiffpyAtomParSet(aname, a))
+            self._atomnames.append(aname)
+
+        if not lazy:
+            self.atoms = [self.get(aname) for aname in self._atomnames]
         return
 
+    atoms = _ScattererList("atoms", "_atomnames")
+
     def __repr__(self):
         return repr(self.stru)
 
@@ -272,6 +303,8 @@ class DiffpyStructureParSet(SrRealParSet):
         name and nature of the ADPs (U-factors, B-factors, isotropic,
         anisotropic) depends on the adapted structure.
 
+        This creates the deferred DiffpyAtomParSets of a lazy adapter.
+
         """
         return self.atoms
 
@@ -49,6 +49,7 @@ from diffpy.srfit.fitbase.parameter import Parameter, ParameterAdapter
 from diffpy.srfit.fitbase.parameter import ParameterProxy
 from diffpy.srfit.fitbase.parameterset import ParameterSet
 from diffpy.srfit.structure.srrealparset import SrRealParSet
+from diffpy.srfit.structure.basestructureparset import _ScattererList
 
 class ObjCrystScattererParSet(ParameterSet):
     """A base adaptor for an Objcryst Scatterer.
@@ -175,6 +176,9 @@ class ObjCrystMoleculeParSet(ObjCrystScattererParSet):
     parent      --  The ObjCrystCrystalParSet this belongs to.
                     ObjCrystMoleculeParSets can be used on their own, in which
                     case this is None.
+    atoms       --  The list of ObjCrystMolAtomParSets. A lazy adapter makes
+                    the list when it is first used.
+    _atomnames  --  The names of the MolAtoms in the order of the molecule.
 
     Managed Parameters:
     x, y, z     --  Molecule position in crystal coordinates (ParameterAdapter)
@@ -187,12 +191,15 @@ class ObjCrystMoleculeParSet(ObjCrystScattererParSet):
 
     """
 
-    def __init__(self, name, molecule, parent = None):
+    def __init__(self, name, molecule, parent = None, lazy = False):
         """Initialize
 
         name    --  The name of the scatterer
         molecule    --  The pyobjcryst.Molecule instance
         parent  --  The ObjCrystCrystalParSet this belongs to (default None).
+        lazy    --  If True, an ObjCrystMolAtomParSet is only created when it
+                    is first used, such as by attribute access, getScatterers
+                    or iterPars (default False).
 
         """
         ObjCrystScattererParSet.__init__(self, name, molecule, parent)
@@ -205,8 +212,8 @@ class ObjCrystMoleculeParSet(ObjCrystScattererParSet):
         self.addParameter(ParameterAdapter("q3", self.scat, attr = "Q3"))
 
         # Wrap the MolAtoms within the molecule
-        self.atoms = []
-        anames = []
+        self._atomnames = []
+        anames = set()
 
         for a in molecule:
 
@@ -216,14 +223,20 @@ class ObjCrystMoleculeParSet(ObjCrystScattererParSet):
             if name in anames:
                 raise AttributeError("MolAtom name '%s' is duplicated"%name)
 
-            atom = ObjCrystMolAtomParSet(name, a, self)
-            atom.molecule = self
-            self.addParameterSet(atom)
-            self.atoms.append(atom)
-            anames.append(name)
+            if lazy:
+                self._deferObject(name, self._parsets, _makeMolAtomParSet,
+                        name, a, self)
+            else:
+                self.addParameterSet(_makeMolAtomParSet(name, a, self))
+            self._atomnames.append(name)
+            anames.add(name)
 
+        if not lazy:
+            self.atoms = [self.get(aname) for aname in self._atomnames]
         return
 
+    atoms = _ScattererList("atoms", "_atomnames")
+
     @classmethod
     def canAdapt(self, stru):
         """Return whether the structure can be adapted by this class."""
@@ -277,6 +290,8 @@ class ObjCrystMoleculeParSet(ObjCrystScattererParSet):
         name and nature of the ADPs (U-factors, B-factors, isotropic,
         anisotropic) depends on the adapted structure.
 
+        This creates the deferred ObjCrystMolAtomParSets of a lazy adapter.
+
         """
         return self.atoms
 
@@ -668,6 +683,12 @@ class ObjCrystMolAtomParSet(ObjCrystScattererParSet):
 
 # End class ObjCrystMolAtomParSet
 
+def _makeMolAtomParSet(name, scat, molecule):
+    """Create the ObjCrystMolAtomParSet of a MolAtom of a molecule."""
+    atom = ObjCrystMolAtomParSet(name, scat, molecule)
+    atom.molecule = molecule
+    return atom
+
 class ObjCrystMoleculeRestraint(object):
     """Base class for adapting pyobjcryst Molecule restraints to srfit.
 
@@ -1350,7 +1371,9 @@ class ObjCrystCrystalParSet(SrRealParSet):
     stru        --  The adapted pyobjcryst.Crystal.
     scatterers  --  The list of aggregated ScattererParSets (either
                     ObjCrystAtomParSet or ObjCrystMoleculeParSet), provided for
-                    convenience.
+                    convenience. A lazy adapter makes the list when it is
+                    first used.
+    _scatnames  --  The names of the scatterers in the order of the crystal.
     _sgpars     --  A BaseSpaceGroupParameters object containing free structure
                     Parameters. See the diffpy.srfit.structure.sgconstraints
                     module.
@@ -1368,11 +1391,15 @@ class ObjCrystCrystalParSet(SrRealParSet):
 
     """
 
-    def __init__(self, name, cryst):
+    def __init__(self, name, cryst, lazy = False):
         """Initialize
 
         name    --  A name for this ParameterSet
         cryst   --  An pyobjcryst.Crystal instance.
+        lazy    --  If True, the ParameterSet of a scatterer is only created
+                    when it is first used, such as by attribute access,
+                    getScatterers or iterPars, and so are the atoms of
+                    molecules (default False).
 
         """
         SrRealParSet.__init__(self, name)
@@ -1391,8 +1418,8 @@ class ObjCrystCrystalParSet(SrRealParSet):
 
         # Now we must loop over the scatterers and create parameter sets from
         # them.
-        self.scatterers = []
-        snames = []
+        self._scatnames = []
+        snames = set()
 
         for j in range(self.stru.GetNbScatterer()):
             s = self.stru.GetScatt(j)
@@ -1405,18 +1432,25 @@ class ObjCrystCrystalParSet(SrRealParSet):
             # Now create the proper object
             cname = s.GetClassName()
             if cname == "Atom":
-                parset = ObjCrystAtomParSet(name, s, self)
+                factory, args = ObjCrystAtomParSet, (name, s, self)
             elif cname == "Molecule":
-                parset = ObjCrystMoleculeParSet(name, s, self)
+                factory, args = ObjCrystMoleculeParSet, (name, s, self, lazy)
             else:
                 raise TypeError("Unrecognized scatterer '%s'"%cname)
 
-            self.addParameterSet(parset)
-            self.scatterers.append(parset)
-            snames.append(name)
+            if lazy:
+                self._deferObject(name, self._parsets, factory, *args)
+            else:
+                self.addParameterSet(factory(*args))
+            self._scatnames.append(name)
+            snames.add(name)
 
+        if not lazy:
+            self.scatterers = [self.get(sname) for sname in self._scatnames]
         return
 
+    scatterers = _ScattererList("scatterers", "_scatnames")
+
     def _constrainSpaceGroup(self):
         """Constrain the space group."""
         if self._sgpars is not None:
@@ -1494,6 +1528,8 @@ class ObjCrystCrystalParSet(SrRealParSet):
         name and nature of the ADPs (U-factors, B-factors, isotropic,
         anisotropic) depends on the adapted structure.
 
+        This creates the deferred scatterer ParameterSets of a lazy adapter.
+
         """
         return self.scatterers
 
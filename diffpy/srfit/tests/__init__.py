@@ -31,15 +31,23 @@ def testsuite():
     '''
     import unittest
     modulenames = '''
+        diffpy.srfit.tests.testbatchrefine
         diffpy.srfit.tests.testbuilder
         diffpy.srfit.tests.testcharacteristicfunctions
+        diffpy.srfit.tests.testcheckpoint
         diffpy.srfit.tests.testconstraint
         diffpy.srfit.tests.testcontribution
         diffpy.srfit.tests.testdiffpyparset
         diffpy.srfit.tests.testequation
+        diffpy.srfit.tests.testfithook
         diffpy.srfit.tests.testfitrecipe
+        diffpy.srfit.tests.testfitjobs
         diffpy.srfit.tests.testfitresults
+        diffpy.srfit.tests.testlazyimport
         diffpy.srfit.tests.testliterals
+        diffpy.srfit.tests.testmcmc
+        diffpy.srfit.tests.testmultiresolution
+        diffpy.srfit.tests.testmultistart
         diffpy.srfit.tests.testobjcrystparset
         diffpy.srfit.tests.testordereddict
         diffpy.srfit.tests.testparameter
@@ -47,7 +55,9 @@ def testsuite():
         diffpy.srfit.tests.testpdf
         diffpy.srfit.tests.testprofile
         diffpy.srfit.tests.testprofilegenerator
+        diffpy.srfit.tests.testprofiling
         diffpy.srfit.tests.testrecipeorganizer
+        diffpy.srfit.tests.testresampling
         diffpy.srfit.tests.testrestraint
         diffpy.srfit.tests.testsas
         diffpy.srfit.tests.testsgconstriants
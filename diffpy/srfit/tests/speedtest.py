@@ -428,6 +428,80 @@ def profileTest():
 
     return
 
+def batchUpdateTest(npars = 10000, nsets = 100):
+    """Compare the notification cascade of a bulk assignment with a batch."""
+    from diffpy.srfit.fitbase.parameterset import ParameterSet
+    root = ParameterSet("root")
+    pars = []
+    for i in xrange(nsets):
+        ps = ParameterSet("s%i" % i)
+        for j in xrange(npars // nsets):
+            pars.append(ps.newParameter("p%i" % j, 0.0))
+        root.addParameterSet(ps)
+    calls = []
+    def observer(semaphors):
+        calls.append(semaphors)
+    root.addObserver(observer)
+    values = numpy.random.rand(len(pars))
+
+    def assign():
+        for par, value in zip(pars, values):
+            par.setValue(value)
+
+    def batchassign():
+        with root.batchUpdate():
+            assign()
+
+    values += 1
+    t1 = timeFunction(assign)
+    print "cascade", t1, "ms,", len(calls), "notifications of the root"
+    del calls[:]
+    values += 1
+    t2 = timeFunction(batchassign)
+    print "batch", t2, "ms,", len(calls), "notifications of the root"
+    print "ratio (cascade/batch)", t1/t2
+    return
+
+def proxyTest(nvars = 200, numcalls = 1000):
+    """Time the residual of a recipe whose variables are proxies.
+
+    The variables are proxies of proxies, like the recipe variables of the
+    B21 Parameters of an atom.
+    """
+    from diffpy.srfit.fitbase import FitRecipe, FitContribution, Profile
+    from diffpy.srfit.fitbase.parameter import ParameterProxy
+    profile = Profile()
+    xobs = numpy.arange(0, 1, 0.1)
+    profile.setObservedProfile(xobs, xobs)
+    con = FitContribution("con")
+    con.setProfile(profile)
+    names = ["b%i" % i for i in xrange(nvars)]
+    con.setEquation(" + ".join(names) + " + x")
+    for name in names:
+        con.addParameter(ParameterProxy(name + "p", con.get(name)))
+    recipe = FitRecipe("recipe")
+    recipe.clearFitHooks()
+    recipe.addContribution(con)
+    for name in names:
+        recipe.addVar(con.get(name + "p"), 0.0, name = name)
+    values = numpy.random.rand(numcalls, nvars)
+
+    def residuals():
+        for p in values:
+            recipe.residual(p)
+
+    def accessors():
+        for var in recipe._parameters.values():
+            for i in xrange(numcalls // 10):
+                var.setValue(var.getValue() + 1)
+
+    t1 = timeFunction(residuals)
+    print "residual", t1 / numcalls, "ms per call"
+    t2 = timeFunction(accessors)
+    print "getValue/setValue", t2 / (nvars * numcalls // 10) * 1000, \
+            "us per call"
+    return
+
 
 if __name__ == "__main__":
     for i in range(1, 13):
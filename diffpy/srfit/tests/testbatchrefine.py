@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the batchrefine module."""
+
+import os
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase.batchrefine import batchRefine, loadSource
+from diffpy.srfit.exceptions import SrFitError
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+def _makeRecipe():
+    return _makeFitRecipe("A*exp(-k*x)", [("A", 1), ("k", 0.5)])
+
+def _makeSources(kvalues):
+    x = numpy.linspace(0, 5, 50)
+    return [(x, 2 * numpy.exp(-k * x)) for k in kvalues]
+
+def _exitLoader(recipe, source):
+    """Kill the worker process at the source without data."""
+    if source is None:
+        os._exit(3)
+    loadSource(recipe, source)
+
+def _failLoader(recipe, source):
+    """Raise an error at the source without data."""
+    if source is None:
+        raise ValueError("no data")
+    loadSource(recipe, source)
+
+
+class TestBatchRefine(unittest.TestCase):
+
+    def testSerial(self):
+        """Check a single chain with warm starts."""
+        kvalues = [0.5, 0.6, 0.7, 0.8]
+        sources = _makeSources(kvalues)
+        results = list(batchRefine(_makeRecipe, sources))
+        self.assertEqual(range(4), [r.index for r in results])
+        for r, k in zip(results, kvalues):
+            self.assertAlmostEqual(k, r.values["k"], 6)
+            self.assertAlmostEqual(2, r.values["A"], 6)
+            self.assertTrue(r.source is sources[r.index])
+        return
+
+    def testWarmStart(self):
+        """Check that warm starts need fewer evaluations."""
+        sources = _makeSources([0.9, 0.91, 0.92])
+        warm = list(batchRefine(_makeRecipe, sources))
+        cold = list(batchRefine(_makeRecipe, sources, warmstart = False))
+        self.assertEqual(warm[0].results.nfev, cold[0].results.nfev)
+        self.assertTrue(warm[-1].results.nfev < cold[-1].results.nfev)
+        return
+
+    def testParallel(self):
+        """Check chains refined in worker processes."""
+        kvalues = [0.5, 0.6, 0.7, 0.8, 0.9]
+        sources = _makeSources(kvalues)
+        results = list(batchRefine(_makeRecipe, sources, chains = 2,
+            workers = 2))
+        self.assertEqual(range(5), sorted(r.index for r in results))
+        self.assertEqual([0, 0, 1, 1, 1],
+                [r.chain for r in sorted(results, key = lambda r: r.index)])
+        for r in results:
+            self.assertAlmostEqual(kvalues[r.index], r.values["k"], 6)
+        return
+
+    def testWorkerFailure(self):
+        """Check that failed and dead workers end the refinement."""
+        sources = _makeSources([0.5, 0.6, 0.7]) + [None]
+        results = batchRefine(_makeRecipe, sources, loader = _failLoader,
+                chains = 2, workers = 2)
+        self.assertRaises(ValueError, list, results)
+        results = batchRefine(_makeRecipe, sources, loader = _exitLoader,
+                chains = 2, workers = 2)
+        self.assertRaises(SrFitError, list, results)
+        return
+
+# End of class TestBatchRefine
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the checkpoint module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase import FitRecipe
+from diffpy.srfit.fitbase.checkpoint import (CheckpointFitHook,
+        saveCheckpoint, loadCheckpoint, resumeRecipe)
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+def _makeRecipe():
+    x = numpy.linspace(0, 5, 50)
+    recipe = _makeFitRecipe("A*exp(-k*x)", [("A", 1), ("k", 0.5)],
+            x, 2 * numpy.exp(-0.7 * x))
+    recipe.newVar("B", 3, fixed = True)
+    recipe.newVar("C", 1.0)
+    recipe.constrain(recipe.k, "C/2")
+    return recipe
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "fit.chk")
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        return
+
+    def testSaveLoad(self):
+        """Check writing and reading of a checkpoint."""
+        recipe = _makeRecipe()
+        saveCheckpoint(recipe, self.filename, count = 7)
+        self.assertEqual(["fit.chk"], os.listdir(self.tmpdir))
+        chk = loadCheckpoint(self.filename)
+        self.assertEqual(["A", "k", "B", "C"], chk.names)
+        self.assertEqual([1, 0.5, 3, 1], chk.values.tolist())
+        self.assertEqual([True, False, False, True], chk.free.tolist())
+        self.assertEqual(["recipe.k"], chk.connames)
+        self.assertEqual([0.5], chk.convals.tolist())
+        self.assertEqual(7, chk.count)
+        self.assertTrue(chk.bestx is None)
+        # The file gets the permissions of the umask and can be replaced.
+        umask = os.umask(0o022)
+        try:
+            saveCheckpoint(recipe, self.filename, count = 8)
+        finally:
+            os.umask(umask)
+        self.assertEqual(0o644, os.stat(self.filename).st_mode & 0o777)
+        self.assertEqual(8, loadCheckpoint(self.filename).count)
+        return
+
+    def testHookAndResume(self):
+        """Check checkpoints during a fit and resuming from them."""
+        recipe = _makeRecipe()
+        hook = CheckpointFitHook(self.filename, every = 3, interval = None,
+                maxoverhead = None)
+        recipe.pushFitHook(hook)
+        recipe.optimize()
+        self.assertTrue(hook.nwritten > 0)
+        self.assertEqual(["fit.chk"], os.listdir(self.tmpdir))
+        chk = loadCheckpoint(self.filename)
+        self.assertEqual(["recipe.k"], chk.connames)
+        self.assertEqual([chk.values[3] / 2], chk.convals.tolist())
+
+        recipe2 = _makeRecipe()
+        recipe2.fix("C")
+        hook2 = CheckpointFitHook(self.filename)
+        chk = hook2.resume(recipe2)
+        self.assertEqual(hook2.count, chk.count)
+        self.assertTrue(recipe2.isFree(recipe2.C))
+        self.assertFalse(recipe2.isFree(recipe2.B))
+        self.assertTrue(numpy.array_equal(chk.bestx, recipe2.getValues()))
+        self.assertEqual(recipe2.C.value / 2, recipe2.cont.k.value)
+        self.assertAlmostEqual(chk.bestcost, recipe2.scalarResidual())
+
+        recipe3 = FitRecipe("other")
+        self.assertRaises(ValueError, resumeRecipe, recipe3, self.filename)
+        recipe4 = _makeRecipe()
+        recipe4.unconstrain(recipe4.k)
+        recipe4.constrain(recipe4.k, "C/3")
+        self.assertRaises(ValueError, resumeRecipe, recipe4, self.filename)
+        return
+
+    def testThrottle(self):
+        """Check that writing is throttled by the overhead limit."""
+        recipe = _makeRecipe()
+        hook = CheckpointFitHook(self.filename, every = 1, interval = None,
+                maxoverhead = 1e-6)
+        recipe.pushFitHook(hook)
+        for i in range(5):
+            recipe.residual()
+        self.assertEqual(1, hook.nwritten)
+        self.assertEqual(5, hook.count)
+        return
+
+# End of class TestCheckpoint
+
+if __name__ == '__main__':
+    unittest.main()
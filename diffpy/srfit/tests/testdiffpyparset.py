@@ -107,6 +107,39 @@ class TestParameterAdapter(testoptional(TestCaseStructure)):
         self.assertNotEquals(d, dsstru.lattice.dist(a1.xyz, a2.xyz))
         return
 
+    def testLazyAtoms(self):
+        """Test the deferred creation of the atom ParameterSets."""
+        atoms = [Atom("Ni", xyz = [0.1 * i, 0, 0]) for i in range(4)]
+        dsstru = Structure(atoms, Lattice(3.5, 3.5, 3.5, 90, 90, 90))
+        s = DiffpyStructureParSet("Ni", dsstru, lazy = True)
+        self.assertEquals(["lattice"], s._parsets.keys())
+        self.assertTrue("Ni2" in dir(s))
+
+        # Attribute access creates one atom.
+        self.assertAlmostEquals(0.2, s.Ni2.x.value)
+        self.assertEquals(set(["lattice", "Ni2"]), set(s._parsets))
+        self.assertTrue(s.get("Ni3.y") is s.Ni3.y)
+
+        # The scatterers keep the order of the structure.
+        names = [a.name for a in s.getScatterers()]
+        self.assertEquals(["Ni0", "Ni1", "Ni2", "Ni3"], names)
+        self.assertEquals(names, [a.name for a in s.atoms])
+        self.assertEquals(4, len(s.getPars("Uiso$")))
+
+        # The atoms list is made once and is a plain attribute then.
+        self.assertTrue(s.atoms is s.atoms)
+        self.assertTrue(s.getScatterers() is s.atoms)
+        s.atoms.pop()
+        self.assertEquals(3, len(s.atoms))
+        s.atoms = s.atoms[:1]
+        self.assertEquals(["Ni0"], [a.name for a in s.getScatterers()])
+
+        # Parameter queries create all atoms.
+        s = DiffpyStructureParSet("Ni", dsstru, lazy = True)
+        self.assertEquals(4, len(list(s.iterPars("x$"))))
+        self.assertEquals(5, len(s._parsets))
+        return
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the fithook module."""
+
+import time
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase import FitRecipe, FitContribution, Profile
+from diffpy.srfit.fitbase.fithook import FitHook, PrintFitHook, AsyncFitHook
+
+
+class RecordingHook(FitHook):
+
+    def __init__(self, delay = 0, fail = False):
+        self.delay = delay
+        self.fail = fail
+        self.resets = 0
+        self.calls = []
+        return
+
+    def reset(self, recipe):
+        self.resets += 1
+        return
+
+    def postcall(self, recipe, chiv):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("hook failed")
+        self.calls.append((recipe.count, recipe.getValues()[0],
+            recipe._contributions["cont"].profile.ycalc.copy()))
+        return
+
+
+class TestAsyncFitHook(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe = recipe = FitRecipe("recipe")
+        recipe.clearFitHooks()
+        profile = Profile()
+        x = numpy.linspace(0, 1, 10)
+        profile.setObservedProfile(x, x)
+        contribution = FitContribution("cont")
+        contribution.setProfile(profile)
+        contribution.setEquation("A*x")
+        recipe.addContribution(contribution)
+        recipe.addVar(contribution.A, 1)
+        return
+
+    def testRateLimit(self):
+        """Check that events are made every N calls."""
+        hook = RecordingHook()
+        ahook = AsyncFitHook(hook, every = 3, maxsize = 100)
+        self.recipe.pushFitHook(ahook)
+        for i in range(10):
+            self.recipe.residual([i])
+        ahook.flush()
+        self.assertEqual(1, hook.resets)
+        self.assertEqual([3, 6, 9, 10], [c[0] for c in hook.calls])
+        self.assertEqual([2, 5, 8, 9], [c[1] for c in hook.calls])
+        # The snapshots hold copies of the calculated profile
+        x = self.recipe.cont.profile.x
+        self.assertTrue(numpy.allclose(2 * x, hook.calls[0][2]))
+        return
+
+    def testCoalesce(self):
+        """Check that stale events are replaced with new ones."""
+        hook = RecordingHook(delay = 0.05)
+        ahook = AsyncFitHook(hook)
+        self.recipe.pushFitHook(ahook)
+        for i in range(20):
+            self.recipe.residual([i])
+        ahook.flush()
+        self.assertTrue(ahook.ndropped > 0)
+        self.assertTrue(len(hook.calls) < 20)
+        self.assertEqual(20, hook.calls[-1][0])
+        self.assertEqual(19, hook.calls[-1][1])
+        return
+
+    def testDrop(self):
+        """Check that new events are dropped when the queue is full."""
+        hook = RecordingHook(delay = 0.05)
+        ahook = AsyncFitHook(hook, policy = "drop")
+        self.recipe.pushFitHook(ahook)
+        for i in range(20):
+            self.recipe.residual([i])
+        ahook.flush()
+        self.assertTrue(ahook.ndropped > 0)
+        self.assertEqual(20, hook.calls[-1][0])
+        self.assertRaises(ValueError, AsyncFitHook, hook, policy = "junk")
+        return
+
+    def testReset(self):
+        """Check that resets are not replaced by later calls."""
+        hook = RecordingHook(delay = 0.02)
+        ahook = AsyncFitHook(hook)
+        self.recipe.pushFitHook(ahook)
+        for i in range(5):
+            self.recipe.residual([i])
+        ahook.reset(self.recipe)
+        for i in range(5):
+            self.recipe.residual([i])
+        ahook.flush()
+        self.assertEqual(2, hook.resets)
+        self.assertEqual(4, hook.calls[-1][1])
+        return
+
+    def testErrors(self):
+        """Check that errors of the wrapped hook are raised by flush."""
+        ahook = AsyncFitHook(RecordingHook(fail = True))
+        self.recipe.pushFitHook(ahook)
+        self.recipe.residual()
+        self.assertRaises(RuntimeError, ahook.flush)
+        return
+
+    def testPrintFitHook(self):
+        """Check that PrintFitHook works on snapshots."""
+        hook = PrintFitHook()
+        hook.verbose = 0
+        ahook = AsyncFitHook(hook)
+        self.recipe.pushFitHook(ahook)
+        self.recipe.residual()
+        ahook.flush()
+        self.assertEqual(1, hook.count)
+        return
+
+    def testFinish(self):
+        """Check that finish ends the worker thread."""
+        hook = RecordingHook()
+        ahook = AsyncFitHook(hook, interval = 10)
+        self.recipe.pushFitHook(ahook)
+        self.recipe.residual([1])
+        self.recipe.residual([2])
+        thread = ahook._thread
+        self.assertTrue(thread.isAlive())
+        ahook.finish(self.recipe)
+        self.assertFalse(thread.isAlive())
+        self.assertTrue(ahook._thread is None)
+        self.assertEqual([1, 2], [c[0] for c in hook.calls])
+        # The hook can be used again.
+        self.recipe.residual([3])
+        ahook.flush()
+        self.assertEqual(3, hook.calls[-1][0])
+        thread = ahook._thread
+        ahook.close()
+        self.assertFalse(thread.isAlive())
+        return
+
+# End of class TestAsyncFitHook
+
+if __name__ == '__main__':
+    unittest.main()
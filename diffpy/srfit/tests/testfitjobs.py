@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the fitjobs module."""
+
+import os
+import time
+import threading
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase.fithook import FitHook
+from diffpy.srfit.fitbase.fitjobs import FitJobPool
+from diffpy.srfit.exceptions import SrFitError, FitCancelled
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+def _makeRecipe(name = "recipe"):
+    """Make a recipe for a line."""
+    x = numpy.linspace(0, 10, 50)
+    return _makeFitRecipe("m*x + b", [("m", 1.0), ("b", 0.0)], x, 2 * x + 1,
+            name = name)
+
+
+def _sleep(recipe):
+    """Work that takes a long time."""
+    time.sleep(10)
+    return
+
+def _exit(recipe):
+    """Work that kills its process."""
+    os._exit(3)
+
+
+class _BlockingHook(FitHook):
+    """FitHook that blocks the fit until it is released."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        return
+
+    def precall(self, recipe):
+        self.started.set()
+        self.release.wait(10)
+        return
+
+
+class TestFitJobPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = FitJobPool(workers = 2)
+        return
+
+    def tearDown(self):
+        self.pool.close()
+        return
+
+    def testOptimize(self):
+        """Check optimizations that share the pool."""
+        recipes = [_makeRecipe("r%i" % i) for i in range(4)]
+        finished = []
+        jobs = [self.pool.optimize(r, maxevents = 1000) for r in recipes]
+        for job in jobs:
+            job.addDoneCallback(finished.append)
+        for job, recipe in zip(jobs, recipes):
+            res = job.result(10)
+            self.assertEqual("done", job.state)
+            self.assertTrue(res.success)
+            self.assertTrue(numpy.allclose([2, 1], res.x))
+            self.assertEqual([], recipe.fithooks)
+            events = list(job.events())
+            self.assertTrue(events)
+            snap, chiv = events[-1]
+            self.assertEqual(["m", "b"], snap.getNames())
+            self.assertEqual(len(events), snap.count)
+        self.assertEqual(set(jobs), set(finished))
+        chiv = self.pool.residual(recipes[0], [2, 1]).result(10)
+        self.assertAlmostEqual(0, numpy.dot(chiv, chiv))
+        return
+
+    def testCancel(self):
+        """Check the cancellation of running and queued jobs."""
+        pool = FitJobPool(workers = 1)
+        recipe = _makeRecipe()
+        hook = _BlockingHook()
+        recipe.pushFitHook(hook)
+        running = pool.optimize(recipe)
+        queued = pool.optimize(_makeRecipe())
+        self.assertTrue(hook.started.wait(10))
+        self.assertTrue(queued.cancel())
+        self.assertEqual("cancelled", queued.state)
+        self.assertTrue(running.cancel())
+        hook.release.set()
+        self.assertRaises(FitCancelled, running.result, 10)
+        self.assertEqual("cancelled", running.state)
+        self.assertEqual([hook], recipe.fithooks)
+        self.assertRaises(FitCancelled, queued.result)
+        self.assertFalse(running.cancel())
+        pool.close()
+        self.assertRaises(SrFitError, pool.optimize, recipe)
+        return
+
+    def testSameRecipe(self):
+        """Check that the jobs of a recipe run one at a time."""
+        recipe = _makeRecipe()
+        hook = _BlockingHook()
+        recipe.pushFitHook(hook)
+        first = self.pool.optimize(recipe)
+        second = self.pool.residual(recipe)
+        self.assertTrue(hook.started.wait(10))
+        self.assertFalse(second.wait(0.1))
+        self.assertEqual("queued", second.state)
+        hook.release.set()
+        first.result(10)
+        second.result(10)
+        self.assertEqual("done", second.state)
+        return
+
+    def testThreadSafe(self):
+        """Check that a job hands the refining thread back."""
+        recipe = _makeRecipe()
+        recipe.setThreadSafe()
+        res = self.pool.optimize(recipe).result(10)
+        self.assertTrue(numpy.allclose([2, 1], res.x))
+        self.assertTrue(numpy.allclose([2, 1], recipe.getValues()))
+        self.assertTrue(recipe.threadContext() is recipe)
+        recipe.residual([5.0, 5.0])
+        self.assertEqual([5.0, 5.0], list(recipe.getValues()))
+        return
+
+    def testFailure(self):
+        """Check that errors are raised by result."""
+        def fail(recipe):
+            raise ValueError("bad")
+        job = self.pool.submit(_makeRecipe(), fail)
+        self.assertRaises(ValueError, job.result, 10)
+        self.assertEqual("failed", job.state)
+        return
+
+    def testProcesses(self):
+        """Check jobs that run in worker processes."""
+        pool = FitJobPool(workers = 2, processes = True)
+        try:
+            recipe = _makeRecipe()
+            hook = _BlockingHook()
+            hook.release.set()
+            recipe.pushFitHook(hook)
+            job = pool.optimize(recipe, maxevents = 1000)
+            res = job.result(30)
+            self.assertTrue(res.success)
+            self.assertTrue(numpy.allclose([2, 1], res.x))
+            # The fit ran on a copy and its result is applied to the recipe.
+            self.assertFalse(hook.started.isSet())
+            self.assertEqual([hook], recipe.fithooks)
+            self.assertTrue(numpy.allclose([2, 1], recipe.getValues()))
+            events = list(job.events())
+            self.assertTrue(events)
+            self.assertEqual(["m", "b"], events[-1][0].getNames())
+            chiv = pool.residual(recipe).result(30)
+            self.assertTrue(numpy.allclose(0, chiv))
+            # The work must be picklable.
+            job = pool.submit(recipe, lambda recipe: None)
+            self.assertRaises(Exception, job.result, 30)
+            self.assertEqual("failed", job.state)
+            # A dead process fails the job.
+            job = pool.submit(recipe, _exit)
+            self.assertRaises(SrFitError, job.result, 30)
+            # Cancelling terminates the process.
+            job = pool.submit(recipe, _sleep)
+            while job.state == "queued":
+                time.sleep(0.01)
+            t0 = time.time()
+            self.assertTrue(job.cancel())
+            self.assertRaises(FitCancelled, job.result, 5)
+            self.assertTrue(time.time() - t0 < 5)
+        finally:
+            pool.close()
+        return
+
+# End of class TestFitJobPool
+
+if __name__ == '__main__':
+    unittest.main()
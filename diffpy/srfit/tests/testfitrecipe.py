@@ -16,12 +16,14 @@
 
 import unittest
 
+import numpy
 from numpy import linspace, array_equal, pi, sin, dot
 
 from diffpy.srfit.fitbase.fitrecipe import FitRecipe
 from diffpy.srfit.fitbase.fitcontribution import FitContribution
 from diffpy.srfit.fitbase.profile import Profile
 from diffpy.srfit.fitbase.parameter import Parameter
+from diffpy.srfit.exceptions import SrFitError
 
 class TestFitRecipe(unittest.TestCase):
 
@@ -92,6 +94,28 @@ class TestFitRecipe(unittest.TestCase):
         self.assertRaises(ValueError, recipe.fix, "junk")
         return
 
+    def testPartitionCache(self):
+        """Test that the cached free and fixed variables stay current."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 2, tag = "tagA")
+        recipe.addVar(con.k, 1, tag = "tagk")
+        self.assertEqual(["A", "k"], recipe.getNames())
+        self.assertTrue(recipe._partitionVars()[0] is
+                recipe._partitionVars()[0])
+        recipe.fix("tagA")
+        self.assertEqual(["k"], recipe.getNames())
+        self.assertEqual(["A"], recipe.fixednames)
+        recipe.newVar("B", 4)
+        self.assertEqual(["k", "B"], recipe.getNames())
+        self.assertTrue(array_equal([1, 4], recipe.getValues()))
+        recipe.delVar(recipe.k)
+        self.assertEqual(["B"], recipe.getNames())
+        recipe.free("all")
+        self.assertEqual(["A", "B"], recipe.getNames())
+        self.assertEqual([], recipe.fixednames)
+        return
+
     def testVars(self):
         """Test to see if variables are added and removed properly."""
         recipe = self.recipe
@@ -235,6 +259,358 @@ class TestFitRecipe(unittest.TestCase):
 
         return
 
+    def testConstraintUpdates(self):
+        """Test that only the affected constraints are updated."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 1)
+        recipe.newVar("a", 1)
+        recipe.newVar("b", 0)
+        recipe.constrain(con.k, "a")
+        recipe.constrain(con.c, "2*k", {"k" : con.k})
+
+        calls = []
+        for c in recipe._constraints.values():
+            c.update = _countCalls(c.update, calls, c.par.name)
+
+        recipe.residual()
+        self.assertEquals(["k", "c"], calls)
+
+        # Changing A does not affect any constraint
+        del calls[:]
+        recipe.residual([2, 1, 0])
+        self.assertEquals([], calls)
+
+        # Changing a affects k and c, in this order
+        recipe.residual([2, 2, 0])
+        self.assertEquals(["k", "c"], calls)
+        self.assertEquals(2, con.k.value)
+        self.assertEquals(4, con.c.value)
+
+        # Values set outside of residual are picked up
+        del calls[:]
+        recipe.a.setValue(0.5)
+        recipe.residual()
+        self.assertEquals(["k", "c"], calls)
+        self.assertEquals(1, con.c.value)
+
+        # A constrained Parameter changed by hand is reset
+        del calls[:]
+        con.c.setValue(7)
+        recipe.residual()
+        self.assertEquals(["c"], calls)
+        self.assertEquals(1, con.c.value)
+        return
+
+    def testOptimize(self):
+        """Test the built-in optimizer."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 1.2).bounds = [0.5, 2]
+        recipe.addVar(con.k, 0.9)
+        recipe.addVar(con.c, 0.1)
+
+        res = recipe.optimize()
+        self.assertTrue(res.success)
+        self.assertEquals(["A", "k", "c"], res.names)
+        self.assertTrue(numpy.allclose([1, 1, 0], res.x, atol = 1e-6))
+        self.assertTrue(numpy.allclose(res.x, recipe.getValues()))
+        self.assertTrue(res.nfev > res.njev > 0)
+        self.assertTrue(res.walltime > 0)
+        self.assertAlmostEqual(0, res.cost)
+
+        # Start outside the bounds and use worker processes
+        recipe.A = 3
+        recipe.k = 1.1
+        res = recipe.optimize(workers = 2)
+        self.assertTrue(numpy.allclose([1, 1, 0], res.x, atol = 1e-6))
+
+        # lm does not support bounds
+        self.assertRaises(ValueError, recipe.optimize, method = "lm")
+        recipe.A.bounds = [-numpy.inf, numpy.inf]
+        recipe.A = 1.1
+        res = recipe.optimize(method = "lm")
+        self.assertTrue(numpy.allclose([1, 1, 0], res.x, atol = 1e-6))
+        return
+
+    def testFreeze(self):
+        """Test the frozen residual evaluator."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 2)
+        recipe.addVar(con.k, 1)
+        recipe.newVar("a", 0.5)
+        recipe.constrain(con.c, "2*a")
+        recipe.restrain("A", lb = 0, ub = 1, sig = 0.1)
+        recipe.fix("k")
+
+        frozen = recipe.freeze()
+        self.assertEquals(["A", "a"], frozen.names)
+        for p in ([1.5, 0.2], [1.5, 0.3], [0.5, 0.3], []):
+            res = frozen(p)
+            self.assertTrue(array_equal(recipe.residual(p), res))
+        self.assertEquals(0.6, con.c.value)
+
+        # The evaluator does not keep a reference to the returned vector
+        res = frozen([1, 0])
+        frozen([2, 0])
+        self.assertTrue(array_equal(recipe.residual([1, 0]), res))
+
+        # thaw restores the last evaluated values
+        recipe.residual([3, 1])
+        self.assertTrue(frozen.thaw() is recipe)
+        self.assertEquals([2, 0], list(recipe.getValues()))
+        self.assertEquals(0, con.c.value)
+
+        # Fixing or freeing variables invalidates the evaluator
+        recipe.free("k")
+        self.assertRaises(SrFitError, frozen, [1, 0])
+        recipe.fix("k")
+        self.assertRaises(SrFitError, frozen, [1, 0])
+        frozen = recipe.freeze()
+        self.assertTrue(array_equal(recipe.residual([1, 0]), frozen([1, 0])))
+
+        # A configuration change invalidates the evaluator
+        recipe.unconstrain(con.c)
+        self.assertRaises(SrFitError, frozen, [1, 0])
+        return
+
+    def testClone(self):
+        """Test that a clone is independent of the recipe."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 2.0, tag = "tagA")
+        recipe.addVar(con.k, 1.0)
+        recipe.newVar("q", 1.0)
+        recipe.constrain(con.c, "q / 10")
+        recipe.restrain(con.A, 0, 1, 1)
+        res = recipe.residual()
+        clone = recipe.clone()
+        self.assertEqual([], clone.fithooks)
+        self.assertTrue(array_equal(res, clone.residual()))
+        # The arrays of the profile are shared read-only.
+        prof = clone.cont.profile
+        self.assertTrue(numpy.may_share_memory(self.profile.xobs, prof.xobs))
+        self.assertFalse(prof.x.flags.writeable)
+        # The constraints, restraints and tags of the clone are its own.
+        clone.q.setValue(5.0)
+        clone.residual()
+        self.assertEqual(0.5, clone.cont.c.getValue())
+        self.assertEqual(0.1, con.c.getValue())
+        clone.fix("tagA")
+        self.assertEqual(["k", "q"], clone.getNames())
+        self.assertEqual(["A", "k", "q"], recipe.getNames())
+        self.assertTrue(array_equal(res, recipe.residual()))
+        clone.unrestrain(*clone._restraints)
+        self.assertEqual(len(res), len(recipe.residual()))
+        self.assertEqual(len(res) - 1, len(clone.residual([])))
+        return
+
+    def testPickle(self):
+        """Test pickling a recipe with all protocols."""
+        import pickle
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 2.0, tag = "tagA")
+        recipe.addVar(con.k, 1.0)
+        recipe.newVar("q", 1.0)
+        recipe.constrain(con.c, "q / 10")
+        recipe.restrain(con.A, 0, 1, 1)
+        res = recipe.residual()
+        for protocol in (0, 1, 2):
+            copy = pickle.loads(pickle.dumps(recipe, protocol))
+            self.assertEqual(["A", "k", "q"], copy.getNames())
+            self.assertTrue(numpy.allclose(res, copy.residual()))
+            # The copy is wired to its own parameters.
+            copy.q.setValue(5.0)
+            copy.residual()
+            self.assertEqual(0.5, copy.cont.c.getValue())
+            self.assertEqual(0.1, con.c.getValue())
+            copy.fix("tagA")
+            self.assertEqual(["k", "q"], copy.getNames())
+        return
+
+    def testThreadSafe(self):
+        """Test the evaluation from a monitoring thread."""
+        import threading
+        from diffpy.srfit.fitbase.fitresults import FitResults
+        recipe = self.recipe
+        con = self.fitcontribution
+        recipe.addVar(con.A, 2.0)
+        recipe.addVar(con.k, 1.0)
+        recipe.newVar("q", 1.0)
+        recipe.constrain(con.c, "q / 10")
+        points = [(1 + 0.01 * i, 1 - 0.01 * i, 0.1 * i) for i in range(100)]
+        expected = [recipe.residual(p) for p in points]
+        recipe.setThreadSafe()
+        self.assertTrue(recipe.threadContext() is recipe)
+
+        seen = []
+        errors = []
+        stop = threading.Event()
+        def monitor():
+            try:
+                while not stop.isSet():
+                    context = recipe.threadContext()
+                    self.assertFalse(context is recipe)
+                    values = tuple(context.getValues())
+                    chiv = context.residual()
+                    if values in points:
+                        i = points.index(values)
+                        self.assertTrue(numpy.allclose(expected[i], chiv))
+                        seen.append(i)
+                    results = FitResults(recipe)
+                    values = tuple(results.varvals)
+                    self.assertEqual(values[2] / 10, results.convals[0])
+                    if values in points:
+                        chiv = expected[points.index(values)]
+                        self.assertAlmostEqual(dot(chiv, chiv),
+                                results.residual, 5)
+            except Exception, e:
+                errors.append(e)
+        thread = threading.Thread(target = monitor)
+        thread.start()
+        try:
+            for repeat in range(20):
+                for p, chiv in zip(points, expected):
+                    self.assertTrue(array_equal(chiv, recipe.residual(p)))
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertTrue(seen)
+        self.assertEqual(points[-1], tuple(recipe.getValues()))
+
+        # Configuration changes and fixing or freeing variables make new
+        # contexts in a long-lived thread.
+        import Queue
+        requests = Queue.Queue()
+        contexts = Queue.Queue()
+        def getcontexts():
+            while requests.get():
+                contexts.put(recipe.threadContext())
+        thread = threading.Thread(target = getcontexts)
+        thread.start()
+        def getcontext():
+            requests.put(True)
+            return contexts.get(timeout = 10)
+        try:
+            context = getcontext()
+            self.assertTrue(context is getcontext())
+            recipe.fix("k")
+            self.assertEqual(["A", "q"], getcontext().getNames())
+            recipe.free("k")
+            self.assertEqual(["A", "k", "q"], getcontext().getNames())
+            recipe.unconstrain(con.c)
+            context = getcontext()
+            self.assertEqual([], context._oconstraints)
+            self.assertTrue(context is getcontext())
+        finally:
+            requests.put(False)
+            thread.join()
+        self.assertTrue(recipe.clone()._threads is None)
+        recipe.setThreadSafe(False)
+        self.assertTrue(recipe._threads is None)
+        return
+
+    def testSampling(self):
+        """Test the residual on samples of the calculation points."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        x = linspace(0, pi, 100)
+        self.profile.setObservedProfile(x, sin(x))
+        self.profile.setCalculationRange()
+        recipe.addVar(con.A, 2.0)
+        full = recipe.residual()
+        self.assertEqual(100, len(full))
+        for method in ("stratified", "random"):
+            recipe.setSampling(0.2, method, seed = 3)
+            res = recipe.residual()
+            idx = self.profile.subset
+            self.assertEqual(20, len(res))
+            self.assertEqual(20, len(numpy.unique(idx)))
+            self.assertTrue(numpy.allclose(full[idx], res))
+            # The samples are reproducible and redrawn for each epoch.
+            recipe.setSampling(0.2, method, seed = 3)
+            self.assertTrue(array_equal(idx, self.profile.subset))
+            recipe.resample()
+            self.assertFalse(array_equal(idx, self.profile.subset))
+            recipe.resample(0)
+            self.assertTrue(array_equal(idx, self.profile.subset))
+            if method == "stratified":
+                self.assertTrue(array_equal(numpy.arange(20), idx // 5))
+        # The results are calculated on the full profile.
+        from diffpy.srfit.fitbase.fitresults import FitResults
+        results = FitResults(recipe)
+        self.assertAlmostEqual(dot(full, full), results.residual, 4)
+        self.assertEqual(20, len(self.profile.x))
+        recipe.setSampling(None)
+        self.assertTrue(self.profile.subset is None)
+        self.assertTrue(numpy.allclose(full, recipe.residual()))
+        self.assertRaises(ValueError, recipe.setSampling, 1.5)
+        self.assertRaises(ValueError, recipe.setSampling, 0.5, "grid")
+        # A sample that is dropped with the calculation points is redrawn.
+        recipe.setSampling(0.2, seed = 3)
+        self.profile.setCalculationPoints(x[:50])
+        self.assertEqual(10, len(recipe.residual()))
+        self.assertEqual(10, len(self.profile.subset))
+        return
+
+    def testIncrementalValidation(self):
+        """Test that only changed objects are validated again."""
+        recipe = self.recipe
+        con = self.fitcontribution
+        con2 = FitContribution("cont2")
+        con2.setProfile(self.profile)
+        con2.setEquation("B*x + D")
+        con2.B.setValue(1)
+        con2.D.setValue(0)
+        recipe.addContribution(con2)
+        recipe.addVar(con.A, 1)
+        recipe.addVar(con.k, 1)
+
+        calls = []
+        con._validate = _countCalls(con._validate, calls, "cont")
+        con2._validate = _countCalls(con2._validate, calls, "cont2")
+        recipe.residual()
+        self.assertEquals(["cont", "cont2"], calls)
+
+        # Fixing and freeing does not validate anything
+        del calls[:]
+        recipe.fix("A")
+        recipe.residual()
+        recipe.free("all")
+        recipe.residual()
+        self.assertEquals([], calls)
+
+        # Changes in the recipe do not validate the contributions
+        recipe.addVar(con2.B, 1)
+        recipe.constrain(con.c, "0 * A")
+        recipe.residual()
+        self.assertEquals([], calls)
+
+        # Changes in a contribution validate that contribution
+        con2.constrain(con2.D, "2 * B")
+        self.assertFalse(recipe._ready)
+        recipe.residual()
+        self.assertEquals(["cont2"], calls)
+        self.assertEquals(2, con2.D.value)
+
+        # A full validation validates everything
+        del calls[:]
+        recipe._ready = False
+        recipe._validate()
+        self.assertEquals(["cont", "cont2"], calls)
+        return
+
+
+def _countCalls(f, calls, name):
+    """Wrap f so that name is appended to calls when f is called."""
+    def wrapped(*args, **kw):
+        calls.append(name)
+        return f(*args, **kw)
+    return wrapped
+
 
 if __name__ == "__main__":
     unittest.main()
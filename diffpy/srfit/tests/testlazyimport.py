@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the deferred imports of the SrFit packages."""
+
+import os
+import sys
+import subprocess
+import unittest
+
+import diffpy.srfit
+
+# Number of imports timed for the fastest time.
+nrepeat = 3
+
+def _runImport(statement):
+    """Import in a new interpreter.
+
+    Returns the import time in seconds and the set of the loaded modules.
+    """
+    code = "\n".join([
+        "import sys, time, warnings",
+        "warnings.simplefilter('ignore')",
+        "import numpy",
+        "t0 = time.time()",
+        statement,
+        "print(time.time() - t0)",
+        "print(' '.join(m for m in sys.modules if sys.modules[m]))",
+        ])
+    topdir = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(diffpy.srfit.__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+            [topdir] + env.get("PYTHONPATH", "").split(os.pathsep))
+    out = subprocess.check_output([sys.executable, "-c", code], env = env)
+    lines = out.decode().splitlines()
+    return float(lines[-2]), set(lines[-1].split())
+
+def _timeImport(statement):
+    """Get the fastest time of an import in a new interpreter."""
+    return min(_runImport(statement)[0] for i in range(nrepeat))
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def testImportTime(self):
+        """Check the time and the modules of importing fitbase."""
+        t, modules = _runImport("import diffpy.srfit.fitbase")
+        for name in ("scipy", "matplotlib", "diffpy.srreal",
+                "diffpy.srfit.fitbase.fitrecipe"):
+            self.assertFalse(name in modules, name)
+        # The package is cheaper to import than the modules it defers, as
+        # measured on this host.
+        t = _timeImport("import diffpy.srfit.fitbase")
+        t0 = _timeImport("import diffpy.srfit.fitbase.fitrecipe")
+        self.assertTrue(t < t0, "Importing fitbase took %.3f s, "
+                "importing fitrecipe %.3f s" % (t, t0))
+        return
+
+    def testSubpackages(self):
+        """Check that the subpackages import their modules on demand."""
+        t, modules = _runImport("import diffpy.srfit.pdf, diffpy.srfit.sas")
+        self.assertFalse("diffpy.srreal" in modules)
+        self.assertFalse("diffpy.srfit.pdf.pdfgenerator" in modules)
+        t, modules = _runImport("from diffpy.srfit.pdf import PDFParser")
+        self.assertTrue("diffpy.srfit.pdf.pdfparser" in modules)
+        self.assertFalse("diffpy.srfit.pdf.pdfgenerator" in modules)
+        return
+
+    def testExports(self):
+        """Check the names exported by a lazy package."""
+        import diffpy.srfit.fitbase as fitbase
+        from diffpy.srfit.fitbase import FitRecipe
+        from diffpy.srfit.fitbase.fitrecipe import FitRecipe as FR
+        self.assertTrue(FitRecipe is FR)
+        self.assertTrue(fitbase.FitRecipe is FR)
+        for name in fitbase.__all__:
+            self.assertTrue(name in dir(fitbase))
+            self.assertTrue(hasattr(fitbase, name))
+        self.assertRaises(AttributeError, getattr, fitbase, "nosuchname")
+        self.assertFalse(hasattr(fitbase, "nosuchname"))
+        return
+
+# End of class TestLazyImport
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the mcmc module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase import FitResults
+from diffpy.srfit.fitbase.mcmc import sampleRecipe, loadChain
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+class TestSampleRecipe(unittest.TestCase):
+
+    def setUp(self):
+        rs = numpy.random.RandomState(0)
+        x = numpy.linspace(0, 10, 50)
+        y = 2 * x + 1 + 0.5 * rs.randn(len(x))
+        self.recipe = recipe = _makeFitRecipe("m*x + b",
+                [("m", 2.0), ("b", 1.0)], x, y, 0.5 * numpy.ones_like(x))
+        recipe.m.bounds = [0, 5]
+        recipe.b.bounds = [-5, 5]
+        contribution = recipe.cont
+        contribution.newParameter("m2", 0)
+        contribution.constrain("m2", "2 * m")
+        recipe.optimize()
+        self.tmpdir = tempfile.mkdtemp()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        return
+
+    def testSampleRecipe(self):
+        """Check the posterior of a linear model."""
+        recipe = self.recipe
+        results = FitResults(recipe)
+        unc = numpy.array(results.varunc)
+        filename = os.path.join(self.tmpdir, "chain.txt")
+        chains = sampleRecipe(recipe, nsteps = 600, nwalkers = 10,
+                filename = filename, seed = 1)
+        self.assertEqual((600, 10, 2), chains.chain.shape)
+        self.assertTrue(0.3 < chains.acceptance.mean() < 0.9)
+        self.assertTrue((chains.rhat(100) < 1.1).all())
+        self.assertTrue((chains.autocorrTime(100) < 100).all())
+        # The posterior of a linear model matches the linear covariance.
+        std = chains.std(100)
+        self.assertTrue(numpy.allclose(unc, std, rtol = 0.2))
+        self.assertTrue(numpy.allclose(results.varvals, chains.mean(100),
+            atol = 0.5 * unc.max()))
+        # The recipe is left at the best sample.
+        self.assertTrue(numpy.array_equal(chains.best()[0],
+            recipe.getValues()))
+        # The streamed chains
+        loaded = loadChain(filename)
+        self.assertEqual(chains.names, loaded.names)
+        self.assertTrue(numpy.array_equal(chains.chain, loaded.chain))
+        self.assertTrue(numpy.array_equal(chains.lnprob, loaded.lnprob))
+        # Posterior summaries in the results
+        varvals = list(results.varvals)
+        chains.updateResults(results, burn = 100)
+        self.assertTrue(numpy.array_equal(varvals, results.varvals))
+        self.assertTrue(numpy.allclose(std, results.varunc))
+        self.assertAlmostEqual(2 * std[0], results.conunc[0],
+                delta = 0.1 * std[0])
+        self.assertTrue(numpy.array_equal(varvals, recipe.getValues()))
+        return
+
+    def testWorkers(self):
+        """Check sampling in worker processes."""
+        recipe = self.recipe
+        p0 = recipe.getValues() + 1e-3 * numpy.random.randn(6, 2)
+        serial = sampleRecipe(recipe, nsteps = 20, p0 = p0, seed = 2)
+        parallel = sampleRecipe(recipe, nsteps = 20, p0 = p0, workers = 2,
+                seed = 2)
+        self.assertTrue(numpy.allclose(serial.chain, parallel.chain))
+        self.assertRaises(ValueError, sampleRecipe, recipe, 10, 3)
+        self.assertRaises(ValueError, sampleRecipe, recipe, 10, p0 = p0 + 10)
+        return
+
+# End of class TestSampleRecipe
+
+if __name__ == '__main__':
+    unittest.main()
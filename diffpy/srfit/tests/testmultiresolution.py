@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the multiresolution module."""
+
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase.multiresolution import refineCoarseToFine
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+class TestCoarseToFine(unittest.TestCase):
+
+    def setUp(self):
+        x = numpy.linspace(0, 10, 201)
+        self.recipe = _makeFitRecipe("A*exp(-b*x)",
+                [("A", 1.0), ("b", 1.0)], x, 2.5 * numpy.exp(-0.3 * x))
+        self.profile = self.recipe.cont.profile
+        return
+
+    def testRefineCoarseToFine(self):
+        """Check the stages and the restored calculation points."""
+        recipe = self.recipe
+        profile = self.profile
+        x0 = profile.x.copy()
+        stages = refineCoarseToFine(recipe, [(4, 5), 2, 1])
+        self.assertEqual([4, 2, 1], [s.step for s in stages])
+        self.assertEqual([5, None, None], [s.xmax for s in stages])
+        self.assertEqual([26, 101, 201], [s.npoints for s in stages])
+        self.assertAlmostEqual(2.5, recipe.A.value, 6)
+        self.assertAlmostEqual(0.3, recipe.b.value, 6)
+        self.assertTrue(numpy.array_equal(x0, profile.x))
+        self.assertEqual(201, len(profile.ycalc))
+        self.assertRaises(ValueError, refineCoarseToFine, recipe, [0])
+        self.assertRaises(ValueError, refineCoarseToFine, recipe, [(2, -1)])
+        self.assertTrue(numpy.array_equal(x0, profile.x))
+        return
+
+    def testSampledProfiles(self):
+        """Check that the sampling of the profiles is kept."""
+        recipe = self.recipe
+        recipe.setSampling(0.1, seed = 1)
+        subset = self.profile.subset
+        refineCoarseToFine(recipe, [2])
+        self.assertTrue(numpy.array_equal(subset, self.profile.subset))
+        self.assertEqual(20, len(self.profile.x))
+        self.assertEqual(201, len(self.profile.xfull))
+        self.assertAlmostEqual(0.3, recipe.b.value, 6)
+        return
+
+# End of class TestCoarseToFine
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the multistart module."""
+
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase.multistart import multiStart, sampleStarts
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+class TestMultiStart(unittest.TestCase):
+
+    def setUp(self):
+        x = numpy.linspace(0, 4 * numpy.pi, 100)
+        self.recipe = recipe = _makeFitRecipe("sin(k*x)", [("k", 1)],
+                x, numpy.sin(3 * x))
+        recipe.k.bounds = [0.5, 5]
+        return
+
+    def testSampleStarts(self):
+        """Check sampling of the starting points."""
+        lb = numpy.array([0, -1.0])
+        ub = numpy.array([1, 3.0])
+        starts = sampleStarts(lb, ub, 10, seed = 1)
+        self.assertEqual((10, 2), starts.shape)
+        self.assertTrue((starts >= lb).all() and (starts <= ub).all())
+        # Latin hypercube has one point in each stratum
+        strata = numpy.floor(10 * (starts - lb) / (ub - lb))
+        for col in strata.T:
+            self.assertEqual(range(10), sorted(col))
+        self.assertTrue(numpy.array_equal(starts,
+            sampleStarts(lb, ub, 10, seed = 1)))
+        # The first 2**k Halton points are stratified in the first variable
+        starts = sampleStarts(lb, ub, 8, sampling = "halton", seed = 2)
+        self.assertTrue((starts >= lb).all() and (starts <= ub).all())
+        strata = numpy.floor(8 * (starts[:, 0] - lb[0]) / (ub[0] - lb[0]))
+        self.assertEqual(range(8), sorted(strata))
+        self.assertEqual(8, len(set(starts[:, 1])))
+        starts = sampleStarts(lb, ub, 5, sampling = "random")
+        self.assertEqual((5, 2), starts.shape)
+        self.assertRaises(ValueError, sampleStarts, lb, [1, numpy.inf], 5)
+        self.assertRaises(ValueError, sampleStarts, lb, ub, 5, "junk")
+        return
+
+    def testMultiStart(self):
+        """Check that the global minimum is found and applied."""
+        recipe = self.recipe
+        minima = multiStart(recipe, nstarts = 12, seed = 0)
+        costs = [m.cost for m in minima]
+        self.assertEqual(sorted(costs), costs)
+        self.assertEqual(12, sum(m.count for m in minima))
+        self.assertAlmostEqual(3, minima[0].x[0], 5)
+        self.assertAlmostEqual(3, recipe.k.value, 5)
+        self.assertTrue(len(minima) > 1)
+        return
+
+    def testMultiStartWorkers(self):
+        """Check the search in worker processes with early stopping."""
+        recipe = self.recipe
+        minima = multiStart(recipe, nstarts = 40, nconverge = 2,
+                workers = 2, seed = 0)
+        self.assertTrue(sum(m.count for m in minima) < 40)
+        self.assertAlmostEqual(3, minima[0].x[0], 5)
+        self.assertEqual(2, minima[0].count)
+        self.assertAlmostEqual(3, recipe.k.value, 5)
+        return
+
+# End of class TestMultiStart
+
+if __name__ == '__main__':
+    unittest.main()
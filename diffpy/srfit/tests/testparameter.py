@@ -16,6 +16,9 @@
 """Tests for refinableobj module."""
 
 import unittest
+import pickle
+
+import numpy
 
 from diffpy.srfit.fitbase.parameter import Parameter
 from diffpy.srfit.fitbase.parameter import ParameterAdapter, ParameterProxy
@@ -48,6 +51,40 @@ class TestParameter(unittest.TestCase):
         self.assertAlmostEqual(1.01, l.value)
         return
 
+    def testSlots(self):
+        """Test the compact representation of Parameters."""
+        l = Parameter("l", 3.14)
+        self.assertFalse(hasattr(l, "__dict__"))
+        self.assertRaises(AttributeError, setattr, l, "other", 1)
+        # The observers are allocated on subscription.
+        self.assertTrue(l._observers is None)
+        l.notify()
+        seen = []
+        def observer(other):
+            seen.append(other)
+        l.addObserver(observer)
+        l.setValue(2.0)
+        self.assertEqual(1, len(seen))
+        l.removeObserver(observer)
+        self.assertRaises(KeyError, Parameter("m").removeObserver, observer)
+
+        # Parameters are pickled with their slots.
+        l.bounds = [0, 5]
+        la = ParameterAdapter("la", l, attr = "value")
+        lp = ParameterProxy("lp", la)
+        lp.bounds = [1, 2]
+        for protocol in (0, 2):
+            l2, la2, lp2 = pickle.loads(pickle.dumps((l, la, lp), protocol))
+            self.assertEqual("l", l2.name)
+            self.assertEqual(2.0, l2.value)
+            self.assertEqual([0, 5], l2.bounds)
+            self.assertTrue(la2.obj is l2)
+            self.assertEqual(2.0, la2.value)
+            self.assertTrue(lp2.par is la2)
+            self.assertEqual([1, 2], lp2.bounds)
+            self.assertEqual([-numpy.inf, numpy.inf], la2.bounds)
+        return
+
 class TestParameterProxy(unittest.TestCase):
 
     def testProxy(self):
@@ -72,6 +109,35 @@ class TestParameterProxy(unittest.TestCase):
 
         return
 
+    def testChain(self):
+        """Test the accessors of a chain of proxies."""
+        a = Parameter("a", 1.0)
+        b = Parameter("b", 2.0)
+        pa = ParameterProxy("pa", a)
+        ppa = ParameterProxy("ppa", pa)
+        self.assertEqual(1.0, ppa.getValue())
+        self.assertTrue(ppa.setValue(3.0) is a)
+        self.assertEqual(3.0, a.value)
+
+        # Changing par of the inner proxy redirects the outer one.
+        pa.par = b
+        self.assertEqual(2.0, ppa.value)
+        ppa.value = 4.0
+        self.assertEqual(4.0, b.getValue())
+        self.assertEqual(3.0, a.getValue())
+        ppa.par = a
+        pa.par = b
+        self.assertEqual(3.0, ppa.getValue())
+
+        # The accessors are resolved again when unpickled.
+        ppa.par = pa
+        ppa2 = pickle.loads(pickle.dumps(ppa, 2))
+        self.assertEqual(4.0, ppa2.getValue())
+        ppa2.par.par = Parameter("c", 5.0)
+        self.assertEqual(5.0, ppa2.getValue())
+        self.assertEqual(4.0, ppa.getValue())
+        return
+
 class TestParameterAdapter(unittest.TestCase):
 
     def testWrapper(self):
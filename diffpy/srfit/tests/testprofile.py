@@ -158,6 +158,31 @@ class TestProfile(unittest.TestCase):
 
         return
 
+    def testSetSubset(self):
+        """Test the setSubset method."""
+        prof = self.profile
+        x = arange(0, 10, 1.0)
+        prof.setObservedProfile(x, 2 * x, 3 * x)
+        prof.setSubset([1, 4, 7])
+        self.assertTrue( array_equal([1, 4, 7], prof.x) )
+        self.assertTrue( array_equal([2, 8, 14], prof.y) )
+        self.assertTrue( array_equal([3, 12, 21], prof.dy) )
+        self.assertTrue( array_equal(x, prof.xfull) )
+        self.assertTrue( array_equal(2 * x, prof.yfull) )
+        # The subset is kept with new observed data.
+        prof.setObservedProfile(x, -x)
+        self.assertTrue( array_equal([-1, -4, -7], prof.y) )
+        self.assertTrue( array_equal(-x, prof.yfull) )
+        # A new calculation range clears it.
+        prof.setCalculationRange(xmax = 5)
+        self.assertTrue(prof.subset is None)
+        self.assertTrue( array_equal(arange(0, 6, 1.0), prof.x) )
+        prof.setSubset([0, 2])
+        prof.setSubset(None)
+        self.assertTrue( array_equal(arange(0, 6, 1.0), prof.x) )
+        self.assertTrue( array_equal(prof.x, prof.xfull) )
+        return
+
     def testLoadtxt(self):
         """Test the loadtxt method"""
 
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the profiling module."""
+
+import os
+import json
+import tempfile
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase import FitRecipe, FitContribution, Profile
+from diffpy.srfit.fitbase import ProfileGenerator
+from diffpy.srfit.fitbase import profiling
+from diffpy.srfit.fitbase.profiling import ProfilingFitHook, ComponentTimers
+
+
+class LineGenerator(ProfileGenerator):
+
+    def __init__(self, name):
+        ProfileGenerator.__init__(self, name)
+        self._newParameter("a", 1.0)
+        self.fail = False
+        return
+
+    def __call__(self, x):
+        if self.fail:
+            raise ValueError("generator failed")
+        return self.a.value * x
+
+
+class TestProfilingFitHook(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe = recipe = FitRecipe("fit")
+        recipe.clearFitHooks()
+        profile = Profile()
+        x = numpy.linspace(0, 1, 10)
+        profile.setObservedProfile(x, 2 * x)
+        contribution = FitContribution("line")
+        contribution.setProfile(profile)
+        contribution.addProfileGenerator(LineGenerator("gen"))
+        recipe.addContribution(contribution)
+        recipe.addVar(contribution.gen.a, 1)
+        recipe.restrain("a", lb = 0, ub = 1)
+        self.hook = ProfilingFitHook(verbose = 0)
+        recipe.pushFitHook(self.hook)
+        return
+
+    def tearDown(self):
+        self.hook.close()
+        self.assertTrue(profiling.active.timers is None)
+        return
+
+    def testTimers(self):
+        """Check the component paths and call counts."""
+        for i in range(3):
+            self.recipe.residual([i])
+        stats = self.hook.timers.stats
+        paths = set(["fit", "fit.fithooks", "fit.constraints", "fit.line",
+            "fit.line.gen", "fit.line.residual", "fit.restraints",
+            "fit.restraints.table"])
+        # The validation of the recipe evaluates components outside of the
+        # residual calculation.
+        self.assertTrue("line" in stats)
+        self.assertEqual(paths, set(p for p in stats if p.startswith("fit")))
+        self.assertEqual(3, stats["fit"][0])
+        self.assertEqual(3, stats["fit.line.gen"][0])
+        self.assertEqual(6, stats["fit.fithooks"][0])
+        # Self times add up to the total time
+        total = sum(st[3] for path, st in stats.items()
+                if path.startswith("fit"))
+        self.assertAlmostEqual(stats["fit"][1], total)
+        # The residual does not change
+        self.hook.close()
+        chiv = self.recipe.residual([2])
+        self.hook.reset(self.recipe)
+        self.assertTrue(numpy.array_equal(chiv, self.recipe.residual([2])))
+        return
+
+    def testReport(self):
+        """Check the report written when the refinement ends."""
+        fd, filename = tempfile.mkstemp(suffix = ".json")
+        os.close(fd)
+        try:
+            self.hook.filename = filename
+            self.recipe.optimize()
+            self.assertTrue(profiling.active.timers is None)
+            with open(filename) as fp:
+                rows = json.load(fp)
+        finally:
+            os.remove(filename)
+        self.assertEqual(self.hook.timers.report(), rows)
+        selfwall = [row["selfwall"] for row in rows]
+        self.assertEqual(sorted(selfwall, reverse = True), selfwall)
+        table = self.hook.timers.formatTable()
+        self.assertTrue("fit.line.gen" in table)
+        return
+
+    def testUnwind(self):
+        """Check that an exception does not corrupt the timers."""
+        timers = ComponentTimers()
+        depth = timers.start("fit")
+        timers.start("line")
+        timers.start("gen")
+        timers.stop(depth)
+        self.assertEqual([], timers._stack)
+        self.assertEqual(set(["fit", "fit.line", "fit.line.gen"]),
+                set(timers.stats))
+        # The components stop their timers when they raise an exception.
+        self.recipe.residual()
+        stats = self.hook.timers.stats
+        ncalls = stats["line"][0]
+        contribution = self.recipe.line
+        contribution.gen.fail = True
+        contribution.gen.a.value = 2
+        self.assertRaises(ValueError, contribution.residual)
+        self.assertEqual([], self.hook.timers._stack)
+        self.assertEqual(ncalls + 1, stats["line"][0])
+        self.assertTrue("line.gen" in stats)
+        return
+
+    def testThreads(self):
+        """Check that the timers record the activating thread only."""
+        import threading
+        self.recipe.residual([1])
+        thread = threading.Thread(target = self.recipe.residual, args = ([2],))
+        thread.start()
+        thread.join()
+        self.assertEqual(1, self.hook.timers.stats["fit"][0])
+        self.assertEqual(2, self.recipe.a.value)
+        return
+
+
+if __name__ == "__main__":
+    unittest.main()
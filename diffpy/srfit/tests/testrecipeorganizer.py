@@ -149,6 +149,160 @@ class TestRecipeContainer(unittest.TestCase):
 
         return
 
+    def testPathIndex(self):
+        """Test the index of the objects below a container."""
+        m1 = self.m
+        m2 = RecipeContainer("m2")
+        m2._containers = {}
+        m2._manage(m2._containers)
+        m3 = RecipeContainer("m3")
+        p3 = Parameter("p3", 3)
+        m3._addObject(p3, m3._parameters)
+        m1._addObject(m2, m1._containers)
+        # Objects added further down are seen by the containers above.
+        m2._addObject(m3, m2._containers)
+        self.assertTrue(m1.get("m2.m3.p3") is p3)
+        self.assertTrue(m2.get("m3") is m3)
+        self.assertTrue(m1.get("m2.m3.p4") is None)
+        self.assertEquals(m1._locateManagedObject(p3), [m1, m2, m3, p3])
+
+        p4 = Parameter("p4", 4)
+        m3._addObject(p4, m3._parameters)
+        self.assertTrue(m1.get("m2.m3.p4") is p4)
+        self.assertEquals(m1._locateManagedObject(p4), [m1, m2, m3, p4])
+
+        # An object held at several places is located at the first one.
+        p6 = Parameter("p6", 6)
+        m3._addObject(p6, m3._parameters)
+        m2._addObject(p6, m2._parameters)
+        self.assertEquals(m1._locateManagedObject(p6), [m1, m2, m3, p6])
+        m3._removeObject(p6, m3._parameters)
+        self.assertEquals(m1._locateManagedObject(p6), [m1, m2, p6])
+        m2._removeObject(p6, m2._parameters)
+        self.assertEquals(m1._locateManagedObject(p6), [])
+
+        # Replaced and removed objects leave the index.
+        p5 = Parameter("p3", 5)
+        m3._addObject(p5, m3._parameters, check = False)
+        self.assertTrue(m1.get("m2.m3.p3") is p5)
+        self.assertEquals(m1._locateManagedObject(p3), [])
+        m2._removeObject(m3, m2._containers)
+        self.assertTrue(m1.get("m2.m3.p4") is None)
+        self.assertEquals(m1._locateManagedObject(p4), [])
+        self.assertTrue(m3.get("p4") is p4)
+        self.assertEquals(m1._objhosts, {m2 : "m2"})
+        return
+
+    def testGetPars(self):
+        """Test the cached Parameter queries."""
+        m1 = self.m
+        m2 = RecipeContainer("m2")
+        m1._addObject(m2, m1._containers)
+        pa = Parameter("a", 1)
+        pab = Parameter("ab", 2)
+        m1._addObject(pa, m1._parameters)
+        m2._addObject(pab, m2._parameters)
+
+        self.assertEquals(m1.getPars(), (pa, pab))
+        self.assertEquals(m1.getPars("a"), (pa, pab))
+        self.assertEquals(m1.getPars("a$"), (pa,))
+        self.assertEquals(m1.getPars(".*b$"), (pab,))
+        self.assertEquals(m1.getPars("[a-z]b"), (pab,))
+        self.assertEquals(m1.getPars("c"), ())
+        self.assertEquals(list(m1.iterPars("ab")), [pab])
+        self.assertEquals(list(m1.iterPars("a", recurse = False)), [pa])
+
+        # Added Parameters are found in the hierarchy above.
+        pb = Parameter("b", 3)
+        m2._addObject(pb, m2._parameters)
+        self.assertEquals(m1.getPars(".*b$"), (pab, pb))
+        m2._removeObject(pab, m2._parameters)
+        self.assertEquals(m1.getPars(".*b$"), (pb,))
+        self.assertEquals(m1.getPars(), (pa, pb))
+        return
+
+    def testDeferObject(self):
+        """Test the deferred creation of managed objects."""
+        m1 = self.m
+        m2 = RecipeContainer("m2")
+        m2._containers = {}
+        m2._manage(m2._containers)
+        m1._addObject(m2, m1._containers)
+        self.assertEquals((), m1.getPars())
+        m2._deferObject("p", m2._parameters, Parameter, "p", 1.0)
+        m2._deferObject("m3", m2._containers, RecipeContainer, "m3")
+        self.assertRaises(ValueError, m2._deferObject, "p", m2._parameters,
+                Parameter, "p")
+        self.assertEquals(0, len(m2._parameters))
+        self.assertTrue("p" in dir(m2))
+
+        # Retrieving the object creates it.
+        p = m1.get("m2.p")
+        self.assertEquals(1.0, p.value)
+        self.assertTrue(m2._parameters["p"] is p)
+        self.assertTrue(m2.p is p)
+        self.assertEquals([m1, m2, p], m1._locateManagedObject(p))
+
+        # Parameter queries create all deferred objects.
+        self.assertEquals(0, len(m2._containers))
+        self.assertEquals((p,), m1.getPars())
+        self.assertTrue(isinstance(m2._containers["m3"], RecipeContainer))
+        self.assertFalse(m2._deferred)
+        return
+
+    def testBatchUpdate(self):
+        """Test the collection of notifications."""
+        m1 = self.m
+        m2 = RecipeContainer("m2")
+        m1._addObject(m2, m1._containers)
+        p1 = Parameter("p1", 1)
+        p2 = Parameter("p2", 2)
+        m2._addObject(p1, m2._parameters)
+        m2._addObject(p2, m2._parameters)
+        seen = []
+        def observer(semaphors):
+            seen.append(semaphors)
+        m1.addObserver(observer)
+
+        p1.setValue(3)
+        p2.setValue(4)
+        self.assertEquals(2, len(seen))
+
+        # The notifications reach the top once.
+        del seen[:]
+        with m1.batchUpdate():
+            p1.setValue(5)
+            with m2.batchUpdate():
+                p2.setValue(6)
+            p1.setValue(7)
+            self.assertEquals([], seen)
+        self.assertEquals([(m1, m2, p1)], seen)
+
+        # Notifications are delivered when the block fails.
+        del seen[:]
+        try:
+            with m1.batchUpdate():
+                p2.setValue(8)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEquals([(m1, m2, p2)], seen)
+        p1.setValue(9)
+        self.assertEquals(2, len(seen))
+
+        # A handler that changes an observable again during the delivery
+        # notifies its observers again.
+        del seen[:]
+        def reset(semaphors):
+            if p1.getValue() != 0:
+                p1.setValue(0)
+        m2.addObserver(reset)
+        with m1.batchUpdate():
+            p1.setValue(10)
+        self.assertEquals([(m1, m2, p1), (m1, m2, p1)], seen)
+        self.assertEquals(0, p1.getValue())
+        return
+
 class TestRecipeOrganizer(unittest.TestCase):
 
     def setUp(self):
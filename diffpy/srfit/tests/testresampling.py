@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Tests for the resampling module."""
+
+import unittest
+
+import numpy
+
+from diffpy.srfit.fitbase import FitResults
+from diffpy.srfit.fitbase.resampling import (resampleRecipe,
+        bootstrapIndices, jackknifeIndices)
+from diffpy.srfit.tests.utils import _makeFitRecipe
+
+
+class TestResampleRecipe(unittest.TestCase):
+
+    def setUp(self):
+        rs = numpy.random.RandomState(0)
+        x = numpy.linspace(0, 10, 100)
+        y = 2 * x + 1 + 0.5 * rs.randn(len(x))
+        self.recipe = recipe = _makeFitRecipe("m*x + b",
+                [("m", 2.0), ("b", 1.0)], x, y, 0.5 * numpy.ones_like(x))
+        self.profile = recipe.cont.profile
+        recipe.optimize()
+        self.results = FitResults(recipe)
+        return
+
+    def testIndices(self):
+        """Check the resampled indices."""
+        rs = numpy.random.RandomState(0)
+        idx = bootstrapIndices(10, rs = rs)
+        self.assertEqual(10, len(idx))
+        self.assertTrue((numpy.diff(idx) >= 0).all())
+        idx = bootstrapIndices(10, 4, rs)
+        self.assertEqual(10, len(idx))
+        self.assertTrue(idx.max() < 10)
+        self.assertEqual([0, 1, 4, 5],
+                list(jackknifeIndices(8, 2, 1, blocksize = 2)))
+        self.assertEqual([0, 2, 3, 5, 6], list(jackknifeIndices(7, 3, 1)))
+        return
+
+    def testBootstrap(self):
+        """Check bootstrap uncertainties of a linear model."""
+        recipe = self.recipe
+        x0 = recipe.getValues()
+        boot = resampleRecipe(recipe, 60, seed = 1)
+        self.assertEqual((60, 2), boot.samples.shape)
+        self.assertTrue(numpy.array_equal(x0, recipe.getValues()))
+        self.assertTrue(self.profile.subset is None)
+        self.assertEqual(100, len(self.profile.x))
+        unc = numpy.array(self.results.varunc)
+        self.assertTrue(numpy.allclose(unc, boot.std(), rtol = 0.3))
+        # The same replicates in worker processes
+        par = resampleRecipe(recipe, 4, seed = 1, workers = 2)
+        self.assertTrue(numpy.allclose(boot.samples[:4], par.samples))
+        self.assertRaises(ValueError, resampleRecipe, recipe, 10, "junk")
+        return
+
+    def testJackknife(self):
+        """Check jackknife uncertainties written to FitResults."""
+        recipe = self.recipe
+        results = self.results
+        unc = numpy.array(results.varunc)
+        jack = resampleRecipe(recipe, 20, "jackknife")
+        self.assertTrue(numpy.allclose(unc, jack.std(), rtol = 0.3))
+        varvals = results.varvals
+        jack.updateResults(results)
+        self.assertTrue(numpy.allclose(jack.std(), results.varunc))
+        self.assertTrue(numpy.array_equal(varvals, results.varvals))
+        self.assertTrue("jackknife" in results.formatResults())
+        return
+
+# End of class TestResampleRecipe
+
+if __name__ == '__main__':
+    unittest.main()
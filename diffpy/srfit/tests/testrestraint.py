@@ -16,7 +16,11 @@
 
 import unittest
 
+import numpy
+
 from diffpy.srfit.fitbase.restraint import Restraint
+from diffpy.srfit.fitbase.restrainttable import RestraintTable
+from diffpy.srfit.fitbase.restrainttable import orderRestraints
 from diffpy.srfit.fitbase.recipeorganizer import equationFromString
 from diffpy.srfit.fitbase.parameter import Parameter
 from diffpy.srfit.equation.builder import EquationFactory
@@ -69,5 +73,67 @@ class TestRestraint(unittest.TestCase):
         return
 
 
+class OpaqueRestraint(object):
+
+    def __init__(self, value):
+        self.value = value
+        return
+
+    def penalty(self, w = 1.0):
+        return self.value
+
+
+class TestRestraintTable(unittest.TestCase):
+
+    def testPenalties(self):
+        """Test that the table matches the penalties of each Restraint."""
+        p1 = Parameter("p1", 1)
+        p2 = Parameter("p2", 2)
+        factory = EquationFactory()
+        factory.registerArgument("p1", p1)
+        factory.registerArgument("p2", p2)
+        opaque = OpaqueRestraint(4)
+        restraints = [
+                Restraint(equationFromString("p1 + p2", factory), 1, 5),
+                opaque,
+                Restraint(equationFromString("p1", factory), 2, sig = 0.5),
+                Restraint(equationFromString("p2", factory), ub = 1,
+                    scaled = True),
+                ]
+        table = RestraintTable(restraints)
+        self.assertEquals(3, table.ntab)
+        self.assertEquals(4, len(table))
+        self.assertTrue(table.restraints[-1] is opaque)
+
+        for v1, v2 in [(1, 2), (-3, 1), (4, 4), (0.5, 0.25)]:
+            p1.setValue(v1)
+            p2.setValue(v2)
+            for w in (1.0, 2.5):
+                expected = [numpy.sqrt(r.penalty(w))
+                        for r in table.restraints]
+                self.assertTrue(numpy.array_equal(expected,
+                    table.penalties(w)))
+
+        # Changes of the restraints are picked up.
+        res = table.restraints[0]
+        res.lb = 2
+        res.sig = 0.1
+        table.restraints[2].scaled = False
+        expected = [numpy.sqrt(r.penalty(2.5)) for r in table.restraints]
+        self.assertTrue(numpy.array_equal(expected, table.penalties(2.5)))
+        self.assertEquals(2, table.lb[0])
+        return
+
+    def testOrder(self):
+        """Test the ordering of restraints."""
+        eq = Parameter("p", 1)
+        restraints = [Restraint(eq) for i in range(10)]
+        opaque = OpaqueRestraint(1)
+        ordered = orderRestraints(set(restraints + [opaque]))
+        self.assertEquals(restraints + [opaque], ordered)
+        self.assertEquals(ordered, orderRestraints(reversed(ordered)))
+        return
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -108,6 +108,28 @@ class TestTagManager(unittest.TestCase):
         self.assertFalse(m.hasTags(3, "fail"))
         return
 
+    def test_version(self):
+        """check TagManager.version and the reuse of object indices
+        """
+        m = self.m
+        m.tag(3, "3", "number")
+        v = m.version
+        m.tag(3, "number")
+        self.assertEqual(v, m.version)
+        m.untag(3, "3")
+        self.assertTrue(m.version > v)
+        self.assertTrue("3" in m)
+        self.assertFalse("5" in m)
+        m.untag(3)
+        self.assertEqual([], m.tags(3))
+        m.tag(5, "number")
+        m.tag(6, "number", "6")
+        self.assertEqual(2, len(m._objects))
+        self.assertEqual(set([5, 6]), m.union("number"))
+        self.assertEqual(set([6]), m.intersection("number", "6"))
+        self.assertFalse(m.hasTags(3, "number"))
+        return
+
 # End of class TestTagManager
 
 if __name__ == '__main__':
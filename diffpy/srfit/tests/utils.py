@@ -70,6 +70,33 @@ def _makeArgs(num):
     return args
 
 
+def _makeFitRecipe(equation, variables, x=None, y=None, dy=None,
+        name="recipe"):
+    """Make a FitRecipe with the single FitContribution "cont".
+
+    equation    --  The equation of the contribution.
+    variables   --  List of (name, value) pairs of the parameters of the
+                    contribution that are added as variables.
+    x, y, dy    --  The observed profile. The profile is empty if x is None.
+    name        --  The name of the recipe.
+
+    Returns the recipe without fit hooks.
+    """
+    from diffpy.srfit.fitbase import FitRecipe, FitContribution, Profile
+    recipe = FitRecipe(name)
+    recipe.clearFitHooks()
+    profile = Profile()
+    if x is not None:
+        profile.setObservedProfile(x, y, dy)
+    contribution = FitContribution("cont")
+    contribution.setProfile(profile)
+    contribution.setEquation(equation)
+    recipe.addContribution(contribution)
+    for parname, value in variables:
+        recipe.addVar(contribution.get(parname), value)
+    return recipe
+
+
 def datafile(filename):
     from pkg_resources import resource_filename
     rv = resource_filename(__name__, "testdata/" + filename)
@@ -23,6 +23,8 @@ class bind2nd(object):
     '''Freeze second argument of a callable object to a given constant.
     '''
 
+    __slots__ = ("func", "arg1")
+
     def __init__(self, func, arg1):
         """Freeze the second argument of function func to arg1.
         """
@@ -33,3 +35,9 @@ class bind2nd(object):
     def __call__(self, *args, **kwargs):
         boundargs = ((args[0], self.arg1) + args[1:])
         return self.func(*boundargs, **kwargs)
+
+    def __getstate__(self):
+        return (self.func, self.arg1)
+
+    def __setstate__(self, state):
+        self.func, self.arg1 = state
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+##############################################################################
+#
+# diffpy.srfit      Complex Modeling Initiative
+#                   (c) 2016 Brookhaven Science Associates,
+#                   Brookhaven National Laboratory.
+#                   All rights reserved.
+#
+# See AUTHORS.txt for a list of people who contributed.
+# See LICENSE.txt for license information.
+#
+##############################################################################
+
+"""Deferred imports of the names exported by a package.
+
+The subpackages of SrFit export the main classes of their modules. The
+lazyExport function replaces a package in sys.modules with a LazyModule, which
+imports the module that defines an exported name when the name is first used.
+Importing the package or one of its modules then does not import the other
+modules of the package and their dependencies, such as diffpy.srreal.
+
+"""
+
+__all__ = ["LazyModule", "lazyExport"]
+
+import sys
+from importlib import import_module
+from types import ModuleType
+
+class LazyModule(ModuleType):
+    """Module that imports its exported names when they are first used.
+
+    Attributes
+    _exports    --  Dictionary of the exported names and the full names of the
+                    modules that define them.
+    _module     --  The replaced module. Python 2 clears the globals of a
+                    module when it is deleted.
+
+    """
+
+    def __getattr__(self, name):
+        """Import an exported name.
+
+        Raises AttributeError if name is not exported.
+        """
+        modname = self.__dict__["_exports"].get(name)
+        if modname is None:
+            msg = "'module' object has no attribute '%s'" % name
+            raise AttributeError(msg)
+        value = getattr(import_module(modname), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self._exports))
+
+# End class LazyModule
+
+def lazyExport(modname, exports):
+    """Replace a package with a LazyModule.
+
+    This is called at the end of the __init__ module of the package. The
+    attributes defined so far are kept.
+
+    modname --  The __name__ of the package.
+    exports --  Dictionary of the exported names and the full names of the
+                modules that define them.
+
+    Returns the LazyModule.
+    """
+    module = sys.modules[modname]
+    lazy = LazyModule(modname)
+    lazy.__dict__.update(module.__dict__)
+    lazy._exports = dict(exports)
+    lazy._module = module
+    sys.modules[modname] = lazy
+    return lazy
+
+# End of file
@@ -11,7 +11,50 @@
 # Derived from pyre-1.0/packages/pyre/patterns/Observable.py
 # See pyre-1.0 for full copyright and license information
 
-__all__ = ["Observable"]
+__all__ = ["Observable", "batchUpdate"]
+
+import threading
+from contextlib import contextmanager
+
+# The notifications of the open batchUpdate of each thread
+_batches = threading.local()
+
+
+@contextmanager
+def batchUpdate():
+    """
+    Collect notifications and deliver them when the context exits
+
+    Within the context, notify records each pair of handler and notifying observable once
+    instead of invoking the handler. On exit the recorded handlers are invoked in the order
+    of their first notification. The notifications they pass on are collected in the same
+    way and delivered in the next round, until no more come, so a cascade through the
+    hierarchy reaches every handler once per observable and round. Cached values that
+    depend on changed observables are out of date until the context exits. Nested contexts
+    deliver their notifications when the outermost one exits. The collection is per thread.
+    """
+    if getattr(_batches, "queue", None) is not None:
+        yield
+        return
+
+    _batches.queue = []
+    _batches.seen = set()
+    try:
+        yield
+    finally:
+        try:
+            # handlers collect their notifications for the next round
+            while _batches.queue:
+                queue = _batches.queue
+                _batches.queue = []
+                _batches.seen = set()
+                for callable, semaphors in queue:
+                    callable(semaphors)
+        finally:
+            _batches.queue = None
+            _batches.seen = None
+    return
+
 
 class Observable(object):
     """
@@ -26,12 +69,14 @@ class Observable(object):
     value.
 
     The event handlers are callables that take the observable instance as their single
-    argument.
+    argument. The set of handlers is only allocated when the first one is registered, and
+    the handler set is kept in a slot, so that classes with __slots__ can be observable.
 
     interface:
       addObserver: registers its callable argument with the list of handlers to invoke
       removeObserver: remove an event handler from the list of handlers to invoke
       notify: invoke the registered handlers in the order in which they were registered
+      batchUpdate: collect the notifications and deliver them at the end of a with block
 
     """
 
@@ -42,18 +87,43 @@ class Observable(object):
         """
         # build a list before notification, just in case the observer's callback behavior
         # involves removing itself from our callback set
+        if not self._observers:
+            return
         semaphors = (self,) + other
+        queue = getattr(_batches, "queue", None)
+        if queue is not None:
+            seen = _batches.seen
+            for callable in self._observers:
+                key = (callable, self)
+                if key not in seen:
+                    seen.add(key)
+                    queue.append((callable, semaphors))
+            return
+
         for callable in tuple(self._observers):
             callable(semaphors)
 
         return
 
 
+    def batchUpdate(self):
+        """
+        Get a context that collects notifications and delivers them on exit
+
+        Use it as "with obj.batchUpdate():" around many changes. The notifications of all
+        observables of the current thread are collected, not only those of this one. See the
+        batchUpdate function of this module.
+        """
+        return batchUpdate()
+
+
     # callback management
     def addObserver(self, callable):
         """
         Add callable to the set of observers
         """
+        if self._observers is None:
+            self._observers = set()
         self._observers.add(callable)
         return callable
 
@@ -62,6 +132,8 @@ class Observable(object):
         """
         Remove callable from the set of observers
         """
+        if self._observers is None:
+            raise KeyError(callable)
         self._observers.remove(callable)
         return callable
 
@@ -69,12 +141,77 @@ class Observable(object):
     # meta methods
     def __init__(self, **kwds):
         super(Observable, self).__init__(**kwds)
-        self._observers = set()
+        self._observers = None
+        return
+
+
+    def __getstate__(self):
+        """
+        Get the slot and instance dictionary attributes for pickling
+
+        Without this, pickle protocols 0 and 1 refuse the classes with __slots__
+        """
+        return _getSlotState(self)
+
+
+    def __setstate__(self, state):
+        """
+        Restore the attributes from __getstate__
+        """
+        _setSlotState(self, state)
         return
 
 
     # private data
-    _observers = None
+    __slots__ = ("_observers",)
+
+
+def _getSlotState(obj):
+    """
+    Get the slot and instance dictionary attributes of obj that are set
+    """
+    state = dict(getattr(obj, "__dict__", ()))
+    for name in _slotNames(type(obj)):
+        # read the slot directly, in case __getattr__ redirects missing attributes
+        try:
+            state[name] = _slotDescriptor(type(obj), name).__get__(obj)
+        except AttributeError:
+            pass
+    return state
+
+
+def _setSlotState(obj, state):
+    """
+    Restore the attributes of obj from _getSlotState
+    """
+    slots = _slotNames(type(obj))
+    for name, value in state.items():
+        if name in slots:
+            object.__setattr__(obj, name, value)
+        else:
+            obj.__dict__[name] = value
+    return
+
+
+def _slotNames(cls):
+    """
+    Get the set of the names of the slots of a class and its bases
+    """
+    names = set()
+    for base in cls.__mro__:
+        names.update(base.__dict__.get("__slots__", ()))
+    names.difference_update(("__dict__", "__weakref__"))
+    return names
+
+
+def _slotDescriptor(cls, name):
+    """
+    Get the descriptor of a slot from the class that defines it
+    """
+    for base in cls.__mro__:
+        if name in base.__dict__.get("__slots__", ()):
+            return base.__dict__[name]
+    raise AttributeError(name)
 
 
 # end of file
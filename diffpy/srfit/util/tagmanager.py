@@ -17,6 +17,10 @@
 The TagManager class takes hashable objects and assigns tags to them. Objects
 can then be easily referenced via their assigned tags.
 
+Each tagged object is given an integer index and each tag is stored as a
+bitset of the indices of its objects, so that membership checks, unions and
+intersections are integer operations.
+
 """
 __all__ = ["TagManager"]
 
@@ -29,17 +33,37 @@ class TagManager(object):
     silent          --  Flag indicating whether to silently pass by when a tag
                         cannot be found (bool, True). If this is False, then a
                         KeyError will be thrown when a tag cannot be found.
-    _tagdict        --  A dictionary of tags to sets of tagged objects.
+    version         --  Counter that is incremented whenever the tags of an
+                        object change. This can be used to invalidate caches
+                        of tag queries.
+    _tagdict        --  A dictionary of tags to bitsets of tagged objects. A
+                        bitset is an integer with the bit of each object
+                        index set.
+    _index          --  A dictionary of the indices of tagged objects.
+    _objects        --  List of the tagged objects by index. Unused indices
+                        hold None.
+    _ntags          --  List of the number of tags of each object by index.
+    _freeidx        --  List of unused indices.
 
     """
 
     def __init__(self):
         """Initialization."""
         self._tagdict = {}
+        self._index = {}
+        self._objects = []
+        self._ntags = []
+        self._freeidx = []
         self.silent = True
+        self.version = 0
         return
 
 
+    def __contains__(self, tag):
+        """Check if a tag is managed by the TagManager."""
+        return str(tag) in self._tagdict
+
+
     def alltags(self):
         """Get all tags managed by the TagManager."""
         return self._tagdict.keys()
@@ -56,9 +80,19 @@ class TagManager(object):
         Raises TypeError if obj is not hashable.
 
         """
+        if not tags:
+            return
+        idx = self._index.get(obj)
+        if idx is None:
+            idx = self.__newIndex(obj)
+        bit = 1 << idx
         for tag in tags:
-            oset = self._tagdict.setdefault(str(tag), set())
-            oset.add(obj)
+            tag = str(tag)
+            mask = self._tagdict.get(tag, 0)
+            if not mask & bit:
+                self._tagdict[tag] = mask | bit
+                self._ntags[idx] += 1
+                self.version += 1
         return
 
 
@@ -76,12 +110,23 @@ class TagManager(object):
         if not tags:
             tags = self.tags(obj)
 
+        idx = self._index.get(obj)
+        bit = 0 if idx is None else 1 << idx
         for tag in tags:
-            oset = self.__getObjectSet(tag)
-            if obj not in oset and not self.silent:
-                raise KeyError("Tag '%s' does not apply" % tag)
-            oset.discard(obj)
-
+            mask = self.__getMask(tag)
+            if not mask & bit:
+                if not self.silent:
+                    raise KeyError("Tag '%s' does not apply" % tag)
+                continue
+            self._tagdict[str(tag)] = mask & ~bit
+            self._ntags[idx] -= 1
+            self.version += 1
+
+        # Release the index of an object without tags.
+        if idx is not None and not self._ntags[idx]:
+            del self._index[obj]
+            self._objects[idx] = None
+            self._freeidx.append(idx)
         return
 
 
@@ -91,7 +136,11 @@ class TagManager(object):
         Returns list
 
         """
-        tags = [k for (k, v) in self._tagdict.iteritems() if obj in v]
+        idx = self._index.get(obj)
+        if idx is None:
+            return []
+        bit = 1 << idx
+        tags = [k for (k, v) in self._tagdict.iteritems() if v & bit]
         return tags
 
 
@@ -101,10 +150,12 @@ class TagManager(object):
         Returns bool
 
         """
-        setgen = (self.__getObjectSet(t) for t in tags)
-        resgen = ((obj in s) for s in setgen)
-        result = reduce(bool.__and__, resgen, True)
-        return result
+        idx = self._index.get(obj)
+        bit = 0 if idx is None else 1 << idx
+        for t in tags:
+            if not self.__getMask(t) & bit:
+                return False
+        return True
 
 
     def union(self, *tags):
@@ -116,10 +167,11 @@ class TagManager(object):
         if not tags:
             return set()
 
-        setgen = (self.__getObjectSet(t) for t in tags)
-        objs = reduce(set.union, setgen)
+        mask = 0
+        for t in tags:
+            mask |= self.__getMask(t)
 
-        return objs
+        return self.__getObjects(mask)
 
 
     def intersection(self, *tags):
@@ -131,10 +183,11 @@ class TagManager(object):
         if not tags:
             return set()
 
-        setgen = (self.__getObjectSet(t) for t in tags)
-        objs = reduce(set.intersection, setgen)
+        mask = -1
+        for t in tags:
+            mask &= self.__getMask(t)
 
-        return objs
+        return self.__getObjects(mask)
 
 
     def verifyTags(self, *tags):
@@ -144,26 +197,47 @@ class TagManager(object):
         self.silent.
 
         """
-        keys = self._tagdict.keys()
         for tag in tags:
-            if tag not in keys:
+            if tag not in self._tagdict:
                 raise KeyError("Tag '%s' does not exist" % tag)
 
         return True
 
 
-    def __getObjectSet(self, tag):
-        """Helper function for getting an object set with given tag.
+    def __newIndex(self, obj):
+        """Assign an index to an untagged object."""
+        if self._freeidx:
+            idx = self._freeidx.pop()
+            self._objects[idx] = obj
+            self._ntags[idx] = 0
+        else:
+            idx = len(self._objects)
+            self._objects.append(obj)
+            self._ntags.append(0)
+        self._index[obj] = idx
+        return idx
+
+
+    def __getMask(self, tag):
+        """Helper function for getting the bitset of a tag.
 
         Raises KeyError if a passed tag does not exist and self.silent is False
 
         """
-        oset = self._tagdict.get(str(tag))
-        if oset is None:
+        mask = self._tagdict.get(str(tag))
+        if mask is None:
             if not self.silent:
                 raise KeyError("Tag '%s' does not exist" % tag)
-            oset = set()
-        return oset
+            mask = 0
+        return mask
+
+
+    def __getObjects(self, mask):
+        """Get the set of objects in a bitset."""
+        objects = self._objects
+        # The binary digits of the mask from the lowest bit.
+        bits = bin(mask)[:1:-1]
+        return set(objects[i] for i, b in enumerate(bits) if b == "1")
 
 
 # End class TagManager